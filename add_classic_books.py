@@ -1,21 +1,11 @@
 import os
 import django
-import requests
-from io import BytesIO
-from django.core.files.base import ContentFile
-from datetime import datetime
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
 django.setup()
 
-from library.models import Book, Author, Category
-from django.utils import timezone
-
-# Kategori oluştur
-classics_category, created = Category.objects.get_or_create(
-    name="Dünya Klasikleri",
-    defaults={"description": "Dünya edebiyatının en önemli klasik eserleri."}
-)
+import instrumentation
+from import_catalog import import_records
 
 # Kitap bilgileri
 classic_books = [
@@ -171,58 +161,17 @@ classic_books = [
     }
 ]
 
-# Kitapları ekle
-for book_data in classic_books:
-    # Yazar oluştur veya al
-    author_data = book_data.pop('author')
-    birth_date = datetime.strptime(author_data['birth_date'], '%Y-%m-%d').date() if author_data.get('birth_date') else None
-    
-    author, created = Author.objects.get_or_create(
-        name=author_data['name'],
-        defaults={
-            'biography': author_data.get('biography', ''),
-            'birth_date': birth_date
-        }
-    )
-    
-    # Kitap kapak resmi URL'sini al
-    cover_image_url = book_data.pop('cover_image_url', None)
-    
-    # Kitabı oluştur veya güncelle
-    book, created = Book.objects.get_or_create(
-        isbn=book_data['isbn'],
-        defaults={
-            'title': book_data['title'],
-            'publication_date': datetime.strptime(book_data['publication_date'], '%Y-%m-%d').date(),
-            'description': book_data['description'],
-            'page_count': book_data['page_count'],
-            'language': book_data['language'],
-            'publisher': book_data['publisher'],
-            'category': classics_category,
-            'available_copies': 3,  # Her kitaptan 3 kopya
-            'total_copies': 3
-        }
+# Kitapları toplu olarak ekle; kapaklar update_book_covers.py --queued ile indirilir
+# Aşama süreleri (authors, insert, queue) sonunda yazdırılır
+with instrumentation.script('add_classic_books'):
+    for book_data in classic_books:
+        book_data['authors'] = [book_data.pop('author')]
+        book_data['total_copies'] = 3  # Her kitaptan 3 kopya
+
+    import_records(
+        classic_books,
+        category_name="Dünya Klasikleri",
+        category_description="Dünya edebiyatının en önemli klasik eserleri.",
     )
-    
-    # Yazarı ekle
-    book.authors.add(author)
-    
-    # Kapak resmini indir ve ekle
-    if cover_image_url and created:
-        try:
-            response = requests.get(cover_image_url)
-            if response.status_code == 200:
-                book.cover_image.save(
-                    f"{book.isbn}_cover.jpg",
-                    ContentFile(response.content),
-                    save=True
-                )
-                print(f"Kapak resmi eklendi: {book.title}")
-            else:
-                print(f"Kapak resmi indirilemedi: {book.title}")
-        except Exception as e:
-            print(f"Hata: {e}")
-    
-    print(f"Kitap {'oluşturuldu' if created else 'güncellendi'}: {book.title}")
 
-print("Dünya klasikleri kitapları başarıyla eklendi!") 
\ No newline at end of file
+print("Dünya klasikleri kitapları başarıyla eklendi!")
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+import time
+import random
+import argparse
+import django
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from django.db import transaction
+
+from library.models import Book, ItemIdentifier, Member
+
+import scan_lookup
+
+# Okuma çözümleme gecikme ölçümü
+# Scan resolution latency benchmark
+#
+#   python benchmark_scan_lookup.py --synthetic 5000 --scans 20000
+#
+# Önbellek soğukken ve ısınmışken tek tek (self-check) ve toplu (RFID kapısı)
+# çözümleme sürelerini etiket başına ölçer ve yüzdelikleri yazar. --synthetic
+# verilirse geçici kitap kimlikleri oluşturulur ve ölçüm sonunda geri alınır.
+#
+# Measures per-tag resolution time one by one (self-check) and in batches
+# (RFID gate) with a cold and a warm cache, and prints percentiles. With
+# --synthetic temporary item identifiers are created and rolled back at the end.
+
+TARGET_P99_MS = 1.0
+GATE_BATCH_SIZE = 50
+
+class Rollback(Exception):
+    pass
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'max': samples[-1]}
+
+def report(label, samples, per=1):
+    values = percentiles([sample / per for sample in samples])
+    print(f"  {label:<28} " + '  '.join(f"{name} {value * 1000:.3f} ms" for name, value in values.items()))
+    return values
+
+def identifiers():
+    values = []
+    for member in Member.objects.values_list(*scan_lookup.MEMBER_IDENTIFIER_FIELDS):
+        values.extend(value for value in member if value)
+    values.extend(ItemIdentifier.objects.values_list('identifier_value', flat=True))
+    return values
+
+def create_synthetic(count):
+    book_ids = list(Book.objects.values_list('id', flat=True))
+    if not book_ids:
+        raise SystemExit("Kitap yok / No books")
+    ItemIdentifier.objects.bulk_create([
+        ItemIdentifier(identifier_type='barcode', identifier_value=f"BENCH{i:08d}", book_id=random.choice(book_ids))
+        for i in range(count)
+    ], batch_size=1000)
+
+def measure(tags, scans):
+    scan_lookup.cache.clear()
+
+    cold = []
+    for tag in tags:
+        started = time.perf_counter()
+        scan_lookup.resolve(tag)
+        cold.append(time.perf_counter() - started)
+
+    warm = []
+    for _ in range(scans):
+        tag = random.choice(tags)
+        started = time.perf_counter()
+        scan_lookup.resolve(tag)
+        warm.append(time.perf_counter() - started)
+
+    gate = []
+    for _ in range(max(1, scans // GATE_BATCH_SIZE)):
+        batch = random.sample(tags, min(GATE_BATCH_SIZE, len(tags)))
+        started = time.perf_counter()
+        scan_lookup.resolve_many(batch)
+        gate.append(time.perf_counter() - started)
+
+    print(f"{len(tags)} kimlik, {scans} okuma / {len(tags)} identifiers, {scans} scans")
+    report("soğuk / cold", cold)
+    values = report("ılık / warm", warm)
+    report("kapı, etiket başına / gate per tag", gate, per=min(GATE_BATCH_SIZE, len(tags)))
+    ok = values['p99'] * 1000 < TARGET_P99_MS
+    print(f"{'OK  ' if ok else 'HATA'} ılık p99 < {TARGET_P99_MS} ms / warm p99 < {TARGET_P99_MS} ms")
+    return ok
+
+def main(synthetic=0, scans=10000):
+    """
+    Ana fonksiyon
+    Sentetik veri istenirse ölçümü geri alınan bir işlem içinde yapar
+
+    Main function
+    Runs the measurement inside a rolled back transaction when synthetic data is requested
+    """
+    try:
+        with transaction.atomic():
+            if synthetic:
+                create_synthetic(synthetic)
+            tags = identifiers()
+            if not tags:
+                raise SystemExit("Ölçülecek kimlik yok, --synthetic kullanın / No identifiers, use --synthetic")
+            ok = measure(tags, scans)
+            if synthetic:
+                raise Rollback()
+    except Rollback:
+        pass
+    finally:
+        scan_lookup.cache.clear()
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Okuma çözümleme gecikmesini ölç / Benchmark scan resolution latency")
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help="Geçici olarak oluşturulacak kitap kimliği sayısı / Temporary item identifiers to create")
+    parser.add_argument('--scans', type=int, default=10000, help="Ölçülecek okuma sayısı / Scans to measure")
+    args = parser.parse_args()
+    raise SystemExit(0 if main(args.synthetic, args.scans) else 1)
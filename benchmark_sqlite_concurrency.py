@@ -0,0 +1,126 @@
+import os
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+from sqlite_tuning import PRAGMAS, READ_ONLY_PRAGMAS
+
+# Yazma sırasında okuma gecikmesi ölçümü: varsayılan günlük kipi ve WAL
+# Read latency during writes: default journal mode vs WAL
+#
+#   python benchmark_sqlite_concurrency.py --seconds 5 --readers 4
+#
+# db.sqlite3 geçici bir klasöre kopyalanır; asıl veritabanına dokunulmaz. Bir
+# yazıcı, kapak kaydı gibi uzun süren yazmaları taklit ederek kilidi
+# --hold-ms boyunca tutar; okuyucular bu sırada kitap sorgusu çalıştırır.
+# Her kip için okuma gecikmesi yüzdelikleri ve kilit hataları yazılır.
+#
+# db.sqlite3 is copied to a temporary folder; the real database is never
+# touched. A writer holds the lock for --hold-ms, imitating long writes such as
+# saving covers, while readers run a book query. Read latency percentiles and
+# lock errors are printed for each mode.
+
+READ_QUERY = "SELECT id, title, available_copies FROM library_book WHERE id = ?"
+
+def connect(path, pragmas):
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+    for name, value in pragmas:
+        connection.execute(f"PRAGMA {name} = {value}")
+    return connection
+
+def writer(path, pragmas, stop, hold, book_ids):
+    connection = connect(path, pragmas)
+    count = 0
+    while not stop.is_set():
+        connection.execute("BEGIN EXCLUSIVE")
+        connection.executemany(
+            "UPDATE library_book SET available_copies = available_copies WHERE id = ?",
+            [(book_id,) for book_id in book_ids[count % len(book_ids)::50]]
+        )
+        time.sleep(hold)
+        connection.execute("COMMIT")
+        count += 1
+        time.sleep(hold / 4)
+    connection.close()
+
+def reader(path, pragmas, stop, book_ids, samples, errors):
+    connection = connect(path, pragmas)
+    i = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            connection.execute(READ_QUERY, (book_ids[i % len(book_ids)],)).fetchall()
+            samples.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors.append(1)
+        i += 1
+    connection.close()
+
+def run(path, mode, seconds, readers, hold):
+    tuned = mode == 'wal'
+    write_pragmas = PRAGMAS if tuned else [('journal_mode', 'DELETE'), ('busy_timeout', 5000)]
+    read_pragmas = READ_ONLY_PRAGMAS if tuned else [('busy_timeout', 5000)]
+    connect(path, write_pragmas).close()
+
+    book_ids = [row[0] for row in connect(path, read_pragmas).execute("SELECT id FROM library_book")]
+    stop = threading.Event()
+    samples = []
+    errors = []
+    threads = [threading.Thread(target=writer, args=(path, write_pragmas, stop, hold, book_ids))]
+    threads += [
+        threading.Thread(target=reader, args=(path, read_pragmas, stop, book_ids, samples, errors))
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    samples.sort()
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))] * 1000 if samples else float('nan')
+    # Yazma kilidinin yarısından uzun süren okumalar kilit yüzünden beklemiş sayılır
+    # Reads longer than half the write lock are counted as blocked by it
+    blocked = sum(sample for sample in samples if sample >= hold / 2)
+    print(f"  {mode:<7} okuma/reads {len(samples):>8}  p50 {pick(0.50):7.3f} ms  p99 {pick(0.99):7.3f} ms"
+          f"  max {pick(1.0):8.3f} ms  bekleme/blocked {blocked:6.2f} s  hata/errors {len(errors)}")
+    return blocked, len(errors)
+
+def main(database='db.sqlite3', seconds=5.0, readers=4, hold_ms=50):
+    """
+    Ana fonksiyon
+    Her iki kipi kopyalanmış veritabanında sırayla ölçer
+
+    Main function
+    Measures both modes in turn on a copy of the database
+    """
+    workdir = tempfile.mkdtemp()
+    try:
+        results = {}
+        for mode in ('delete', 'wal'):
+            path = os.path.join(workdir, f"{mode}.sqlite3")
+            shutil.copyfile(database, path)
+            results[mode] = run(path, mode, seconds, readers, hold_ms / 1000)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    (wal_blocked, wal_errors), (default_blocked, _) = results['wal'], results['delete']
+    ok = not wal_errors and wal_blocked * 5 <= default_blocked
+    print(f"{'OK  ' if ok else 'HATA'} Okuyucuların yazma kilidinde beklediği süre: WAL {wal_blocked:.2f} s, "
+          f"varsayılan {default_blocked:.2f} s / Time readers waited on the write lock: "
+          f"WAL {wal_blocked:.2f} s, default {default_blocked:.2f} s")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite eşzamanlılık ölçümü / SQLite concurrency benchmark")
+    parser.add_argument('--database', default='db.sqlite3', help="Kopyalanacak veritabanı / Database to copy")
+    parser.add_argument('--seconds', type=float, default=5.0, help="Kip başına süre / Duration per mode")
+    parser.add_argument('--readers', type=int, default=4, help="Okuyucu sayısı / Number of readers")
+    parser.add_argument('--hold-ms', type=float, default=50,
+                        help="Yazıcının kilidi tuttuğu süre (ms) / Time the writer holds the lock (ms)")
+    args = parser.parse_args()
+    raise SystemExit(0 if main(args.database, args.seconds, args.readers, args.hold_ms) else 1)
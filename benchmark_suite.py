@@ -0,0 +1,420 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import threading
+import subprocess
+import tracemalloc
+import django
+from datetime import date, datetime
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Min
+from django.utils import timezone
+
+from library.models import Author, Book, Fine, Loan, Member, Reservation, SystemSetting
+
+import catalog_read_model
+import catalog_search
+import circulation
+import circulation_indexes
+import import_catalog
+import pagination
+import process_overdue_fines
+import report_aggregates
+import sqlite_tuning
+import synthetic_data
+
+# Kütüphane iş yükü ölçüm takımı
+# Library workload benchmark suite
+#
+#   python benchmark_suite.py --scale small --output results.json
+#   python benchmark_suite.py --books 50000 --compare results.json
+#
+# db.sqlite3 --database dosyasına kopyalanır ve synthetic_data ile istenen
+# ölçekte veri üretilir; asıl veritabanına dokunulmaz. Dosya zaten varsa
+# yeniden kullanılır (--regenerate ile baştan üretilir). Senaryolar sırayla
+# çalışır ve her biri için süre, işlem başına gecikme yüzdelikleri, SQL sorgu
+# sayısı ve süresi ile tracemalloc tepe bellek kullanımı JSON olarak yazılır.
+# --compare önceki bir sonuç dosyasıyla karşılaştırır ve --threshold oranından
+# fazla yavaşlama veya sorgu artışı varsa 1 ile çıkar. Senaryolar veriyi
+# değiştirir (ödünç, ceza, içe aktarma); karşılaştırma için aynı ölçekte taze
+# üretilmiş veritabanları kullanılmalıdır.
+#
+# db.sqlite3 is copied to the --database file and filled with synthetic_data
+# at the requested scale; the real database is never touched. An existing file
+# is reused (--regenerate builds it again). The scenarios run in turn and for
+# each one the time, per-operation latency percentiles, SQL query count and
+# time, and tracemalloc peak memory are written as JSON. --compare checks
+# against an earlier result file and exits with 1 if anything is slower or
+# runs more queries than the --threshold ratio. Scenarios change the data
+# (loans, fines, imports); compare runs on freshly generated databases of the
+# same scale.
+
+DEFAULT_DATABASE = 'benchmark.sqlite3'
+DEFAULT_ITERATIONS = 500
+DEFAULT_THREADS = 4
+DEFAULT_THRESHOLD = 1.2
+IMPORT_SIZE = 5000
+SEARCH_LIMIT = 20
+BROWSE_PAGES = 50
+# Ödünç fırtınasında üzerinde yarışılan popüler kitap sayısı
+# Number of popular books contended for in the checkout storm
+HOT_BOOKS = 20
+
+class QueryCounter:
+    """
+    Bağlantı execute_wrapper'ı: sorgu sayısını ve toplam sorgu süresini tutar
+    İş parçacıkları aynı sayacı paylaşabilir
+
+    Connection execute_wrapper that keeps the query count and total query time
+    Threads can share the same counter
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.count += 1
+                self.seconds += elapsed
+
+class Context:
+    def __init__(self, rng, iterations, threads, import_size):
+        self.rng = rng
+        self.iterations = iterations
+        self.threads = threads
+        self.import_size = import_size
+        self.counter = None
+        # Sentetik kitaplar popülerlik sırasıyla oluşturulur: küçük id daha popülerdir
+        # Synthetic books are created in popularity order: a lower id is more popular
+        self.book_ids = list(Book.objects.filter(isbn__startswith=synthetic_data.ISBN_PREFIX)
+                             .order_by('id').values_list('id', flat=True))
+        self.member_ids = list(Member.objects.filter(user__username__startswith=synthetic_data.USERNAME_PREFIX)
+                               .order_by('id').values_list('id', flat=True))
+        if not self.book_ids or not self.member_ids:
+            raise SystemExit("Sentetik veri yok, --regenerate kullanın / No synthetic data, use --regenerate")
+
+def timed(samples, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    samples.append(time.perf_counter() - started)
+    return result
+
+# Senaryolar: hazırlık (ölçülmez) ve çalıştırma (ölçülür)
+# Scenarios: preparation (not measured) and run (measured)
+
+def prepare_search(ctx):
+    catalog_search.ensure_index()
+    titles = Book.objects.filter(id__in=[synthetic_data.popular(ctx.rng, ctx.book_ids)
+                                         for _ in range(ctx.iterations)]).values_list('title', flat=True)
+    queries = []
+    for title in titles:
+        words = title.split()
+        # Tam kelimeler ve yazılmakta olan son kelime (otomatik tamamlama) karışık aranır
+        # Whole words and a half-typed last word (autocomplete) are searched in turn
+        queries.append(' '.join(words[:2]) if len(queries) % 2 else words[0][:3])
+    return queries
+
+def run_search(ctx, queries):
+    samples = []
+    for query in queries:
+        timed(samples, lambda: catalog_read_model.get_documents(catalog_search.search_ids(query, SEARCH_LIMIT)))
+    return {'operations': len(queries), 'samples': samples}
+
+def prepare_detail(ctx):
+    return [synthetic_data.popular(ctx.rng, ctx.book_ids) for _ in range(ctx.iterations)]
+
+def run_detail(ctx, book_ids):
+    samples = []
+    for book_id in book_ids:
+        timed(samples, catalog_read_model.get_document, book_id)
+    return {'operations': len(book_ids), 'samples': samples}
+
+def run_browse(ctx, state):
+    samples = []
+    cursor = None
+    for _ in range(BROWSE_PAGES):
+        page = timed(samples, lambda: pagination.book_page(cursor))
+        timed(samples, catalog_read_model.get_documents, [book.id for book in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    return {'operations': len(samples), 'samples': samples}
+
+def _storm_worker(ctx, rounds, seed, samples, outcome):
+    rng = random.Random(seed)
+    hot = ctx.book_ids[:HOT_BOOKS]
+    try:
+        with connection.execute_wrapper(ctx.counter):
+            for _ in range(rounds):
+                started = time.perf_counter()
+                try:
+                    loan = circulation.checkout(rng.choice(hot), rng.choice(ctx.member_ids))
+                    circulation.return_loan(loan.id)
+                except circulation.BookNotAvailable:
+                    with ctx.counter.lock:
+                        outcome['unavailable'] += 1
+                except Exception:
+                    with ctx.counter.lock:
+                        outcome['errors'] += 1
+                samples.append(time.perf_counter() - started)
+    finally:
+        connection.close()
+
+def run_storm(ctx, state):
+    samples = []
+    outcome = {'unavailable': 0, 'errors': 0}
+    rounds = max(1, ctx.iterations // ctx.threads)
+    threads = [
+        threading.Thread(target=_storm_worker, args=(ctx, rounds, ctx.rng.random(), samples, outcome))
+        for _ in range(ctx.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {'operations': len(samples), 'samples': samples, **outcome}
+
+def prepare_overdue(ctx):
+    SystemSetting.objects.filter(key=process_overdue_fines.CHECKPOINT_SETTING).delete()
+    return Loan.objects.filter(return_date__isnull=True, due_date__lt=timezone.localdate()).count()
+
+def run_overdue(ctx, overdue):
+    process_overdue_fines.main(time_budget=float('inf'))
+    return {'operations': overdue}
+
+def prepare_reports(ctx):
+    return Loan.objects.aggregate(first=Min('loan_date'))['first']
+
+def run_reports(ctx, first_day):
+    samples = []
+    days = timed(samples, report_aggregates.refresh, first_day)
+    for report_type in report_aggregates.REPORT_TYPES:
+        timed(samples, report_aggregates.run_report, report_type, {'start': first_day.isoformat()})
+    return {'operations': days, 'samples': samples}
+
+def prepare_import(ctx):
+    # Önceki çalıştırmaların kayıtlarıyla çakışmasın diye sıradaki ISBN'lerden başlanır
+    # Starts from the next ISBNs so it does not clash with records of earlier runs
+    start = Book.objects.filter(isbn__startswith=synthetic_data.IMPORT_ISBN_PREFIX).count()
+    return list(synthetic_data.catalog_records(ctx.import_size, start=start))
+
+def run_import(ctx, records):
+    created = import_catalog.import_records(records)[0]
+    return {'operations': len(records), 'created': created}
+
+# (ad, hazırlık, çalıştırma); sıra önemlidir, fırtına ve gecikme taraması veriyi değiştirir
+# (name, preparation, run); order matters, the storm and the overdue sweep change the data
+SCENARIOS = [
+    ('catalog_search', prepare_search, run_search),
+    ('book_detail', prepare_detail, run_detail),
+    ('catalog_browse', None, run_browse),
+    ('checkout_return_storm', None, run_storm),
+    ('overdue_sweep', prepare_overdue, run_overdue),
+    ('report_build', prepare_reports, run_reports),
+    ('bulk_import', prepare_import, run_import),
+]
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return {name: round(pick(p) * 1000, 3) for name, p in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))}
+
+def measure(name, prepare, run, ctx, memory=True):
+    """
+    Senaryoyu hazırlar, çalıştırır ve ölçümlerini sözlük olarak döndürür
+
+    Prepares and runs the scenario and returns its measurements as a dict
+    """
+    state = prepare(ctx) if prepare else None
+    ctx.counter = QueryCounter()
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(ctx.counter):
+            outcome = run(ctx, state)
+    finally:
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        if memory:
+            tracemalloc.stop()
+
+    operations = outcome.pop('operations')
+    samples = outcome.pop('samples', None)
+    result = {
+        'operations': operations,
+        'seconds': round(seconds, 4),
+        'operations_per_second': round(operations / seconds, 2) if seconds else None,
+        'queries': ctx.counter.count,
+        'queries_per_operation': round(ctx.counter.count / operations, 2) if operations else None,
+        'db_seconds': round(ctx.counter.seconds, 4),
+        **outcome,
+    }
+    if samples:
+        result['latency_ms'] = percentiles(samples)
+    if memory:
+        result['peak_memory_kb'] = peak // 1024
+    print(f"  {name:<22} {operations:>8} işlem/ops  {seconds:8.2f} s  {result['queries']:>8} sorgu/queries"
+          f"  {result['db_seconds']:7.2f} s db" + (f"  {result['peak_memory_kb']:>8} KB" if memory else ''))
+    return result
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def use_database(path, template, regenerate):
+    """
+    Varsayılan bağlantıyı ölçüm veritabanına yönlendirir; dosya yoksa şablondan kopyalar
+    Veritabanı yeni oluşturulduysa True döndürür
+
+    Points the default connection at the benchmark database, copying it from the template if missing
+    Returns True if the database was newly created
+    """
+    if connection.vendor != 'sqlite':
+        raise SystemExit("Ölçüm takımı yalnızca SQLite kopyası üzerinde çalışır / "
+                         "The benchmark suite only runs on a SQLite copy")
+    created = regenerate or not os.path.exists(path)
+    if created:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        # backup() WAL dosyasındaki onaylanmış sayfaları da kopyalar
+        # backup() also copies committed pages still in the WAL file
+        source = sqlite3.connect(template)
+        target = sqlite3.connect(path)
+        source.backup(target)
+        target.close()
+        source.close()
+
+    connections.close_all()
+    connections[DEFAULT_DB_ALIAS].settings_dict['NAME'] = path
+    if sqlite_tuning.REPORTING_ALIAS in connections.settings:
+        connections[sqlite_tuning.REPORTING_ALIAS].settings_dict['NAME'] = sqlite_tuning.read_only_uri(path)
+    return created
+
+def dataset():
+    return {model.__name__.lower(): model.objects.count() for model in (Book, Author, Member, Loan, Reservation, Fine)}
+
+def compare(results, baseline_path, threshold):
+    """
+    Sonuçları önceki bir sonuç dosyasıyla karşılaştırır; gerileme yoksa True döndürür
+
+    Compares the results with an earlier result file; returns True if nothing regressed
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nKarşılaştırma / Comparison: {baseline.get('commit') or baseline_path}")
+    ok = True
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        time_ratio = current['seconds'] / previous['seconds'] if previous['seconds'] else 1.0
+        query_ratio = current['queries'] / previous['queries'] if previous['queries'] else 1.0
+        regressed = time_ratio > threshold or query_ratio > threshold
+        ok = ok and not regressed
+        print(f"  {'HATA' if regressed else 'OK  '} {name:<22} süre/time x{time_ratio:.2f}"
+              f"  sorgu/queries x{query_ratio:.2f}")
+    return ok
+
+def main(books, seed=synthetic_data.DEFAULT_SEED, anchor=synthetic_data.DEFAULT_ANCHOR,
+         database=DEFAULT_DATABASE, template='db.sqlite3', regenerate=False, scenarios=None, iterations=DEFAULT_ITERATIONS, threads=DEFAULT_THREADS,
+         import_size=IMPORT_SIZE, memory=True, output=None, baseline=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Ana fonksiyon
+    Ölçüm veritabanını hazırlar, senaryoları çalıştırır ve sonuçları JSON olarak yazar
+
+    Main function
+    Prepares the benchmark database, runs the scenarios and writes the results as JSON
+    """
+    if use_database(database, template, regenerate):
+        print(f"{books} kitaplık sentetik veri üretiliyor / Generating synthetic data for {books} books")
+        started = time.perf_counter()
+        synthetic_data.generate(books, seed, anchor)
+        circulation_indexes.create_indexes()
+        print(f"  {time.perf_counter() - started:.1f} s")
+
+    results = {
+        'commit': _commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'tuned': sqlite_tuning.is_enabled(),
+        'seed': seed,
+        'anchor': anchor.isoformat(),
+        'iterations': iterations,
+        'threads': threads,
+        'dataset': dataset(),
+        'scenarios': {},
+    }
+    print(f"Veri / Dataset: {results['dataset']}")
+
+    ctx = Context(random.Random(seed), iterations, threads, import_size)
+    for name, prepare, run in SCENARIOS:
+        if not scenarios or name in scenarios:
+            results['scenarios'][name] = measure(name, prepare, run, ctx, memory)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Sonuçlar yazıldı / Results written: {output}")
+    return compare(results, baseline, threshold) if baseline else True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kütüphane iş yükü ölçümü / Library workload benchmark")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--scale', choices=synthetic_data.SCALES, default='small',
+                      help="Hazır ölçek / Preset scale")
+    size.add_argument('--books', type=int, help="Sentetik kitap sayısı / Number of synthetic books")
+    parser.add_argument('--seed', type=int, default=synthetic_data.DEFAULT_SEED,
+                        help="Rastgelelik tohumu / Random seed")
+    parser.add_argument('--anchor', type=date.fromisoformat, default=synthetic_data.DEFAULT_ANCHOR,
+                        help="Sentetik tarihlerin dayandığı gün (YYYY-MM-DD) / "
+                             "Day the synthetic dates count back from (YYYY-MM-DD)")
+    parser.add_argument('--database', default=DEFAULT_DATABASE,
+                        help="Ölçüm veritabanı dosyası / Benchmark database file")
+    parser.add_argument('--template', default='db.sqlite3', help="Kopyalanacak şema / Schema to copy")
+    parser.add_argument('--regenerate', action='store_true',
+                        help="Veritabanını baştan üret / Build the database again")
+    parser.add_argument('--scenario', action='append', choices=[name for name, _, _ in SCENARIOS],
+                        help="Yalnızca bu senaryoları çalıştır / Only run these scenarios")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help="Senaryo başına işlem sayısı / Operations per scenario")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help="Ödünç fırtınasındaki iş parçacığı sayısı / Threads in the checkout storm")
+    parser.add_argument('--import-size', type=int, default=IMPORT_SIZE,
+                        help="İçe aktarılacak kayıt sayısı / Records to import")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="tracemalloc kullanma (daha kesin süreler) / Skip tracemalloc (more precise timings)")
+    parser.add_argument('--output', help="Sonuç JSON dosyası / Result JSON file")
+    parser.add_argument('--compare', help="Karşılaştırılacak önceki sonuç / Earlier result to compare with")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="İzin verilen gerileme oranı / Allowed regression ratio")
+    args = parser.parse_args()
+    ok = main(
+        args.books or synthetic_data.SCALES[args.scale], seed=args.seed, anchor=args.anchor,
+        database=args.database,
+        template=args.template, regenerate=args.regenerate, scenarios=args.scenario,
+        iterations=args.iterations, threads=args.threads, import_size=args.import_size,
+        memory=not args.no_memory, output=args.output, baseline=args.compare, threshold=args.threshold,
+    )
+    raise SystemExit(0 if ok else 1)
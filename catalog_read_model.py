@@ -0,0 +1,227 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from library.models import Author, Book, Category, MaterialType
+
+import cover_renditions
+from circulation_signals import availability_changed
+
+# Katalog liste ve detay sayfaları için önbellekli kitap belgeleri
+# Cached book documents for catalog list and detail pages
+#
+# Her kitap için başlık, yazar adları, kategori, materyal türü, durum ve
+# küçük kapak URL'sini içeren bir sözlük önbellekte tutulur. Önbellekte
+# olmayan kitaplar sabit sayıda sorguyla (select_related + prefetch_related)
+# toplu olarak yüklenir, böylece bir liste sayfası kitap sayısından bağımsız
+# sayıda sorgu yapar. Belgeler kayıt, ödünç verme ve iade sinyalleriyle
+# geçersiz kılınır; uygulamanın AppConfig.ready() metodunda connect_signals()
+# çağrılmalıdır.
+#
+# A dict with the title, author names, category, material type, availability
+# and thumbnail URL of each book is kept in the cache. Books missing from the
+# cache are loaded in bulk with a fixed number of queries (select_related +
+# prefetch_related), so a list page runs the same number of queries however
+# many books it shows. Documents are invalidated by save, checkout and return
+# signals; the app's AppConfig.ready() should call connect_signals().
+#
+# Belge anahtarı kitabın kuşak (generation) değerini içerir. Geçersiz kılma
+# kuşağı yeniler; okuyucu kuşağı veritabanından okumadan önce alır ve belgeyi
+# o kuşağın anahtarına yazar. Onaydan önce eski veriyi okuyan biri belgeyi
+# geç yazsa bile eski kuşağın anahtarına yazar ve o belge bir daha okunmaz.
+#
+# The document key contains the book's generation. Invalidation renews the
+# generation; a reader takes it before reading the database and writes the
+# document under that generation's key. A reader that read old data before the
+# commit and writes late only fills the old generation's key, which is never
+# read again.
+
+# Belge yapısı değişirse artırılır, eski anahtarlar kendiliğinden kullanılmaz olur
+# Bump when the document layout changes, old keys then simply go unused
+DOCUMENT_VERSION = 4
+CACHE_TIMEOUT = 60 * 60
+
+def generation_key(book_id):
+    return f"catalog:v{DOCUMENT_VERSION}:gen:{book_id}"
+
+def cache_key(book_id, generation):
+    return f"catalog:v{DOCUMENT_VERSION}:book:{book_id}:{generation}"
+
+def _new_generation():
+    # Sayaç yerine zaman kullanılır; kuşak anahtarı önbellekten düşerse eski
+    # belgeler yeniden kullanılmaz
+    # A timestamp instead of a counter, so if a generation key is evicted the
+    # old documents are never used again
+    return time.time_ns()
+
+def generations(book_ids):
+    """
+    Kitapların güncel kuşak değerlerini döndürür; olmayanlar oluşturulur
+
+    Returns the current generation of each book; missing ones are created
+    """
+    keys = {book_id: generation_key(book_id) for book_id in book_ids}
+    found = cache.get_many(keys.values())
+    missing = [key for key in keys.values() if key not in found]
+    if missing:
+        generation = _new_generation()
+        for key in missing:
+            cache.add(key, generation, None)
+        # Aynı anda oluşturan başka bir süreç kazanmış olabilir
+        # Another process creating it at the same time may have won
+        found.update(cache.get_many(missing))
+        for key in missing:
+            found.setdefault(key, generation)
+    return {book_id: found[key] for book_id, key in keys.items()}
+
+def book_queryset():
+    """
+    Belge için gereken her şeyi sabit sayıda sorguyla getiren QuerySet
+    Önbellek kullanılamadığında doğrudan da kullanılabilir
+
+    QuerySet that fetches everything a document needs in a fixed number of queries
+    Can also be used directly when the cache is not available
+    """
+    return Book.objects.select_related('category', 'material_type').prefetch_related(
+        Prefetch('authors', queryset=Author.objects.only('id', 'name').order_by('name'))
+    )
+
+def book_document(book):
+    """
+    Kitap nesnesinden önbelleğe yazılacak sözlüğü oluşturur
+
+    Builds the dict that is written to the cache from a book object
+    """
+    return {
+        'id': book.id,
+        'title': book.title,
+        'isbn': book.isbn,
+        'authors': [author.name for author in book.authors.all()],
+        'category': book.category.name if book.category else None,
+        'material_type': book.material_type.name if book.material_type else None,
+        'publisher': book.publisher,
+        'language': book.language,
+        'available_copies': book.available_copies,
+        'total_copies': book.total_copies,
+        'available': book.available_copies > 0,
+        'thumbnail_url': cover_renditions.rendition_url(book.cover_image, 'thumb'),
+        'cover_url': book.cover_image.url if book.cover_image else None,
+    }
+
+def get_documents(book_ids):
+    """
+    Kitap belgelerini verilen id sırasıyla döndürür
+    Önbellekte olmayanlar tek seferde yüklenip önbelleğe yazılır
+
+    Returns book documents in the order of the given ids
+    Those missing from the cache are loaded at once and written to the cache
+    """
+    book_ids = list(book_ids)
+    # Kuşaklar veritabanından okumadan önce alınır
+    # Generations are taken before reading the database
+    keys = {book_id: cache_key(book_id, generation) for book_id, generation in generations(book_ids).items()}
+    cached = cache.get_many(keys.values())
+    documents = {book_id: cached[key] for book_id, key in keys.items() if key in cached}
+
+    missing = [book_id for book_id in book_ids if book_id not in documents]
+    if missing:
+        loaded = {book.id: book_document(book) for book in book_queryset().filter(id__in=missing)}
+        cache.set_many({keys[book_id]: document for book_id, document in loaded.items()}, CACHE_TIMEOUT)
+        documents.update(loaded)
+
+    return [documents[book_id] for book_id in book_ids if book_id in documents]
+
+def get_document(book_id):
+    """
+    Tek bir kitabın belgesini döndürür, kitap yoksa None
+
+    Returns the document of a single book, or None if it does not exist
+    """
+    documents = get_documents([book_id])
+    return documents[0] if documents else None
+
+def list_documents(queryset, offset=0, limit=20):
+    """
+    Filtrelenmiş kitap listesinin bir sayfasını belge olarak döndürür
+    Yalnızca id'ler sorgulanır, belgeler önbellekten gelir
+
+    Returns one page of a filtered book list as documents
+    Only the ids are queried, the documents come from the cache
+    """
+    book_ids = queryset.values_list('id', flat=True)[offset:offset + limit]
+    return get_documents(book_ids)
+
+def invalidate(book_ids):
+    """
+    Verilen kitapların kuşağını yeniler; önbellekteki belgeleri artık okunmaz
+
+    Renews the generation of the given books; their cached documents are no longer read
+    """
+    generation = _new_generation()
+    cache.set_many({generation_key(book_id): generation for book_id in book_ids}, None)
+
+def invalidate_on_commit(book_ids):
+    """
+    Belgeleri yazan işlem onaylandıktan sonra geçersiz kılar
+    Onaydan sonra okuyanlar yeni kuşakla yeni veriyi okur
+
+    Invalidates the documents after the writing transaction commits
+    Readers after the commit read the new data under the new generation
+    """
+    # Kitap id'leri şimdi okunur; silme sonrasında ilişkiler artık bulunamaz
+    # Book ids are read now; after a delete the relations can no longer be found
+    book_ids = list(book_ids)
+    if book_ids:
+        transaction.on_commit(lambda: invalidate(book_ids))
+
+def _book_changed(sender, instance, **kwargs):
+    invalidate_on_commit([instance.pk])
+
+def _book_authors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_on_commit([instance.pk])
+    elif pk_set:
+        invalidate_on_commit(pk_set)
+    else:
+        invalidate_on_commit(Book.objects.filter(authors=instance).values_list('id', flat=True))
+
+def _author_changed(sender, instance, **kwargs):
+    invalidate_on_commit(Book.objects.filter(authors=instance).values_list('id', flat=True))
+
+def _category_changed(sender, instance, **kwargs):
+    invalidate_on_commit(Book.objects.filter(category=instance).values_list('id', flat=True))
+
+def _material_type_changed(sender, instance, **kwargs):
+    invalidate_on_commit(Book.objects.filter(material_type=instance).values_list('id', flat=True))
+
+def _availability_changed(sender, book_ids, **kwargs):
+    # Bu sinyal zaten işlem onaylandıktan sonra gönderilir
+    # This signal is already sent after the transaction commits
+    invalidate(book_ids)
+
+def connect_signals():
+    """
+    Belgeleri geçersiz kılan sinyalleri bağlar
+
+    Connects the signals that invalidate documents
+    """
+    post_save.connect(_book_changed, sender=Book, dispatch_uid='catalog_read_model_book_saved')
+    post_delete.connect(_book_changed, sender=Book, dispatch_uid='catalog_read_model_book_deleted')
+    m2m_changed.connect(_book_authors_changed, sender=Book.authors.through,
+                        dispatch_uid='catalog_read_model_book_authors_changed')
+    post_save.connect(_author_changed, sender=Author, dispatch_uid='catalog_read_model_author_saved')
+    pre_delete.connect(_author_changed, sender=Author, dispatch_uid='catalog_read_model_author_deleted')
+    post_save.connect(_category_changed, sender=Category, dispatch_uid='catalog_read_model_category_saved')
+    # Silmede kitapların bağı kopmadan önce (pre_delete) hangi kitapların etkilendiği bulunur
+    # On delete the affected books are found before their link is removed (pre_delete)
+    pre_delete.connect(_category_changed, sender=Category, dispatch_uid='catalog_read_model_category_deleted')
+    post_save.connect(_material_type_changed, sender=MaterialType,
+                      dispatch_uid='catalog_read_model_material_type_saved')
+    pre_delete.connect(_material_type_changed, sender=MaterialType,
+                       dispatch_uid='catalog_read_model_material_type_deleted')
+    availability_changed.connect(_availability_changed, dispatch_uid='catalog_read_model_availability_changed')
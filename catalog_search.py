@@ -0,0 +1,260 @@
+import re
+
+from django.db import connection
+from django.db.models import Case, When
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from library.models import Author, Book
+
+from title_normalization import fold_text
+
+# Kitap başlığı, açıklaması, yazarları ve yayınevi üzerinde tam metin arama
+# Full-text search over book title, description, authors and publisher
+#
+# SQLite'ta FTS5 sanal tablosu, PostgreSQL'de tsvector sütunu ve GIN indeksi
+# kullanılır. Metinler indekslenmeden önce Türkçe kurallarına göre küçük harfe
+# çevrilir ve aksanlardan arındırılır (İ/ı/I/i ve ş/s aynı eşleşir).
+# İndeks model sinyalleriyle güncel tutulur; uygulamanın AppConfig.ready()
+# metodunda connect_signals() çağrılmalıdır.
+#
+# Uses an FTS5 virtual table on SQLite and a tsvector column with a GIN index
+# on PostgreSQL. Text is lowercased with Turkish rules and stripped of
+# diacritics before indexing (İ/ı/I/i and ş/s match each other).
+# The index is kept in sync through model signals; the app's AppConfig.ready()
+# should call connect_signals().
+
+FTS_TABLE = 'library_book_fts'
+PG_TABLE = 'library_book_search'
+
+# Tek seferde indekslenecek kitap sayısı
+# Number of books indexed at once
+INDEX_CHUNK_SIZE = 1000
+
+# Alan ağırlıkları: başlık, yazarlar, yayınevi, açıklama
+# Field weights: title, authors, publisher, description
+FIELD_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+PG_FIELD_WEIGHTS = ('A', 'B', 'C', 'D')
+
+WORD_RE = re.compile(r'\w+')
+
+def query_terms(query):
+    """
+    Arama metnini katlanmış kelimelere ayırır
+
+    Splits the search text into folded words
+    """
+    return WORD_RE.findall(fold_text(query))
+
+_index_ready = False
+
+def _is_postgresql():
+    return connection.vendor == 'postgresql'
+
+def ensure_index():
+    """
+    Arama tablosunu ve indeksini yoksa oluşturur
+
+    Creates the search table and its index if missing
+    """
+    global _index_ready
+    if _index_ready:
+        return
+    with connection.cursor() as cursor:
+        if _is_postgresql():
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+                " book_id bigint PRIMARY KEY REFERENCES library_book (id) ON DELETE CASCADE,"
+                " document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_TABLE}_document ON {PG_TABLE} USING GIN (document)"
+            )
+        else:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                " title, authors, publisher, description,"
+                " tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+    _index_ready = True
+
+def _documents(book_ids):
+    books = Book.objects.filter(id__in=book_ids) \
+        .only('id', 'title', 'publisher', 'description') \
+        .prefetch_related('authors')
+    for book in books:
+        yield (
+            book.id,
+            fold_text(book.title),
+            fold_text(' '.join(author.name for author in book.authors.all())),
+            fold_text(book.publisher),
+            fold_text(book.description),
+        )
+
+def index_books(book_ids):
+    """
+    Verilen kitapları indekste günceller
+
+    Updates the given books in the index
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    ensure_index()
+    documents = list(_documents(book_ids))
+    with connection.cursor() as cursor:
+        if _is_postgresql():
+            vector = ' || '.join(
+                f"setweight(to_tsvector('simple', %s), '{weight}')" for weight in PG_FIELD_WEIGHTS
+            )
+            cursor.executemany(
+                f"INSERT INTO {PG_TABLE} (book_id, document) VALUES (%s, {vector})"
+                " ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document",
+                documents
+            )
+            return
+        remove_books(book_ids, cursor)
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, authors, publisher, description)"
+            " VALUES (%s, %s, %s, %s, %s)",
+            documents
+        )
+
+def remove_books(book_ids, cursor=None):
+    """
+    Verilen kitapları indeksten siler
+
+    Removes the given books from the index
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    ensure_index()
+    if cursor is None:
+        with connection.cursor() as cursor:
+            return remove_books(book_ids, cursor)
+    placeholders = ', '.join(['%s'] * len(book_ids))
+    if _is_postgresql():
+        cursor.execute(f"DELETE FROM {PG_TABLE} WHERE book_id IN ({placeholders})", book_ids)
+    else:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", book_ids)
+
+def rebuild_index():
+    """
+    İndeksi sıfırdan oluşturur, kitapları gruplar halinde işler
+
+    Rebuilds the index from scratch, processing books in chunks
+    """
+    ensure_index()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {PG_TABLE if _is_postgresql() else FTS_TABLE}")
+
+    count = 0
+    chunk = []
+    for book_id in Book.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=INDEX_CHUNK_SIZE):
+        chunk.append(book_id)
+        if len(chunk) == INDEX_CHUNK_SIZE:
+            index_books(chunk)
+            count += len(chunk)
+            chunk = []
+    index_books(chunk)
+    return count + len(chunk)
+
+def search_ids(query, limit=20, prefix=True):
+    """
+    Sorguya uyan kitap id'lerini ilgi sırasına göre döndürür
+    prefix True ise son kelime önek olarak aranır (otomatik tamamlama için)
+
+    Returns matching book ids ordered by relevance
+    If prefix is True the last word is matched as a prefix (for autocomplete)
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    ensure_index()
+    with connection.cursor() as cursor:
+        if _is_postgresql():
+            parts = [f"{term}:*" if prefix and i == len(terms) - 1 else term for i, term in enumerate(terms)]
+            cursor.execute(
+                f"SELECT book_id FROM {PG_TABLE}, to_tsquery('simple', %s) query"
+                " WHERE document @@ query ORDER BY ts_rank(document, query) DESC LIMIT %s",
+                [' & '.join(parts), limit]
+            )
+        else:
+            parts = [f'"{term}"*' if prefix and i == len(terms) - 1 else f'"{term}"' for i, term in enumerate(terms)]
+            weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS)
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+                f" ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+                [' '.join(parts), limit]
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+def search_books(query, limit=20, prefix=True):
+    """
+    Sorguya uyan kitapları ilgi sırasını koruyan bir QuerySet olarak döndürür
+
+    Returns matching books as a QuerySet that keeps the relevance order
+    """
+    book_ids = search_ids(query, limit, prefix)
+    if not book_ids:
+        return Book.objects.none()
+    order = Case(*[When(id=book_id, then=position) for position, book_id in enumerate(book_ids)])
+    return Book.objects.filter(id__in=book_ids).order_by(order)
+
+def autocomplete(query, limit=10):
+    """
+    Arama kutusu için önek eşleşmesiyle kitap başlıklarını döndürür
+
+    Returns book titles by prefix match for the search box
+    """
+    book_ids = search_ids(query, limit, prefix=True)
+    titles = dict(Book.objects.filter(id__in=book_ids).values_list('id', 'title'))
+    return [titles[book_id] for book_id in book_ids if book_id in titles]
+
+def _book_saved(sender, instance, **kwargs):
+    index_books([instance.pk])
+
+def _book_deleted(sender, instance, **kwargs):
+    remove_books([instance.pk])
+
+def _book_authors_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # Yazarın tüm kitapları ayrılmadan önce hangi kitapların etkilendiğini sakla
+        # Remember the affected books before all of the author's books are unlinked
+        instance._search_book_ids = list(Book.objects.filter(authors=instance).values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        index_books([instance.pk])
+    elif pk_set:
+        index_books(pk_set)
+    else:
+        index_books(getattr(instance, '_search_book_ids', []))
+
+def _author_saved(sender, instance, created, **kwargs):
+    if not created:
+        index_books(Book.objects.filter(authors=instance).values_list('id', flat=True))
+
+def _author_deleting(sender, instance, **kwargs):
+    # Yazar silinince ara tablo satırları m2m_changed göndermeden silinir; kitapları önceden sakla
+    # Deleting an author removes the link rows without m2m_changed; remember the books beforehand
+    instance._search_book_ids = list(Book.objects.filter(authors=instance).values_list('id', flat=True))
+
+def _author_deleted(sender, instance, **kwargs):
+    index_books(getattr(instance, '_search_book_ids', []))
+
+def connect_signals():
+    """
+    İndeksi güncel tutan sinyalleri bağlar
+
+    Connects the signals that keep the index in sync
+    """
+    post_save.connect(_book_saved, sender=Book, dispatch_uid='catalog_search_book_saved')
+    post_delete.connect(_book_deleted, sender=Book, dispatch_uid='catalog_search_book_deleted')
+    m2m_changed.connect(_book_authors_changed, sender=Book.authors.through,
+                        dispatch_uid='catalog_search_book_authors_changed')
+    post_save.connect(_author_saved, sender=Author, dispatch_uid='catalog_search_author_saved')
+    pre_delete.connect(_author_deleting, sender=Author, dispatch_uid='catalog_search_author_deleting')
+    post_delete.connect(_author_deleted, sender=Author, dispatch_uid='catalog_search_author_deleted')
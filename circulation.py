@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from library.models import Book, Loan
+
+import reservations
+import system_settings
+from circulation_signals import availability_changed
+from db_utils import retry_on_contention
+
+# Ödünç verme ve iade işlemleri
+# Checkout and return operations
+#
+# available_copies sayacı okunup yazılmaz; koşullu F() güncellemesiyle tek
+# SQL cümlesinde azaltılır (available_copies > 0 ise). Böylece aynı anda
+# yapılan iki ödünç verme aynı son kopyayı alamaz. İşlemler kısa tutulur ve
+# kilit çakışmasında (SQLite "database is locked", PostgreSQL deadlock)
+# artan bekleme süreleriyle yeniden denenir.
+#
+# The available_copies counter is never read and written back; it is
+# decremented by a conditional F() update in a single SQL statement (only if
+# available_copies > 0), so two concurrent checkouts cannot take the same last
+# copy. Transactions are kept short and retried with increasing delays on lock
+# contention (SQLite "database is locked", PostgreSQL deadlock).
+
+DEFAULT_LOAN_PERIOD = 14
+LOAN_PERIOD_SETTING = 'default_loan_period'
+
+class CirculationError(Exception):
+    pass
+
+class BookNotAvailable(CirculationError):
+    pass
+
+class LoanAlreadyReturned(CirculationError):
+    pass
+
+def loan_periods(book_ids):
+    """
+    Kitapların ödünç sürelerini (materyal türüne göre) döndürür
+    Materyal türleri tek küçük sorguyla, süreler ayar anlık görüntüsünden okunur
+
+    Returns the loan periods of the books (by material type)
+    The material types are read with one small query, the periods from the
+    settings snapshot
+    """
+    default = system_settings.get_int(LOAN_PERIOD_SETTING, DEFAULT_LOAN_PERIOD)
+    return {
+        book_id: system_settings.loan_period(material_type_id, default)
+        for book_id, material_type_id in Book.objects.filter(id__in=book_ids).values_list('id', 'material_type_id')
+    }
+
+def _notify_availability(book_ids):
+    # Okuma modelleri işlem onaylandıktan sonra güncellenir
+    # Read models are refreshed after the transaction commits
+    transaction.on_commit(lambda: availability_changed.send(sender=Book, book_ids=list(book_ids)))
+
+def _take_copy(book_id):
+    # Koşullu azaltma; kopya yoksa hiçbir satır güncellenmez
+    # Conditional decrement; no row is updated if there is no copy left
+    return Book.objects.filter(id=book_id, available_copies__gt=0) \
+        .update(available_copies=F('available_copies') - 1) == 1
+
+@retry_on_contention
+def checkout(book_id, member_id, due_date=None):
+    """
+    Kitabı üyeye ödünç verir ve oluşturulan Loan kaydını döndürür
+    Üye için ayrılmış bir kopya varsa o kullanılır
+    Boşta kopya yoksa BookNotAvailable fırlatır
+
+    Lends the book to the member and returns the created Loan
+    Uses the copy held for the member if there is one
+    Raises BookNotAvailable if there is no free copy
+    """
+    today = timezone.localdate()
+    if due_date is None:
+        due_date = today + timedelta(days=loan_periods([book_id]).get(book_id, DEFAULT_LOAN_PERIOD))
+
+    with transaction.atomic():
+        reservations.fulfil(book_id, member_id)
+        if not _take_copy(book_id):
+            raise BookNotAvailable(book_id)
+        _notify_availability([book_id])
+        return Loan.objects.create(
+            book_id=book_id, member_id=member_id,
+            loan_date=today, due_date=due_date, status='active'
+        )
+
+@retry_on_contention
+def checkout_many(book_ids, member_id):
+    """
+    Kiosklar için birden fazla kitabı tek işlemde ödünç verir
+    Kitaplar id sırasıyla işlenir, böylece eşzamanlı işlemler kilitlenmez
+    (oluşturulan Loan listesi, boşta kopyası olmayan kitap id'leri) döndürür
+
+    Lends several books in one transaction for self-service kiosks
+    Books are processed in id order so concurrent transactions do not deadlock
+    Returns (list of created Loans, ids of books without a free copy)
+    """
+    book_ids = sorted(set(book_ids))
+    today = timezone.localdate()
+    periods = loan_periods(book_ids)
+
+    with transaction.atomic():
+        taken = []
+        unavailable = []
+        for book_id in book_ids:
+            # Üye için ayrılmış kopya varsa önce rafa döner, böylece bu ödünçte kullanılır
+            # A copy held for the member goes back to the shelf first, so this loan uses it
+            reservations.fulfil(book_id, member_id)
+            (taken if _take_copy(book_id) else unavailable).append(book_id)
+        _notify_availability(taken)
+
+        loans = Loan.objects.bulk_create([
+            Loan(
+                book_id=book_id, member_id=member_id, loan_date=today,
+                due_date=today + timedelta(days=periods.get(book_id, DEFAULT_LOAN_PERIOD)),
+                status='active'
+            )
+            for book_id in taken
+        ])
+    return loans, unavailable
+
+@retry_on_contention
+def return_loan(loan_id):
+    """
+    Ödünç kaydını iade edilmiş olarak işaretler ve kopyayı rafa geri koyar
+    Kitabın rezervasyon kuyruğu varsa kopya sıradaki üyeye ayrılır
+    Kayıt zaten iade edildiyse LoanAlreadyReturned fırlatır
+
+    Marks the loan as returned and puts the copy back on the shelf
+    If the book has a reservation queue the copy is held for the next member
+    Raises LoanAlreadyReturned if the loan was already returned
+    """
+    with transaction.atomic():
+        loan = Loan.objects.filter(id=loan_id, return_date__isnull=True).values('book_id').first()
+        if loan is None or not Loan.objects.filter(id=loan_id, return_date__isnull=True) \
+                .update(return_date=timezone.localdate(), status='returned'):
+            raise LoanAlreadyReturned(loan_id)
+
+        Book.objects.filter(id=loan['book_id'], available_copies__lt=F('total_copies')) \
+            .update(available_copies=F('available_copies') + 1)
+        reservations.hand_off(loan['book_id'])
+        _notify_availability([loan['book_id']])
+    return loan['book_id']
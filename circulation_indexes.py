@@ -0,0 +1,152 @@
+import os
+import sys
+import django
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from library.models import Book, Fine, Loan, Reservation
+
+import pagination
+import reservations
+
+# Ödünç, rezervasyon, ceza ve sayfalama sorguları için bileşik ve kısmi indeksler
+# Composite and partial indexes for loan, reservation, fine and pagination queries
+#
+#   python circulation_indexes.py          indeksleri oluştur / create indexes
+#   python circulation_indexes.py --check  sorgu planlarını denetle / check query plans
+#
+# İndeksler CREATE INDEX IF NOT EXISTS ile oluşturulur; SQLite ve PostgreSQL
+# aynı tanımları (kısmi indeks dahil) destekler.
+#
+# Indexes are created with CREATE INDEX IF NOT EXISTS; SQLite and PostgreSQL
+# both support the same definitions (partial index included).
+
+# (indeks adı, tablo, sütunlar, kısmi indeks koşulu)
+# (index name, table, columns, partial index condition)
+INDEXES = [
+    # Gecikme taraması: status='active' AND due_date < bugün
+    # Overdue scan: status='active' AND due_date < today
+    ('library_loan_status_due', 'library_loan', ('status', 'due_date'), None),
+    # İade edilmemiş ödünçler, son teslim tarihine göre
+    # Loans not yet returned, by due date
+    ('library_loan_open_due', 'library_loan', ('due_date',), 'return_date IS NULL'),
+    # "Ödünç aldıklarım": üye + durum, son teslim tarihine göre sıralı
+    # "My active loans": member + status, ordered by due date
+    ('library_loan_member_status_due', 'library_loan', ('member_id', 'status', 'due_date'), None),
+    # Kitap başına rezervasyon kuyruğu
+    # Per-book reservation queue
+    ('library_reservation_queue', 'library_reservation', ('book_id', 'status', 'reservation_date'), None),
+    # Süresi dolan rezervasyon taraması
+    # Expired reservation sweep
+    ('library_reservation_status_expiry', 'library_reservation', ('status', 'expiry_date'), None),
+    # Ödenmemiş cezalar
+    # Unpaid fines
+    ('library_fine_unpaid', 'library_fine', ('loan_id',), 'NOT paid'),
+    # Kitap listesi sayfalaması: (title, id) anahtarı
+    # Book list pagination: (title, id) key
+    ('library_book_title_id', 'library_book', ('title', 'id'), None),
+    # Ödünç geçmişi sayfalaması: (loan_date, id) anahtarı
+    # Loan history pagination: (loan_date, id) key
+    ('library_loan_date_id', 'library_loan', ('loan_date', 'id'), None),
+    # Üyenin ödünç geçmişi sayfalaması
+    # Member loan history pagination
+    ('library_loan_member_date_id', 'library_loan', ('member_id', 'loan_date', 'id'), None),
+    # Rapor özetleri: güne göre iadeler ve tahsil edilen cezalar
+    # Report aggregates: returns and collected fines by day
+    ('library_loan_return_date', 'library_loan', ('return_date',), 'return_date IS NOT NULL'),
+    ('library_fine_payment_date', 'library_fine', ('payment_date',), 'paid'),
+]
+
+def create_indexes():
+    """
+    Tanımlı tüm indeksleri yoksa oluşturur
+
+    Creates all defined indexes if missing
+    """
+    with connection.cursor() as cursor:
+        for name, table, columns, condition in INDEXES:
+            sql = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+            if condition:
+                sql += f" WHERE {condition}"
+            cursor.execute(sql)
+            print(f"  İndeks hazır: {name}")
+
+def hot_queries():
+    """
+    Sık kullanılan sorguları ve kullanmaları beklenen indeksi döndürür
+
+    Returns the hot path queries and the index each is expected to use
+    """
+    today = timezone.localdate()
+    return [
+        ('Gecikmiş ödünçler / Overdue loans',
+         Loan.objects.filter(status='active', due_date__lt=today),
+         'library_loan_status_due'),
+        ('İade edilmemiş ödünçler / Open loans by due date',
+         Loan.objects.filter(return_date__isnull=True, due_date__lt=today),
+         'library_loan_open_due'),
+        ('Üyenin aktif ödünçleri / Member active loans',
+         Loan.objects.filter(member_id=1, status='active').order_by('due_date'),
+         'library_loan_member_status_due'),
+        ('Kitabın rezervasyon kuyruğu / Book reservation queue',
+         Reservation.objects.filter(book_id=1, status=reservations.PENDING).order_by('reservation_date'),
+         'library_reservation_queue'),
+        ('Süresi dolan rezervasyonlar / Expired reservations',
+         Reservation.objects.filter(status=reservations.READY, expiry_date__lt=today),
+         'library_reservation_status_expiry'),
+        ('Ödenmemiş cezalar sayfası / Unpaid fines page',
+         pagination.page_queryset(Fine.objects.filter(paid=False), ('loan_id',), [1]),
+         'library_fine_unpaid'),
+        ('Kitap listesi sayfası / Book list page',
+         pagination.page_queryset(Book.objects.all(), pagination.BOOK_ORDERING, ['M', 1]),
+         'library_book_title_id'),
+        ('Ödünç geçmişi sayfası / Loan history page',
+         pagination.page_queryset(Loan.objects.all(), pagination.LOAN_ORDERING, [today.isoformat(), 1]),
+         'library_loan_date_id'),
+        ('Üyenin ödünç geçmişi sayfası / Member loan history page',
+         pagination.page_queryset(Loan.objects.filter(member_id=1), pagination.LOAN_ORDERING, [today.isoformat(), 1]),
+         'library_loan_member_date_id'),
+    ]
+
+def check_query_plans():
+    """
+    Her sorgunun EXPLAIN çıktısında beklenen indeksin kullanıldığını ve
+    tablonun veya indeksin baştan sona taranmadığını denetler
+    PostgreSQL'de küçük tablolarda da indeks seçilsin diye sıralı tarama kapatılır
+    Tüm sorgular beklenen indeksle arama yapıyorsa True döndürür
+
+    Checks that each query's EXPLAIN output uses the expected index and that
+    neither the table nor the index is scanned end to end
+    On PostgreSQL sequential scans are disabled so small tables still pick the index
+    Returns True if every query searches its expected index
+    """
+    ok = True
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+        for label, queryset, index in hot_queries():
+            plan = queryset.explain()
+            # SQLite tam taramayı "SCAN", PostgreSQL "Seq Scan" olarak gösterir;
+            # "SCAN ... USING INDEX" de indeksin tamamını okur
+            # SQLite reports a full scan as "SCAN" and PostgreSQL as "Seq Scan";
+            # "SCAN ... USING INDEX" still reads the whole index
+            used = index in plan and 'SCAN' not in plan and 'Seq Scan' not in plan
+            ok = ok and used
+            print(f"{'OK  ' if used else 'HATA'} {label}: {index}")
+            if not used:
+                print(f"     {plan}")
+    return ok
+
+if __name__ == "__main__":
+    if '--check' in sys.argv:
+        sys.exit(0 if check_query_plans() else 1)
+    create_indexes()
+    print("Ödünç, rezervasyon, ceza ve sayfalama indeksleri oluşturuldu.")
@@ -0,0 +1,12 @@
+from django.dispatch import Signal
+
+# Ödünç verme, iade ve rezervasyon işlemleri kitapların boşta kopya sayısını
+# F() ifadeleriyle .update() kullanarak değiştirir; bu yüzden post_save
+# sinyali gönderilmez. Bu sinyal işlem onaylandıktan sonra etkilenen kitap
+# id'leriyle gönderilir: availability_changed.send(sender=Book, book_ids=[...])
+#
+# Checkout, return and reservation operations change available copies with
+# .update() and F() expressions, so no post_save signal is sent. This signal
+# is sent with the affected book ids after the transaction commits:
+# availability_changed.send(sender=Book, book_ids=[...])
+availability_changed = Signal()
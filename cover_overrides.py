@@ -0,0 +1,148 @@
+import os
+import csv
+import sys
+import sqlite3
+
+from title_normalization import TitleIndex, normalize_title
+
+# Elle seçilmiş kapak URL'leri (başlık/ISBN -> kapak URL'si)
+# Curated cover URLs (title/ISBN -> cover URL)
+#
+# Kayıtlar ISBN ve normalleştirilmiş başlık üzerinde indeksli bir tabloda
+# tutulur. Tablo boşsa depodaki cover_overrides.csv dosyasından yüklenir.
+# Kapak betiği her çalıştırmada tabloyu bir kez okur (load_overrides).
+#
+#   python cover_overrides.py load [dosya.csv]
+#   python cover_overrides.py export [dosya.csv]
+#
+# Entries are kept in a table indexed on ISBN and normalized title. If the
+# table is empty it is loaded from cover_overrides.csv in the repository.
+# The cover script reads the table once per run (load_overrides).
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OVERRIDES_PATH = os.path.join(BASE_DIR, 'cover_overrides.sqlite3')
+DEFAULT_CSV_PATH = os.path.join(BASE_DIR, 'cover_overrides.csv')
+
+_connection = None
+
+def _get_connection():
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(OVERRIDES_PATH, isolation_level=None)
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS override ("
+            " id INTEGER PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " normalized_title TEXT NOT NULL,"
+            " isbn TEXT,"
+            " url TEXT NOT NULL)"
+        )
+        _connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS override_normalized_title ON override (normalized_title)")
+        _connection.execute("CREATE INDEX IF NOT EXISTS override_isbn ON override (isbn)")
+    return _connection
+
+class CoverOverrides:
+    """
+    Bir çalıştırma boyunca bellekte tutulan kapak eşlemesi
+    Önce ISBN ile tam eşleşme, sonra başlık indeksi (bulanık eşleşme) denenir
+
+    Cover mapping kept in memory for one run
+    Tries an exact ISBN match first, then the title index (fuzzy match)
+    """
+    def __init__(self):
+        self.by_isbn = {}
+        self.by_title = TitleIndex()
+
+    def add(self, url, title=None, isbn=None):
+        if isbn:
+            self.by_isbn[isbn] = url
+        if title:
+            self.by_title.add(title, url)
+
+    def lookup(self, title=None, isbn=None):
+        if isbn and isbn in self.by_isbn:
+            return self.by_isbn[isbn]
+        if title:
+            return self.by_title.lookup(title)
+        return None
+
+    def __len__(self):
+        return len(self.by_isbn) + len(self.by_title)
+
+def load_overrides():
+    """
+    Tüm kayıtları tek sorguyla okuyup CoverOverrides olarak döndürür
+    Tablo boşsa önce varsayılan CSV dosyası yüklenir
+
+    Reads all entries in a single query and returns them as CoverOverrides
+    Loads the default CSV file first if the table is empty
+    """
+    connection = _get_connection()
+    if not connection.execute("SELECT 1 FROM override LIMIT 1").fetchone() and os.path.exists(DEFAULT_CSV_PATH):
+        load_csv(DEFAULT_CSV_PATH)
+
+    overrides = CoverOverrides()
+    for title, isbn, url in connection.execute("SELECT title, isbn, url FROM override ORDER BY id"):
+        overrides.add(url, title=title, isbn=isbn)
+    return overrides
+
+def load_csv(path, replace=False):
+    """
+    CSV dosyasındaki (title, isbn, url) kayıtlarını toplu olarak yükler
+    Aynı normalleştirilmiş başlık tekrar gelirse son kayıt geçerli olur
+    replace True ise önce tablodaki tüm kayıtlar silinir
+
+    Bulk loads (title, isbn, url) rows from a CSV file
+    If the same normalized title appears again the last row wins
+    If replace is True all entries in the table are deleted first
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = [
+            (row['title'].strip(), normalize_title(row['title']), (row.get('isbn') or '').strip() or None, row['url'].strip())
+            for row in csv.DictReader(f) if row.get('url')
+        ]
+
+    connection = _get_connection()
+    connection.execute("BEGIN")
+    try:
+        if replace:
+            connection.execute("DELETE FROM override")
+        connection.executemany(
+            "INSERT INTO override (title, normalized_title, isbn, url) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (normalized_title) DO UPDATE SET"
+            " title = excluded.title, isbn = excluded.isbn, url = excluded.url",
+            rows
+        )
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    return len(rows)
+
+def export_csv(path):
+    """
+    Tablodaki kayıtları CSV dosyasına yazar
+
+    Writes the table entries to a CSV file
+    """
+    rows = _get_connection().execute("SELECT title, isbn, url FROM override ORDER BY title")
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'isbn', 'url'])
+        for title, isbn, url in rows:
+            writer.writerow([title, isbn or '', url])
+            count += 1
+    return count
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ('load', 'export'):
+        print("Kullanım / Usage: python cover_overrides.py load|export [dosya.csv]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CSV_PATH
+    if command == 'load':
+        print(f"{load_csv(path, replace=True)} kapak kaydı yüklendi: {path}")
+    else:
+        print(f"{export_csv(path)} kapak kaydı dışa aktarıldı: {path}")
@@ -0,0 +1,142 @@
+import os
+import posixpath
+
+from PIL import Image
+
+import instrumentation
+
+# Kapak fotoğrafının sabit boyutlu kopyaları (liste, detay, retina)
+# Fixed size copies of the cover image (list, detail, retina)
+#
+# Kopyalar kapak dosyasının bulunduğu klasördeki "renditions" alt klasörüne
+# <kapak adı>_<boyut>.<uzantı> adıyla WebP ve JPEG olarak kaydedilir.
+#
+# Copies are saved as WebP and JPEG in the "renditions" subfolder of the
+# cover's folder, named <cover name>_<size>.<extension>.
+
+RENDITIONS_DIR = 'renditions'
+
+# Boyut adı -> (genişlik, yükseklik)
+# Size name -> (width, height)
+RENDITION_SIZES = {
+    'thumb': (150, 225),
+    'detail': (300, 450),
+    'retina': (600, 900),
+}
+
+# Uzantı -> (PIL formatı, kaydetme seçenekleri)
+# Extension -> (PIL format, save options)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+def _rendition(path, cover, size, ext):
+    directory, filename = path.split(cover)
+    stem = path.splitext(filename)[0]
+    return path.join(directory, RENDITIONS_DIR, f"{stem}_{size}.{ext}")
+
+def rendition_name(cover_name, size, ext):
+    """
+    Kapağın depolama adından kopyanın depolama adını üretir
+
+    Builds the rendition's storage name from the cover's storage name
+    """
+    return _rendition(posixpath, cover_name, size, ext)
+
+def rendition_path(cover_path, size, ext):
+    """
+    Kapağın dosya yolundan kopyanın dosya yolunu üretir
+
+    Builds the rendition's file path from the cover's file path
+    """
+    return _rendition(os.path, cover_path, size, ext)
+
+def rendition_url(cover_image, size='thumb', ext='webp'):
+    """
+    Kitabın cover_image alanı için kopyanın URL'sini döndürür
+    Kapak yoksa None döndürür
+
+    Returns the rendition URL for a book's cover_image field
+    Returns None if there is no cover
+    """
+    if not cover_image:
+        return None
+    return cover_image.storage.url(rendition_name(cover_image.name, size, ext))
+
+def create_renditions(image, cover_path):
+    """
+    PIL resminden tüm boyut ve formatlarda kopyaları oluşturur
+    Her dosya önce geçici adla yazılır, sonra yerine taşınır
+
+    Creates renditions in all sizes and formats from a PIL image
+    Each file is written under a temporary name first, then moved into place
+    """
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    paths = []
+    for size, dimensions in RENDITION_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail(dimensions, Image.LANCZOS)
+
+        for ext, (image_format, options) in RENDITION_FORMATS.items():
+            path = rendition_path(cover_path, size, ext)
+            temp_path = f"{path}.tmp"
+            # Yalnızca dosya yazma işlemleri ölçülür; yeniden boyutlandırma dışarıda kalır
+            # Only the file writes are measured; resizing stays outside the phase
+            with instrumentation.phase('cover_io'):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                resized.save(temp_path, format=image_format, **options)
+                os.replace(temp_path, path)
+            paths.append(path)
+    return paths
+
+def create_renditions_from_file(cover_path, force=False):
+    """
+    Kapak dosyasını açıp kopyalarını oluşturur; süreç havuzunda çalıştırılabilir
+    Kopyalar kapaktan yeniyse ve force False ise atlar
+    (kapak yolu, oluşturulan dosya sayısı, hata) döndürür
+
+    Opens the cover file and creates its renditions; can run in a process pool
+    Skips when renditions are newer than the cover and force is False
+    Returns (cover path, number of files created, error)
+    """
+    try:
+        if not force and renditions_up_to_date(cover_path):
+            return cover_path, 0, None
+
+        with Image.open(cover_path) as image:
+            largest = max(RENDITION_SIZES.values())
+            image.draft('RGB', largest)
+            image.load()
+            return cover_path, len(create_renditions(image, cover_path)), None
+    except Exception as e:
+        return cover_path, 0, str(e)
+
+def renditions_up_to_date(cover_path):
+    """
+    Tüm kopyalar mevcut ve kapak dosyasından yeniyse True döndürür
+
+    Returns True if all renditions exist and are newer than the cover file
+    """
+    cover_mtime = os.path.getmtime(cover_path)
+    for size in RENDITION_SIZES:
+        for ext in RENDITION_FORMATS:
+            path = rendition_path(cover_path, size, ext)
+            if not os.path.exists(path) or os.path.getmtime(path) < cover_mtime:
+                return False
+    return True
+
+def delete_renditions(cover_path):
+    """
+    Kapağa ait tüm kopyaları siler
+
+    Deletes all renditions of a cover
+    """
+    with instrumentation.phase('cover_io'):
+        for size in RENDITION_SIZES:
+            for ext in RENDITION_FORMATS:
+                path = rendition_path(cover_path, size, ext)
+                if os.path.exists(path):
+                    os.remove(path)
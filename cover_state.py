@@ -0,0 +1,130 @@
+import os
+import sqlite3
+from datetime import datetime
+
+# Kapak güncelleme durumunu saklar
+# Stores cover refresh state
+#
+# Her kitap için kapağın kaynak URL'si, ETag/Last-Modified başlıkları ve
+# içerik özeti (sha256) tutulur. Artımlı modda bu bilgilerle koşullu GET
+# yapılır ve içerik değişmediyse dosya yeniden yazılmaz.
+#
+# For each book the cover's source URL, ETag/Last-Modified headers and
+# content hash (sha256) are kept. Incremental mode uses them for conditional
+# GETs and does not rewrite the file when the content has not changed.
+#
+# Toplu içe aktarma sırasında indirilmeyen kapaklar da burada kuyruğa alınır
+# ve update_book_covers.py --queued ile ayrıca indirilir.
+#
+# Covers that are not downloaded during bulk imports are queued here as well
+# and downloaded separately with update_book_covers.py --queued.
+
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cover_state.sqlite3')
+
+_connection = None
+
+def _get_connection():
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(STATE_PATH, isolation_level=None)
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS cover ("
+            " book_id INTEGER PRIMARY KEY,"
+            " source_url TEXT,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_hash TEXT,"
+            " checked_at TEXT NOT NULL)"
+        )
+        _connection.execute("CREATE TABLE IF NOT EXISTS run (name TEXT PRIMARY KEY, finished_at TEXT NOT NULL)")
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS queue (book_id INTEGER PRIMARY KEY, url TEXT NOT NULL, queued_at TEXT NOT NULL)"
+        )
+    return _connection
+
+def load_all():
+    """
+    Tüm kitapların kayıtlı kapak bilgilerini {book_id: bilgi} olarak döndürür
+
+    Returns the stored cover info of all books as {book_id: info}
+    """
+    rows = _get_connection().execute(
+        "SELECT book_id, source_url, etag, last_modified, content_hash FROM cover"
+    )
+    return {
+        row[0]: {
+            'source_url': row[1],
+            'etag': row[2],
+            'last_modified': row[3],
+            'content_hash': row[4],
+        }
+        for row in rows
+    }
+
+def record(book_id, info):
+    """
+    Kitabın kapak bilgilerini kaydeder
+
+    Records the cover info of a book
+    """
+    _get_connection().execute(
+        "INSERT OR REPLACE INTO cover (book_id, source_url, etag, last_modified, content_hash, checked_at)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        (book_id, info.get('source_url'), info.get('etag'), info.get('last_modified'),
+         info.get('content_hash'), datetime.now().isoformat())
+    )
+
+def get_last_run(name='update_book_covers'):
+    """
+    Son başarılı çalıştırmanın bitiş zamanını döndürür, yoksa None
+
+    Returns the finish time of the last successful run, or None
+    """
+    row = _get_connection().execute("SELECT finished_at FROM run WHERE name = ?", (name,)).fetchone()
+    return datetime.fromisoformat(row[0]) if row else None
+
+def set_last_run(finished_at, name='update_book_covers'):
+    """
+    Çalıştırmanın bitiş zamanını kaydeder
+
+    Records the finish time of a run
+    """
+    _get_connection().execute(
+        "INSERT OR REPLACE INTO run (name, finished_at) VALUES (?, ?)",
+        (name, finished_at.isoformat())
+    )
+
+def enqueue(covers):
+    """
+    (book_id, url) çiftlerini kapak indirme kuyruğuna ekler
+
+    Adds (book_id, url) pairs to the cover download queue
+    """
+    queued_at = datetime.now().isoformat()
+    connection = _get_connection()
+    connection.execute("BEGIN")
+    try:
+        connection.executemany(
+            "INSERT OR REPLACE INTO queue (book_id, url, queued_at) VALUES (?, ?, ?)",
+            [(book_id, url, queued_at) for book_id, url in covers]
+        )
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+
+def load_queue():
+    """
+    Kuyruktaki kapakları {book_id: url} olarak döndürür
+
+    Returns the queued covers as {book_id: url}
+    """
+    return dict(_get_connection().execute("SELECT book_id, url FROM queue"))
+
+def dequeue(book_id):
+    """
+    Kitabı kapak indirme kuyruğundan çıkarır
+
+    Removes a book from the cover download queue
+    """
+    _get_connection().execute("DELETE FROM queue WHERE book_id = ?", (book_id,))
@@ -0,0 +1,200 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+
+from library.models import Book, Fine, Loan
+
+# Katalog ve ödünç verilerinin akışlı dışa aktarımı
+# Streaming export of catalog and circulation data
+#
+# Satırlar .iterator(chunk_size=...) ile gruplar halinde okunur (PostgreSQL'de
+# sunucu tarafı cursor kullanılır) ve üreteçlerle CSV veya JSON satırlarına
+# (JSON Lines) dönüştürülür. Hiçbir aşamada tüm sonuç belleğe alınmaz; milyon
+# satırlık bir ödünç geçmişi sabit bellekle dışa aktarılır ve ilk baytlar
+# hemen gönderilmeye başlanır. Aynı üreteçler hem StreamingHttpResponse hem
+# export_data.py komutu tarafından kullanılır.
+#
+# Rows are read in chunks with .iterator(chunk_size=...) (a server-side cursor
+# on PostgreSQL) and turned into CSV or JSON Lines by generators. The full
+# result is never held in memory; a million-row loan history is exported in
+# constant memory and the first bytes are sent right away. The same
+# generators serve both StreamingHttpResponse and the export_data.py command.
+
+CHUNK_SIZE = 2000
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+BOOK_FIELDS = [
+    'id', 'title', 'isbn', 'authors', 'category', 'publisher', 'publication_date',
+    'language', 'page_count', 'available_copies', 'total_copies',
+]
+LOAN_FIELDS = [
+    'id', 'book_id', 'book_title', 'member_id', 'member_username',
+    'loan_date', 'due_date', 'return_date', 'status',
+]
+FINE_FIELDS = [
+    'id', 'loan_id', 'book_title', 'member_username',
+    'amount', 'paid', 'payment_date', 'payment_method', 'receipt_number',
+]
+
+# İlişkili tablolardan okunan sütunlar ve ORM yolları
+# Columns read from related tables and their ORM lookups
+LOAN_LOOKUPS = {'book_title': F('book__title'), 'member_username': F('member__user__username')}
+FINE_LOOKUPS = {'book_title': F('loan__book__title'), 'member_username': F('loan__member__user__username')}
+
+# İstenirse CSV başlık satırında alan adları yerine gösterilen sütun adları;
+# varsayılan başlık alan adlarıdır, böylece dışa aktarılan katalog
+# import_catalog.py ile yeniden içe aktarılabilir
+# Column names shown in the CSV header instead of the field names on request;
+# the default header is the field names, so an exported catalog can be
+# imported again with import_catalog.py
+COLUMN_LABELS = {
+    'id': 'No / ID',
+    'title': 'Başlık / Title',
+    'isbn': 'ISBN / ISBN',
+    'authors': 'Yazarlar / Authors',
+    'category': 'Kategori / Category',
+    'publisher': 'Yayınevi / Publisher',
+    'publication_date': 'Yayın Tarihi / Publication Date',
+    'language': 'Dil / Language',
+    'page_count': 'Sayfa Sayısı / Page Count',
+    'available_copies': 'Mevcut Kopya / Available Copies',
+    'total_copies': 'Toplam Kopya / Total Copies',
+    'book_id': 'Kitap No / Book ID',
+    'book_title': 'Kitap / Book',
+    'member_id': 'Üye No / Member ID',
+    'member_username': 'Üye / Member',
+    'loan_date': 'Ödünç Tarihi / Loan Date',
+    'due_date': 'Son Teslim Tarihi / Due Date',
+    'return_date': 'İade Tarihi / Return Date',
+    'status': 'Durum / Status',
+    'loan_id': 'Ödünç No / Loan ID',
+    'amount': 'Tutar / Amount',
+    'paid': 'Ödendi / Paid',
+    'payment_date': 'Ödeme Tarihi / Payment Date',
+    'payment_method': 'Ödeme Yöntemi / Payment Method',
+    'receipt_number': 'Makbuz No / Receipt Number',
+}
+
+def book_rows(chunk_size=CHUNK_SIZE):
+    # Yazarlar her grup için tek sorguyla önceden yüklenir
+    # Authors are prefetched with one query per chunk
+    books = Book.objects.select_related('category').prefetch_related('authors').order_by('id')
+    for book in books.iterator(chunk_size=chunk_size):
+        yield {
+            'id': book.id,
+            'title': book.title,
+            'isbn': book.isbn,
+            'authors': '; '.join(author.name for author in book.authors.all()),
+            'category': book.category.name if book.category else None,
+            'publisher': book.publisher,
+            'publication_date': book.publication_date,
+            'language': book.language,
+            'page_count': book.page_count,
+            'available_copies': book.available_copies,
+            'total_copies': book.total_copies,
+        }
+
+def _values(queryset, fields, lookups, chunk_size):
+    columns = [field for field in fields if field not in lookups]
+    return queryset.order_by('id').values(*columns, **lookups).iterator(chunk_size=chunk_size)
+
+def loan_rows(chunk_size=CHUNK_SIZE):
+    return _values(Loan.objects.all(), LOAN_FIELDS, LOAN_LOOKUPS, chunk_size)
+
+def fine_rows(chunk_size=CHUNK_SIZE):
+    return _values(Fine.objects.all(), FINE_FIELDS, FINE_LOOKUPS, chunk_size)
+
+# Dışa aktarılabilen veri türleri: (satır üreteci, sütunlar)
+# Exportable data kinds: (row generator, columns)
+EXPORTS = {
+    'books': (book_rows, BOOK_FIELDS),
+    'loans': (loan_rows, LOAN_FIELDS),
+    'fines': (fine_rows, FINE_FIELDS),
+}
+
+class _Echo:
+    # csv.writer'ın yazdığı satırı saklamadan geri döndüren sahte dosya
+    # Pseudo file that hands back the line csv.writer writes instead of storing it
+    def write(self, value):
+        return value
+
+def csv_lines(rows, fields, labels=False):
+    """
+    Satırları başlık satırıyla birlikte CSV satırları olarak üretir
+    labels True ise başlıkta alan adları yerine iki dilli sütun adları yazılır
+
+    Yields the rows as CSV lines, starting with a header line
+    If labels is True the header has bilingual column names instead of field names
+    """
+    writer = csv.DictWriter(_Echo(), fieldnames=fields, extrasaction='ignore')
+    if labels:
+        yield writer.writerow({field: COLUMN_LABELS.get(field, field) for field in fields})
+    else:
+        yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+def jsonl_lines(rows, fields):
+    """
+    Her satırı ayrı bir JSON nesnesi olarak üretir (JSON Lines)
+
+    Yields each row as a separate JSON object (JSON Lines)
+    """
+    for row in rows:
+        yield json.dumps({field: row[field] for field in fields}, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+WRITERS = {
+    'csv': csv_lines,
+    'jsonl': jsonl_lines,
+}
+
+def export_lines(kind, fmt='csv', chunk_size=CHUNK_SIZE, labels=False):
+    """
+    Verilen veri türünü seçilen biçimde satır satır üretir
+    labels yalnızca CSV başlığını etkiler (bkz. csv_lines)
+    Bilinmeyen tür veya biçim için ValueError fırlatır
+
+    Yields the given data kind line by line in the chosen format
+    labels only affects the CSV header (see csv_lines)
+    Raises ValueError for an unknown kind or format
+    """
+    if kind not in EXPORTS:
+        raise ValueError(f"Bilinmeyen veri türü / Unknown kind: {kind}")
+    if fmt not in WRITERS:
+        raise ValueError(f"Bilinmeyen biçim / Unknown format: {fmt}")
+    rows, fields = EXPORTS[kind]
+    if fmt == 'csv':
+        return csv_lines(rows(chunk_size), fields, labels)
+    return WRITERS[fmt](rows(chunk_size), fields)
+
+def streaming_response(kind, fmt='csv'):
+    """
+    Dışa aktarımı indirme olarak gönderen StreamingHttpResponse döndürür
+
+    Returns a StreamingHttpResponse that sends the export as a download
+    """
+    response = StreamingHttpResponse(export_lines(kind, fmt), content_type=FORMATS[fmt])
+    filename = f"{kind}-{timezone.localdate().isoformat()}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def export_view(request, kind):
+    """
+    Dışa aktarma görünümü: /export/<kind>/?format=csv|jsonl
+    Yalnızca personel kullanıcılar erişebilir
+
+    Export view: /export/<kind>/?format=csv|jsonl
+    Only staff users have access
+    """
+    fmt = request.GET.get('format', 'csv')
+    if not request.user.is_staff or kind not in EXPORTS or fmt not in WRITERS:
+        raise Http404
+    return streaming_response(kind, fmt)
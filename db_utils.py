@@ -0,0 +1,42 @@
+import random
+import time
+from functools import wraps
+
+from django.db import OperationalError
+
+# Modüller arasında paylaşılan veritabanı yardımcıları
+# Database helpers shared between modules
+#
+# Kısa işlemler kilit çakışmasında (SQLite "database is locked", PostgreSQL
+# deadlock veya serileştirme hatası) artan ve rastgele bekleme süreleriyle
+# yeniden denenir. Ödünç verme (circulation.py) ve rapor kuyruğu
+# (report_jobs.py) aynı yardımcıyı kullanır.
+#
+# Short transactions are retried with increasing, jittered delays on lock
+# contention (SQLite "database is locked", PostgreSQL deadlock or
+# serialization failure). Circulation (circulation.py) and the report queue
+# (report_jobs.py) use the same helper.
+
+# Kilit çakışmasında yeniden deneme sayısı ve ilk bekleme süresi (saniye)
+# Retry count and first delay (seconds) on lock contention
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 0.05
+
+CONTENTION_ERRORS = ('database is locked', 'deadlock detected', 'could not serialize')
+
+def retry_on_contention(func):
+    """
+    Kilit çakışmasında işlemi artan ve rastgele bekleme süreleriyle yeniden dener
+
+    Retries the operation with increasing, jittered delays on lock contention
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if attempt == MAX_ATTEMPTS - 1 or not any(error in str(e) for error in CONTENTION_ERRORS):
+                    raise
+                time.sleep(RETRY_DELAY * (2 ** attempt) * (1 + random.random()))
+    return wrapper
@@ -0,0 +1,53 @@
+import os
+import sys
+import argparse
+import django
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+import data_export
+
+# Kitap, ödünç ve ceza verilerini CSV veya JSON Lines olarak dışa aktarır
+# Exports book, loan and fine data as CSV or JSON Lines
+#
+#   python export_data.py loans --format jsonl --output loans.jsonl
+#   python export_data.py books > books.csv
+
+def main(kind, fmt='csv', output=None, chunk_size=data_export.CHUNK_SIZE, labels=False):
+    """
+    Ana fonksiyon
+    Satırları okundukça dosyaya veya standart çıktıya yazar
+
+    Main function
+    Writes the rows to the file or to standard output as they are read
+    """
+    lines = data_export.export_lines(kind, fmt, chunk_size, labels)
+    if output is None:
+        sys.stdout.writelines(lines)
+        return
+
+    count = 0
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        for line in lines:
+            f.write(line)
+            count += 1
+    print(f"{output} dosyasına {count} satır yazıldı.", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kütüphane verilerini dışa aktar / Export library data")
+    parser.add_argument('kind', choices=sorted(data_export.EXPORTS),
+                        help="Dışa aktarılacak veri / Data to export")
+    parser.add_argument('--format', dest='fmt', choices=sorted(data_export.WRITERS), default='csv',
+                        help="Çıktı biçimi / Output format")
+    parser.add_argument('--output', default=None,
+                        help="Çıktı dosyası, verilmezse standart çıktı / Output file, standard output if omitted")
+    parser.add_argument('--chunk-size', type=int, default=data_export.CHUNK_SIZE,
+                        help="Tek seferde okunacak satır sayısı / Rows read at once")
+    parser.add_argument('--labels', action='store_true',
+                        help="CSV başlığında iki dilli sütun adları kullan / "
+                             "Use bilingual column names in the CSV header")
+    args = parser.parse_args()
+    main(args.kind, args.fmt, args.output, args.chunk_size, args.labels)
@@ -0,0 +1,302 @@
+import queue
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from library.models import ExternalCatalog
+
+import http_client
+import marc
+
+try:
+    from PyZ3950 import zoom
+except ImportError:
+    zoom = None
+
+# Harici kataloglarda (SRU ve Z39.50) birleşik arama
+# Federated search over external catalogs (SRU and Z39.50)
+#
+# Sorgu, library_externalcatalog tablosundaki etkin kataloglara aynı anda
+# gönderilir. Sonuçlar her katalog yanıt verdikçe döndürülür ve ISBN'e göre
+# tekilleştirilir; yanıt vermeyen katalog toplam süreyi uzatmaz, zaman aşımında
+# beklenmeden bırakılır. SRU istekleri http_client üzerinden sunucu başına
+# keep-alive oturumlarını, Z39.50 istekleri katalog başına bağlantı havuzunu
+# kullanır. Z39.50 için PyZ3950 paketi gerekir; yoksa bu kataloglar hata olarak
+# bildirilir.
+#
+# The query is sent to all enabled catalogs in library_externalcatalog at
+# once. Results are returned as each catalog responds and de-duplicated by
+# ISBN; a silent catalog does not add to the total time and is abandoned at
+# its timeout. SRU requests use the per-host keep-alive sessions of
+# http_client, Z39.50 requests a per-catalog connection pool. Z39.50 needs
+# the PyZ3950 package; without it those catalogs are reported as errors.
+
+SRU = 'sru'
+Z3950 = 'z3950'
+
+# Katalog başına zaman aşımı (saniye)
+# Per-catalog timeout (seconds)
+TIMEOUT = 8.0
+CONNECT_TIMEOUT = 3.0
+
+MAX_RECORDS = 20
+MAX_CONCURRENT_TARGETS = 16
+Z3950_POOL_SIZE = 4
+
+# Z39.50 aramaları ayrı ve küçük bir iş parçacığı havuzunda çalışır. ZOOM
+# arayüzü zaman aşımı sunmaz; search() sonucu son tarihte bırakır ama askıda
+# kalan bir hedef, sunucu bağlantıyı kapatana kadar bu havuzun bir iş
+# parçacığını tutar. Böylece en fazla bu havuz dolar, SRU aramaları beklemez.
+# Z39.50 searches run on a separate, small thread pool. The ZOOM API offers no
+# timeout; search() abandons the result at the deadline, but a hung target
+# keeps a thread of this pool until the server drops the connection. At worst
+# this pool fills up; SRU searches are never held up.
+MAX_CONCURRENT_Z3950 = 4
+
+SRU_VERSION = '1.2'
+DEFAULT_SRU_SCHEMA = 'marcxml'
+DEFAULT_Z3950_SYNTAX = 'USMARC'
+
+# Arama alanları için CQL ve CCL dizinleri
+# CQL and CCL indexes for the search fields
+CQL_INDEXES = {'isbn': 'bath.isbn', 'title': 'dc.title', 'author': 'dc.creator', 'text': 'cql.serverChoice'}
+CCL_INDEXES = {'isbn': 'isbn', 'title': 'ti', 'author': 'au', 'text': 'any'}
+
+Hit = namedtuple('Hit', ['catalog', 'isbn', 'title', 'author', 'publisher', 'year', 'record'])
+TargetResult = namedtuple('TargetResult', ['catalog', 'hits', 'error', 'elapsed'])
+
+class FederatedSearchError(Exception):
+    pass
+
+_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_TARGETS, thread_name_prefix='federated')
+_z3950_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_Z3950, thread_name_prefix='federated-z3950')
+
+def normalize_isbn(value):
+    """
+    ISBN'i tekilleştirme için 13 haneli biçime çevirir, geçersizse None
+
+    Converts an ISBN to 13-digit form for de-duplication, None if invalid
+    """
+    digits = re.sub(r'[^0-9Xx]', '', value or '').upper()
+    if len(digits) == 10:
+        core = '978' + digits[:9]
+        check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(core)) % 10) % 10
+        return core + str(check)
+    if len(digits) == 13 and digits.isdigit():
+        return digits
+    return None
+
+def _hit(catalog, record):
+    isbns = [normalize_isbn(isbn) for isbn in record.isbns]
+    isbn = next((isbn for isbn in isbns if isbn), None)
+    return Hit(catalog.name, isbn, record.title, record.author, record.publisher, record.year, record)
+
+def _quote(value):
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def cql_query(terms):
+    return ' and '.join(f"{CQL_INDEXES[name]}={_quote(value)}" for name, value in terms.items())
+
+def ccl_query(terms):
+    return ' and '.join(f"{CCL_INDEXES[name]}={_quote(value)}" for name, value in terms.items())
+
+def _sru_url(catalog):
+    scheme = 'https' if catalog.port == 443 else 'http'
+    return f"{scheme}://{catalog.host}:{catalog.port}/{catalog.database.strip('/')}"
+
+def search_sru(catalog, terms, max_records=MAX_RECORDS, timeout=TIMEOUT):
+    """
+    SRU searchRetrieve isteği yapar ve MARCXML kayıtlarını döndürür
+
+    Makes an SRU searchRetrieve request and returns the MARCXML records
+    """
+    params = {
+        'version': SRU_VERSION,
+        'operation': 'searchRetrieve',
+        'query': cql_query(terms),
+        'maximumRecords': max_records,
+        'recordSchema': catalog.syntax or DEFAULT_SRU_SCHEMA,
+        'recordPacking': 'xml',
+    }
+    auth = (catalog.username, catalog.password) if catalog.username else None
+    # Yeniden deneme ve bekleme süreleri birleşik aramanın son tarihini aşırır;
+    # tek deneme yapılır, süresinde yanıt vermeyen katalog zaman aşımı olarak bildirilir
+    # Retries and their backoff would overrun the federated deadline; one attempt
+    # is made and a catalog that does not answer in time is reported as a timeout
+    response = http_client.get(_sru_url(catalog), retries=0, params=params, auth=auth,
+                               timeout=(min(CONNECT_TIMEOUT, timeout), timeout))
+    response.raise_for_status()
+
+    root = ET.fromstring(response.content)
+    diagnostic = root.find('.//{*}diagnostics/{*}diagnostic/{*}message')
+    if diagnostic is not None:
+        raise FederatedSearchError(diagnostic.text)
+    return [marc.parse_marcxml_record(element) for element in root.iterfind('.//{*}recordData/{*}record')]
+
+class Z3950Pool:
+    """
+    Katalog başına açık Z39.50 bağlantılarını yeniden kullanmak için havuz
+
+    Pool that reuses open Z39.50 connections per catalog
+    """
+    def __init__(self, size=Z3950_POOL_SIZE):
+        self.size = size
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def _pool(self, catalog):
+        key = (catalog.host, catalog.port, catalog.database)
+        with self.lock:
+            return self.pools.setdefault(key, queue.LifoQueue(self.size))
+
+    def acquire(self, catalog):
+        try:
+            return self._pool(catalog).get_nowait()
+        except queue.Empty:
+            options = {'databaseName': catalog.database,
+                       'preferredRecordSyntax': catalog.syntax or DEFAULT_Z3950_SYNTAX}
+            if catalog.username:
+                options.update(user=catalog.username, password=catalog.password)
+            return zoom.Connection(catalog.host, catalog.port, **options)
+
+    def release(self, catalog, connection):
+        try:
+            self._pool(catalog).put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        with self.lock:
+            for pool in self.pools.values():
+                while not pool.empty():
+                    pool.get_nowait().close()
+            self.pools.clear()
+
+z3950_pool = Z3950Pool()
+
+def search_z3950(catalog, terms, max_records=MAX_RECORDS, timeout=TIMEOUT):
+    """
+    Z39.50 araması yapar ve MARC kayıtlarını döndürür
+    Hata veren bağlantı havuza geri konmaz
+
+    Runs a Z39.50 search and returns the MARC records
+    A connection that failed is not put back into the pool
+    """
+    if zoom is None:
+        raise FederatedSearchError("Z39.50 için PyZ3950 gerekli / PyZ3950 is required for Z39.50")
+    # timeout burada uygulanamaz; son tarih search() içinde beklenir (bkz. MAX_CONCURRENT_Z3950)
+    # timeout cannot be applied here; the deadline is enforced in search() (see MAX_CONCURRENT_Z3950)
+    connection = z3950_pool.acquire(catalog)
+    try:
+        results = connection.search(zoom.Query('CCL', ccl_query(terms)))
+        records = []
+        for i in range(min(len(results), max_records)):
+            data = results[i].data
+            if isinstance(data, str):
+                data = data.encode('latin-1')
+            records.append(marc.parse_iso2709(data))
+    except Exception:
+        connection.close()
+        raise
+    z3950_pool.release(catalog, connection)
+    return records
+
+PROTOCOLS = {
+    SRU: search_sru,
+    Z3950: search_z3950,
+}
+
+def _executor_for(catalog):
+    if catalog.protocol.lower().replace('.', '') == Z3950:
+        return _z3950_executor
+    return _executor
+
+def enabled_catalogs():
+    return list(ExternalCatalog.objects.filter(enabled=True).order_by('id'))
+
+def _search_target(catalog, terms, max_records, timeout):
+    started = time.monotonic()
+    try:
+        protocol = PROTOCOLS.get(catalog.protocol.lower().replace('.', ''))
+        if protocol is None:
+            raise FederatedSearchError(f"Desteklenmeyen protokol / Unsupported protocol: {catalog.protocol}")
+        records = protocol(catalog, terms, max_records, timeout)
+        return TargetResult(catalog.name, [_hit(catalog, record) for record in records],
+                            None, time.monotonic() - started)
+    except Exception as e:
+        return TargetResult(catalog.name, [], str(e), time.monotonic() - started)
+
+def search(catalogs=None, timeout=TIMEOUT, max_records=MAX_RECORDS, **terms):
+    """
+    Sorguyu tüm etkin kataloglara aynı anda gönderir ve her katalog yanıt
+    verdikçe TargetResult üretir. Daha önce görülen ISBN'ler sonraki
+    sonuçlardan çıkarılır. Süresinde yanıt vermeyen kataloglar için
+    error="timeout" olan bir sonuç üretilir.
+    terms: isbn, title, author, text
+
+    Sends the query to all enabled catalogs at once and yields a TargetResult
+    as each catalog responds. ISBNs already seen are dropped from later
+    results. Catalogs that do not respond in time yield a result with
+    error="timeout".
+    terms: isbn, title, author, text
+    """
+    terms = {name: value for name, value in terms.items() if value}
+    unknown = set(terms) - set(CQL_INDEXES)
+    if unknown or not terms:
+        raise ValueError(f"Geçersiz arama alanları / Invalid search fields: {sorted(unknown) or 'none'}")
+
+    catalogs = enabled_catalogs() if catalogs is None else catalogs
+    deadline = time.monotonic() + timeout
+    pending = {
+        _executor_for(catalog).submit(_search_target, catalog, terms, max_records, timeout): catalog
+        for catalog in catalogs
+    }
+    seen = set()
+
+    while pending:
+        done, _ = wait(pending, timeout=max(0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            pending.pop(future)
+            result = future.result()
+            hits = []
+            for hit in result.hits:
+                if hit.isbn:
+                    if hit.isbn in seen:
+                        continue
+                    seen.add(hit.isbn)
+                hits.append(hit)
+            yield result._replace(hits=hits)
+
+    # Geç kalan aramalar arka planda biter; bağlantıları havuza döner.
+    # cancel() yalnızca başlamamış aramaları durdurur. SRU istekleri yeniden
+    # denenmediği için en geç kendi zaman aşımlarında biter; Z39.50 aramaları
+    # ise ayrı havuzlarında sunucu yanıt verene veya bağlantıyı kapatana kadar sürer.
+    # Late searches finish in the background; their connections go back to the pool.
+    # cancel() only stops searches that have not started. SRU requests are not
+    # retried, so they end by their own timeout at the latest; Z39.50 searches
+    # run on in their own pool until the server answers or drops the connection.
+    for future, catalog in pending.items():
+        future.cancel()
+        yield TargetResult(catalog.name, [], 'timeout', timeout)
+
+def first_match(isbn=None, timeout=TIMEOUT, **terms):
+    """
+    Kopya kataloglama için ilk uygun kaydı döndürür, bulunamazsa None
+    İlk sonuç gelir gelmez diğer kataloglar beklenmez
+
+    Returns the first usable record for copy cataloguing, or None
+    Other catalogs are not waited for once the first hit arrives
+    """
+    results = search(timeout=timeout, max_records=1, isbn=isbn, **terms)
+    try:
+        for result in results:
+            if result.hits:
+                return result.hits[0]
+    finally:
+        results.close()
+    return None
@@ -0,0 +1,59 @@
+import os
+import argparse
+import django
+from concurrent.futures import ProcessPoolExecutor
+
+import cover_renditions
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from library.models import Book
+
+def main(workers=None, force=False):
+    """
+    Ana fonksiyon
+    Kapağı olan tüm kitaplar için liste, detay ve retina kopyalarını oluşturur
+    Resimler süreç havuzunda işlenir; güncel kopyası olan kapaklar atlanır
+
+    Main function
+    Creates list, detail and retina renditions for all books with a cover
+    Images are processed in a process pool; covers with up-to-date renditions are skipped
+    """
+    # Yalnızca kapak adlarını al, kitap nesnelerini yükleme
+    # Fetch only cover names, do not load book objects
+    names = Book.objects.exclude(cover_image='').exclude(cover_image__isnull=True) \
+        .values_list('cover_image', flat=True)
+    storage = Book._meta.get_field('cover_image').storage
+    paths = [storage.path(name) for name in names if storage.exists(name)]
+    print(f"Toplam {len(paths)} kapak işlenecek.")
+
+    created_count = 0
+    skipped_count = 0
+    failed_count = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(cover_renditions.create_renditions_from_file, paths,
+                               [force] * len(paths), chunksize=16)
+        for path, count, error in results:
+            if error:
+                failed_count += 1
+                print(f"  Kopya oluşturma hatası: {path}: {error}")
+            elif count:
+                created_count += 1
+            else:
+                skipped_count += 1
+
+    print(f"\nToplam {created_count} kapak için kopya oluşturuldu, "
+          f"{skipped_count} kapak güncel, {failed_count} kapakta hata oluştu.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kapak kopyalarını oluştur / Generate cover renditions")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Süreç sayısı (varsayılan: işlemci sayısı) / Number of processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true',
+                        help="Güncel kopyaları da yeniden oluştur / Recreate up-to-date renditions too")
+    args = parser.parse_args()
+    main(workers=args.workers, force=args.force)
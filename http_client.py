@@ -0,0 +1,152 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Harici katalog ve kapak sunucuları için ortak HTTP istemcisi
+# Shared HTTP client for external catalog and cover hosts
+#
+# Tüm betikler requests.get yerine bu modüldeki get() fonksiyonunu kullanır.
+# Böylece aynı sunucuya yapılan istekler açık (keep-alive) bağlantıları
+# yeniden kullanır ve her kapak için TCP+TLS el sıkışması yapılmaz.
+#
+# All scripts use get() from this module instead of requests.get.
+# Requests to the same host reuse open keep-alive connections, so we do not
+# pay a TCP+TLS handshake for every cover.
+
+# Sunucu başına açık tutulacak bağlantı sayısı
+# Number of connections kept open per host
+POOL_SIZE = 10
+
+# Bağlantı havuzu önbelleğinde tutulacak sunucu sayısı
+# Number of hosts kept in the connection pool cache
+POOL_HOSTS = 20
+
+# Yeniden deneme politikası
+# Retry policy
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Varsayılan zaman aşımı (bağlantı, okuma) saniye cinsinden
+# Default timeout (connect, read) in seconds
+TIMEOUT = (5, 10)
+
+USER_AGENT = "library-automation/1.0"
+
+# Sunucu başına iki istek arasındaki en kısa süre (saniye)
+# Minimum interval between two requests per host (seconds)
+HOST_MIN_INTERVALS = {
+    "www.googleapis.com": 1.0,
+    "openlibrary.org": 1.0,
+    "covers.openlibrary.org": 0.5,
+}
+DEFAULT_HOST_MIN_INTERVAL = 0.25
+
+class HostRateLimiter:
+    """
+    Sunucu bazında istek hızını sınırlar
+    Her sunucu için bir sonraki istek zamanını ayırır, beklemeyi kilit dışında yapar
+
+    Limits request rate per host
+    Reserves the next request slot for each host and sleeps outside the lock
+    """
+    def __init__(self, intervals, default_interval):
+        self.intervals = intervals
+        self.default_interval = default_interval
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        interval = self.intervals.get(host, self.default_interval)
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+rate_limiter = HostRateLimiter(HOST_MIN_INTERVALS, DEFAULT_HOST_MIN_INTERVAL)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def configure(pool_size=None, max_retries=None, backoff_factor=None, timeout=None):
+    """
+    İstemci ayarlarını değiştirir ve açık oturumları kapatır
+    Yeni ayarlar bir sonraki istekte oluşturulan oturumlara uygulanır
+
+    Changes client settings and closes open sessions
+    New settings apply to sessions created on the next request
+    """
+    global POOL_SIZE, MAX_RETRIES, BACKOFF_FACTOR, TIMEOUT
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+    if max_retries is not None:
+        MAX_RETRIES = max_retries
+    if backoff_factor is not None:
+        BACKOFF_FACTOR = backoff_factor
+    if timeout is not None:
+        TIMEOUT = timeout
+    close()
+
+def _create_session(retries):
+    retry = Retry(
+        total=retries,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_session(url, retries=None):
+    """
+    URL'nin sunucusu ve yeniden deneme sayısı için ortak oturumu döndürür, yoksa oluşturur
+    retries verilmezse MAX_RETRIES kullanılır
+
+    Returns the shared session for the URL's host and retry count, creating it if needed
+    MAX_RETRIES is used when retries is not given
+    """
+    key = (urlparse(url).netloc, MAX_RETRIES if retries is None else retries)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = _create_session(key[1])
+    return session
+
+def get(url, retries=None, **kwargs):
+    """
+    Hız sınırına uyarak ortak oturumla GET isteği yapar
+    timeout verilmezse varsayılan zaman aşımı kullanılır
+    retries=0 son tarihi olan çağrılar için yeniden denemeyi kapatır
+
+    Makes a GET request through the shared session, respecting the rate limit
+    The default timeout is used when timeout is not given
+    retries=0 turns retrying off for callers that have a deadline
+    """
+    kwargs.setdefault('timeout', TIMEOUT)
+    rate_limiter.wait(url)
+    return get_session(url, retries).get(url, **kwargs)
+
+def close():
+    """
+    Tüm açık oturumları ve bağlantıları kapatır
+
+    Closes all open sessions and connections
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,240 @@
+import os
+import csv
+import json
+import argparse
+import django
+from datetime import datetime
+from itertools import islice
+
+import cover_state
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from django.db import transaction
+from library.models import Book, Author, Category
+
+import catalog_search
+import instrumentation
+
+# Tek seferde işlenecek kayıt sayısı
+# Number of records processed at once
+CHUNK_SIZE = 1000
+
+# Kitap zaten varsa (ISBN çakışması) güncellenecek alanlar
+# Fields updated when a book already exists (ISBN conflict)
+UPDATE_FIELDS = [
+    'title', 'publication_date', 'description', 'page_count',
+    'language', 'publisher', 'category', 'updated_at',
+]
+
+def read_records(path):
+    """
+    CSV veya JSON Lines dosyasındaki kayıtları tek tek okur
+    CSV'de yazarlar "authors" sütununda ";" ile ayrılır
+
+    Reads records from a CSV or JSON Lines file one by one
+    In CSV files authors are separated by ";" in the "authors" column
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith('.jsonl') or path.endswith('.json'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                row['authors'] = [name.strip() for name in (row.get('authors') or '').split(';') if name.strip()]
+                yield row
+
+def chunked(records, size):
+    """
+    Kayıtları size büyüklüğünde listeler halinde döndürür
+
+    Yields records as lists of the given size
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+def parse_date(value):
+    if not value:
+        return None
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+def author_fields(author):
+    """
+    Yazar bilgisini (ad veya sözlük) Author alanlarına çevirir
+
+    Converts author info (name or dict) to Author fields
+    """
+    if isinstance(author, str):
+        return {'name': author}
+    return {
+        'name': author['name'],
+        'biography': author.get('biography', ''),
+        'birth_date': parse_date(author.get('birth_date')),
+    }
+
+def load_name_map(model):
+    """
+    Modelin tüm kayıtlarını {ad: id} olarak bir kez yükler
+
+    Loads all rows of a model once as {name: id}
+    """
+    names = {}
+    for pk, name in model.objects.order_by('-id').values_list('id', 'name').iterator(chunk_size=CHUNK_SIZE):
+        names[name] = pk
+    return names
+
+def create_missing(model, names, objects):
+    """
+    Haritada olmayan kayıtları toplu olarak oluşturur ve haritaya ekler
+
+    Bulk creates rows missing from the map and adds them to it
+    """
+    missing = {obj.name: obj for obj in objects if obj.name not in names}
+    if not missing:
+        return
+    model.objects.bulk_create(missing.values(), batch_size=CHUNK_SIZE)
+    for pk, name in model.objects.filter(name__in=missing).order_by('-id').values_list('id', 'name'):
+        names[name] = pk
+
+def import_chunk(records, authors, categories, default_category, update_existing):
+    """
+    Bir grup kaydı içe aktarır
+    (oluşturulan, güncellenen, atlanan, kuyruğa alınan kapak) sayılarını döndürür
+
+    Imports a group of records
+    Returns counts of (created, updated, skipped, queued covers)
+    """
+    books = {}
+    book_authors = {}
+    cover_urls = {}
+    skipped = 0
+
+    for record in records:
+        isbn = (record.get('isbn') or '').replace('-', '').strip()
+        publication_date = parse_date(record.get('publication_date'))
+        if not isbn or not record.get('title') or not publication_date:
+            skipped += 1
+            print(f"  Eksik bilgi, atlandı: {record.get('title') or isbn}")
+            continue
+
+        copies = int(record.get('total_copies') or 1)
+        books[isbn] = Book(
+            title=record['title'],
+            isbn=isbn,
+            publication_date=publication_date,
+            description=record.get('description', ''),
+            page_count=int(record.get('page_count') or 0),
+            language=record.get('language', ''),
+            publisher=record.get('publisher', ''),
+            category_id=categories.get(record.get('category')) or default_category,
+            available_copies=copies,
+            total_copies=copies,
+        )
+        book_authors[isbn] = [author_fields(author) for author in record.get('authors', [])]
+        if record.get('cover_image_url'):
+            cover_urls[isbn] = record['cover_image_url']
+
+    if not books:
+        return 0, 0, skipped, 0
+
+    with instrumentation.phase('authors'):
+        create_missing(Author, authors, [
+            Author(**fields) for names in book_authors.values() for fields in names
+        ])
+
+    with instrumentation.phase('insert'):
+        existing = set(Book.objects.filter(isbn__in=books).values_list('isbn', flat=True))
+
+        with transaction.atomic():
+            if update_existing:
+                Book.objects.bulk_create(
+                    books.values(), batch_size=CHUNK_SIZE,
+                    update_conflicts=True, unique_fields=['isbn'], update_fields=UPDATE_FIELDS
+                )
+            else:
+                Book.objects.bulk_create(books.values(), batch_size=CHUNK_SIZE, ignore_conflicts=True)
+
+            book_ids = dict(Book.objects.filter(isbn__in=books).values_list('isbn', 'id'))
+
+            BookAuthor = Book.authors.through
+            BookAuthor.objects.bulk_create([
+                BookAuthor(book_id=book_ids[isbn], author_id=authors[fields['name']])
+                for isbn, names in book_authors.items() for fields in names
+            ], batch_size=CHUNK_SIZE, ignore_conflicts=True)
+
+    # Kapaklar burada indirilmez, update_book_covers.py --queued için kuyruğa alınır
+    # Covers are not downloaded here, they are queued for update_book_covers.py --queued
+    queued = [
+        (book_ids[isbn], url) for isbn, url in cover_urls.items()
+        if isbn not in existing or update_existing
+    ]
+    if queued:
+        with instrumentation.phase('queue'):
+            cover_state.enqueue(queued)
+
+    # bulk_create sinyal göndermez; eklenen ve güncellenen kitaplar burada indekslenir
+    # bulk_create sends no signals; created and updated books are indexed here
+    with instrumentation.phase('search_index'):
+        catalog_search.index_books(
+            book_id for isbn, book_id in book_ids.items() if isbn not in existing or update_existing
+        )
+
+    created = len(books) - len(existing)
+    updated = len(existing) if update_existing else 0
+    skipped += 0 if update_existing else len(existing)
+    return created, updated, skipped, len(queued)
+
+def import_records(records, category_name=None, category_description=None,
+                   update_existing=False, chunk_size=CHUNK_SIZE):
+    """
+    Kayıtları gruplar halinde içe aktarır
+    Yazar ve kategoriler bir kez belleğe yüklenir, kitaplar ve yazar ilişkileri
+    toplu olarak eklenir. update_existing True ise aynı ISBN'li kitaplar güncellenir
+
+    Imports records in chunks
+    Authors and categories are loaded into memory once, books and author links
+    are inserted in bulk. If update_existing is True books with the same ISBN are updated
+    """
+    authors = load_name_map(Author)
+    categories = load_name_map(Category)
+
+    default_category = None
+    if category_name:
+        create_missing(Category, categories, [Category(name=category_name, description=category_description)])
+        default_category = categories[category_name]
+
+    totals = [0, 0, 0, 0]
+    for chunk in chunked(records, chunk_size):
+        create_missing(Category, categories, [
+            Category(name=record['category']) for record in chunk if record.get('category')
+        ])
+        counts = import_chunk(chunk, authors, categories, default_category, update_existing)
+        totals = [total + count for total, count in zip(totals, counts)]
+        print(f"  {sum(totals[:3])} kayıt işlendi")
+
+    created, updated, skipped, queued = totals
+    print(f"\nToplam {created} kitap oluşturuldu, {updated} kitap güncellendi, {skipped} kayıt atlandı.")
+    print(f"{queued} kapak indirme kuyruğuna alındı (update_book_covers.py --queued).")
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Katalog kayıtlarını toplu içe aktar / Bulk import catalog records")
+    parser.add_argument('path', help="CSV veya JSON Lines dosyası / CSV or JSON Lines file")
+    parser.add_argument('--category', help="Kategorisi olmayan kayıtlar için kategori / Category for records without one")
+    parser.add_argument('--update', action='store_true',
+                        help="Aynı ISBN'li kitapları güncelle / Update books with the same ISBN")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Tek seferde işlenecek kayıt sayısı / Records processed at once")
+    args = parser.parse_args()
+    import_records(read_records(args.path), category_name=args.category,
+                   update_existing=args.update, chunk_size=args.chunk_size)
@@ -0,0 +1,389 @@
+import os
+import hmac
+import json
+import time
+import logging
+import tempfile
+import threading
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection, connections
+from django.http import Http404, HttpResponse
+
+# İstek ve betik ölçümleri: sorgu sayısı, tekrarlanan sorgular, DB süresi, aşamalar
+# Request and script instrumentation: query count, repeated queries, DB time, phases
+#
+# InstrumentationMiddleware her istekte tüm bağlantılara bir execute_wrapper
+# takar; sorgu sayısı, toplam DB süresi ve SQL metni başına tekrar sayısı
+# tutulur. Aynı SQL bir istekte DUPLICATE_THRESHOLD kez veya daha fazla
+# çalışırsa N+1 şüphesi olarak işaretlenir. Şablon süresi TemplateResponse'un
+# render sonrası geri çağrısıyla, kapak dosyası işlemleri ve diğer aşamalar
+# phase() ile ölçülür. Ölçümler süreç içi sayaçlarda toplanır ve metrics_view
+# ile Prometheus metin biçiminde sunulur; yavaş veya N+1 şüpheli istekler
+# "library.instrumentation" günlüğüne JSON olarak yazılır (DEBUG düzeyinde
+# tüm istekler). Etiketler rota şablonundan gelir, böylece seri sayısı sınırlı
+# kalır. Betikler script() ile sarılır; süreç bitince sayaçlar kaybolacağı için
+# özet günlüğe yazılır ve INSTRUMENTATION_TEXTFILE_DIR ayarlıysa node_exporter
+# textfile toplayıcısı için <betik>.prom dosyası bırakılır.
+#
+# InstrumentationMiddleware installs an execute_wrapper on every connection for
+# each request; it keeps the query count, total DB time and a repeat count per
+# SQL text. SQL that runs DUPLICATE_THRESHOLD times or more in one request is
+# flagged as a suspected N+1. Template time is measured with TemplateResponse's
+# post-render callback, cover file work and other phases with phase(). The
+# numbers are summed in in-process counters and served in Prometheus text
+# format by metrics_view; slow or N+1 requests are written as JSON to the
+# "library.instrumentation" log (every request at DEBUG level). Labels come
+# from the route pattern, so the number of series stays bounded. Scripts are
+# wrapped with script(); the counters die with the process, so the summary is
+# logged and, when INSTRUMENTATION_TEXTFILE_DIR is set, a <script>.prom file is
+# left for the node_exporter textfile collector.
+
+SLOW_REQUEST_SETTING = 'INSTRUMENTATION_SLOW_REQUEST_MS'
+DUPLICATE_THRESHOLD_SETTING = 'INSTRUMENTATION_DUPLICATE_THRESHOLD'
+TEXTFILE_DIR_SETTING = 'INSTRUMENTATION_TEXTFILE_DIR'
+METRICS_TOKEN_SETTING = 'INSTRUMENTATION_METRICS_TOKEN'
+
+SLOW_REQUEST_MS = 500
+DUPLICATE_THRESHOLD = 5
+# Günlüğe yazılan SQL metninin en büyük uzunluğu
+# Maximum length of SQL text written to the log
+LOGGED_SQL_LENGTH = 300
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Metrik adı -> (tür, açıklama, histogram aralıkları)
+# Metric name -> (type, help, histogram buckets)
+METRICS = {
+    'library_http_requests_total': ('counter', 'HTTP requests', None),
+    'library_http_request_duration_seconds': ('histogram', 'HTTP request latency', LATENCY_BUCKETS),
+    'library_http_request_queries': ('histogram', 'SQL queries per HTTP request', QUERY_BUCKETS),
+    'library_http_db_seconds_total': ('counter', 'Time spent in SQL queries', None),
+    'library_http_duplicate_query_requests_total': ('counter', 'Requests with repeated SQL (suspected N+1)', None),
+    'library_http_phase_seconds_total': ('counter', 'Time spent in request phases', None),
+    'library_script_duration_seconds': ('gauge', 'Duration of the last script run', None),
+    'library_script_queries': ('gauge', 'SQL queries of the last script run', None),
+    'library_script_db_seconds': ('gauge', 'Time spent in SQL queries in the last script run', None),
+    'library_script_phase_seconds': ('gauge', 'Thread-seconds spent in script phases in the last run, '
+                                     'summed across threads so it can exceed wall time', None),
+    'library_script_last_run_timestamp_seconds': ('gauge', 'End time of the last script run', None),
+}
+
+logger = logging.getLogger('library.instrumentation')
+
+class Registry:
+    """
+    Süreç içi, iş parçacığı güvenli sayaç, gösterge ve histogramlar
+
+    Thread-safe in-process counters, gauges and histograms
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = METRICS[name][2]
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # Aralık sayaçları, toplam, adet
+                # Bucket counts, sum, count
+                histogram = self.histograms[key] = [0] * len(buckets) + [0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def render(self):
+        """
+        Tüm metrikleri Prometheus metin biçiminde döndürür
+
+        Returns every metric in Prometheus text format
+        """
+        with self.lock:
+            values = dict(self.values)
+            histograms = {key: list(counts) for key, counts in self.histograms.items()}
+
+        series = defaultdict(list)
+        for (name, labels), value in values.items():
+            series[name].append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), counts in histograms.items():
+            for bound, count in zip(METRICS[name][2], counts):
+                series[name].append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {count}")
+            series[name].append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {counts[-1]}")
+            series[name].append(f"{name}_sum{_labels(labels)} {_number(counts[-2])}")
+            series[name].append(f"{name}_count{_labels(labels)} {counts[-1]}")
+
+        lines = []
+        for name in sorted(series):
+            kind, description, _ = METRICS[name]
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"] + sorted(series[name])
+        return '\n'.join(lines) + '\n'
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}'
+
+def _number(value):
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+registry = Registry()
+
+class Record:
+    """
+    Bir isteğin veya betik çalıştırmasının ölçümleri
+    Bağlantı execute_wrapper'ı olarak da kullanılır
+
+    Measurements of one request or script run
+    Also used as a connection execute_wrapper
+    """
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+        self.phases = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.queries += 1
+                self.db_seconds += elapsed
+                # Parametreler ayrı geçtiği için SQL metni sorgunun imzasıdır
+                # Parameters are passed separately, so the SQL text is the query's signature
+                self.statements[sql] += 1
+
+    def add_phase(self, name, seconds):
+        with self.lock:
+            self.phases[name] += seconds
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    def duplicates(self, threshold=DUPLICATE_THRESHOLD):
+        """
+        Eşik kadar veya daha sık tekrarlanan SQL metinlerini [(sql, adet)] olarak döndürür
+
+        Returns SQL texts repeated at least threshold times as [(sql, count)]
+        """
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+    def summary(self, threshold=DUPLICATE_THRESHOLD):
+        return {
+            'ms': round((self.seconds or 0) * 1000, 1),
+            'queries': self.queries,
+            'db_ms': round(self.db_seconds * 1000, 1),
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            'duplicates': [
+                {'sql': sql[:LOGGED_SQL_LENGTH], 'count': count} for sql, count in self.duplicates(threshold)
+            ],
+        }
+
+_current = ContextVar('instrumentation_record', default=None)
+# İş parçacığı havuzları bağlamı taşımadığı için betik kaydı süreç genelinde de tutulur
+# Thread pools do not carry the context, so the script record is also kept process-wide
+_script_record = None
+
+def current():
+    return _current.get() or _script_record
+
+@contextmanager
+def phase(name):
+    """
+    Bloğun süresini geçerli isteğin veya betiğin aşaması olarak ekler
+    Ölçüm yoksa yalnızca bloğu çalıştırır
+    Aynı aşama birden çok iş parçacığında ölçülürse süreler toplanır; toplam
+    duvar saati süresini aşabilir (iş parçacığı-saniye)
+
+    Adds the block's duration to a phase of the current request or script
+    Just runs the block when nothing is being measured
+    When one phase is measured on several threads the durations are summed;
+    the total can exceed wall time (thread-seconds)
+    """
+    record = current()
+    if record is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.add_phase(name, time.perf_counter() - started)
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.route or '/'
+
+class InstrumentationMiddleware:
+    """
+    İstek başına sorgu, DB süresi, aşama ve gecikme ölçümü
+    settings.MIDDLEWARE listesinin başına eklenmelidir
+
+    Per-request query, DB time, phase and latency measurement
+    Should be added at the start of settings.MIDDLEWARE
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, SLOW_REQUEST_SETTING, SLOW_REQUEST_MS) / 1000
+        self.threshold = getattr(settings, DUPLICATE_THRESHOLD_SETTING, DUPLICATE_THRESHOLD)
+
+    def __call__(self, request):
+        record = Record('request')
+        token = _current.set(record)
+        try:
+            with ExitStack() as stack:
+                for database in connections.all():
+                    stack.enter_context(database.execute_wrapper(record))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        record.finish()
+        self.report(request, response, record)
+        return response
+
+    def process_template_response(self, request, response):
+        # Şablon bu kancadan hemen sonra işlenir; geri çağrı işleme bitince çalışır
+        # The template is rendered right after this hook; the callback runs when rendering ends
+        record = _current.get()
+        if record is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                record.add_phase('template', time.perf_counter() - started)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, record):
+        route = _route(request)
+        duplicates = record.duplicates(self.threshold)
+        registry.inc('library_http_requests_total',
+                     {'method': request.method, 'route': route, 'status': response.status_code})
+        registry.observe('library_http_request_duration_seconds', {'route': route}, record.seconds)
+        registry.observe('library_http_request_queries', {'route': route}, record.queries)
+        registry.inc('library_http_db_seconds_total', {'route': route}, record.db_seconds)
+        for name, seconds in record.phases.items():
+            registry.inc('library_http_phase_seconds_total', {'route': route, 'phase': name}, seconds)
+        if duplicates:
+            registry.inc('library_http_duplicate_query_requests_total', {'route': route})
+
+        level = logging.WARNING if duplicates or record.seconds >= self.slow_seconds else logging.DEBUG
+        # JSON yalnızca günlüğe yazılacaksa oluşturulur
+        # The JSON is only built when it will be logged
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'event': 'request', 'method': request.method, 'path': request.path, 'route': route,
+                'status': response.status_code, **record.summary(self.threshold),
+            }, ensure_ascii=False))
+
+def metrics_view(request):
+    """
+    Prometheus metin biçiminde metrikler: /metrics/
+    INSTRUMENTATION_METRICS_TOKEN ayarlıysa "Authorization: Bearer <token>"
+    başlığı gerekir. Ayarlı değilse yalnızca yerel adreslerden ve INTERNAL_IPS'ten
+    erişilebilir; ters vekil sunucu arkasında tüm istekler 127.0.0.1'den
+    geldiği için bu denetim işe yaramaz, orada token kullanılmalıdır
+
+    Metrics in Prometheus text format: /metrics/
+    When INSTRUMENTATION_METRICS_TOKEN is set an "Authorization: Bearer <token>"
+    header is required. Otherwise it is only reachable from local addresses and
+    INTERNAL_IPS; behind a reverse proxy every request comes from 127.0.0.1 and
+    that check is useless, so set the token there
+    """
+    token = getattr(settings, METRICS_TOKEN_SETTING, None)
+    if token:
+        given = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(given.encode(), f"Bearer {token}".encode()):
+            raise Http404
+    elif request.META.get('REMOTE_ADDR') not in {'127.0.0.1', '::1', *getattr(settings, 'INTERNAL_IPS', ())}:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def write_textfile(name, directory):
+    """
+    Metrikleri node_exporter textfile toplayıcısı için <ad>.prom dosyasına yazar
+
+    Writes the metrics to <name>.prom for the node_exporter textfile collector
+    """
+    os.makedirs(directory, exist_ok=True)
+    # Toplayıcı yarım dosya okumasın diye geçici dosyaya yazılıp taşınır
+    # Written to a temporary file and moved so the collector never reads half a file
+    with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False, encoding='utf-8') as f:
+        f.write(registry.render())
+    # NamedTemporaryFile dosyayı 0600 izniyle açar; kendi kullanıcısıyla çalışan
+    # node_exporter okuyabilsin diye izinler açılır
+    # NamedTemporaryFile creates the file as 0600; open it up so node_exporter,
+    # which runs as its own user, can read it
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, os.path.join(directory, f"{name}.prom"))
+
+@contextmanager
+def script(name):
+    """
+    Betik çalıştırmasını ölçer: toplam süre, sorgular, DB süresi ve phase() aşamaları
+    Bitince özeti yazdırır ve günlüğe ekler
+
+    Measures a script run: total time, queries, DB time and phase() phases
+    Prints and logs the summary when it ends
+    """
+    global _script_record
+    record = Record(name)
+    _script_record = record
+    token = _current.set(record)
+    try:
+        with connection.execute_wrapper(record):
+            yield record
+    finally:
+        _current.reset(token)
+        _script_record = None
+        record.finish()
+        report_script(record)
+
+def report_script(record):
+    labels = {'script': record.name}
+    registry.set('library_script_duration_seconds', labels, record.seconds)
+    registry.set('library_script_queries', labels, record.queries)
+    registry.set('library_script_db_seconds', labels, record.db_seconds)
+    registry.set('library_script_last_run_timestamp_seconds', labels, time.time())
+    for name, seconds in record.phases.items():
+        registry.set('library_script_phase_seconds', {'script': record.name, 'phase': name}, seconds)
+
+    summary = record.summary()
+    print(f"\nSüre / Time: {summary['ms'] / 1000:.2f} s, {record.queries} sorgu / queries, "
+          f"DB {summary['db_ms'] / 1000:.2f} s")
+    for name, ms in sorted(summary['phases_ms'].items(), key=lambda item: -item[1]):
+        print(f"  {name:<12} {ms / 1000:8.2f} s")
+    logger.info(json.dumps({'event': 'script', 'script': record.name, **summary}, ensure_ascii=False))
+
+    directory = getattr(settings, TEXTFILE_DIR_SETTING, None)
+    if directory:
+        write_textfile(record.name, directory)
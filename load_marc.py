@@ -0,0 +1,136 @@
+import os
+import re
+import argparse
+import django
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from django.db import transaction
+from library.models import Author, Book, Category
+
+import marc
+import marc_index
+import import_catalog
+
+# MARC dökümlerini (ISO 2709 veya MARCXML) toplu içe aktarır
+# Bulk loads MARC dumps (ISO 2709 or MARCXML)
+#
+#   python load_marc.py katalog.mrc --category "Genel"
+#   python load_marc.py katalog.xml --update
+#   python load_marc.py --reindex
+#
+# Dosya tek geçişte kayıt kayıt okunur ve CHUNK_SIZE'lık gruplar halinde
+# işlenir: kitaplar import_catalog ile toplu oluşturulur, kayıtlar
+# Book.marc_record alanına MARCXML olarak yazılır ve alanları
+# library_marc_field tablosuna indekslenir. Bellekte en fazla bir grup bulunur.
+#
+# The file is read record by record in a single pass and processed in groups
+# of CHUNK_SIZE: books are created in bulk through import_catalog, records are
+# written to Book.marc_record as MARCXML and their fields are indexed into
+# library_marc_field. At most one group is held in memory.
+
+CHUNK_SIZE = import_catalog.CHUNK_SIZE
+
+def _digits(value):
+    match = re.search(r'\d+', value or '')
+    return int(match.group()) if match else None
+
+def catalog_record(record):
+    """
+    MARC kaydını import_catalog kayıt sözlüğüne çevirir
+
+    Converts a MARC record to an import_catalog record dict
+    """
+    isbn = record.isbns[0].replace('-', '') if record.isbns else ''
+    authors = [name.strip(' ,.') for name in record.values('100', 'a') + record.values('700', 'a')]
+    control = record.value('008') or ''
+    year = record.year or (control[7:11] if control[7:11].isdigit() else None)
+    return {
+        'isbn': isbn,
+        'title': record.title,
+        'authors': [name for name in authors if name],
+        'publisher': record.publisher or '',
+        'publication_date': f"{year}-01-01" if year else None,
+        'description': record.value('520', 'a') or '',
+        'page_count': _digits(record.value('300', 'a')) or 0,
+        'language': record.value('041', 'a') or control[35:38].strip(),
+    }
+
+def attach_records(chunk, update_existing):
+    """
+    Gruptaki kayıtları kitapların marc_record alanına yazar ve indeksler
+    Mevcut bir MARC kaydı yalnızca update_existing ise değiştirilir
+    Yazılan kayıt sayısını döndürür
+
+    Writes the group's records to the books' marc_record field and indexes them
+    An existing MARC record is replaced only if update_existing is set
+    Returns the number of records written
+    """
+    records = {isbn: record for isbn, record in chunk if isbn}
+    books = Book.objects.filter(isbn__in=records).values_list('id', 'isbn', 'marc_record')
+    targets = [
+        (book_id, records[isbn]) for book_id, isbn, text in books
+        if update_existing or not (text or '').strip()
+    ]
+    if not targets:
+        return 0
+    with transaction.atomic():
+        Book.objects.bulk_update(
+            [Book(id=book_id, marc_record=marc.to_marcxml_string(record)) for book_id, record in targets],
+            ['marc_record'], batch_size=CHUNK_SIZE
+        )
+        marc_index.index_records(targets)
+    return len(targets)
+
+def load(path, category_name=None, update_existing=False, chunk_size=CHUNK_SIZE):
+    """
+    MARC dosyasını tek geçişte içe aktarır
+    (oluşturulan, güncellenen, atlanan, MARC kaydı yazılan) sayılarını döndürür
+
+    Imports a MARC file in a single pass
+    Returns counts of (created, updated, skipped, MARC records written)
+    """
+    authors = import_catalog.load_name_map(Author)
+    categories = import_catalog.load_name_map(Category)
+    default_category = None
+    if category_name:
+        import_catalog.create_missing(Category, categories, [Category(name=category_name)])
+        default_category = categories[category_name]
+
+    totals = [0, 0, 0, 0]
+    for records in import_catalog.chunked(marc.read_file(path), chunk_size):
+        converted = [catalog_record(record) for record in records]
+        counts = import_catalog.import_chunk(converted, authors, categories, default_category, update_existing)
+        written = attach_records(
+            [(item['isbn'], record) for item, record in zip(converted, records)], update_existing
+        )
+        totals = [total + count for total, count in zip(totals, list(counts[:3]) + [written])]
+        print(f"  {sum(totals[:3])} kayıt işlendi")
+
+    created, updated, skipped, written = totals
+    print(f"\nToplam {created} kitap oluşturuldu, {updated} kitap güncellendi, {skipped} kayıt atlandı.")
+    print(f"{written} MARC kaydı yazıldı ve indekslendi.")
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MARC dosyalarını içe aktar / Load MARC files")
+    parser.add_argument('path', nargs='?', help="ISO 2709 (.mrc) veya MARCXML dosyası / ISO 2709 (.mrc) or MARCXML file")
+    parser.add_argument('--category', help="Kitaplar için kategori / Category for the books")
+    parser.add_argument('--update', action='store_true',
+                        help="Aynı ISBN'li kitapları ve MARC kayıtlarını güncelle / "
+                             "Update books with the same ISBN and their MARC records")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Tek seferde işlenecek kayıt sayısı / Records processed at once")
+    parser.add_argument('--reindex', action='store_true',
+                        help="Tüm MARC alan indeksini yeniden oluştur / Rebuild the whole MARC field index")
+    args = parser.parse_args()
+
+    if args.reindex:
+        print(f"{marc_index.rebuild_index()} kitabın MARC alanları indekslendi.")
+    elif args.path:
+        load(args.path, category_name=args.category, update_existing=args.update, chunk_size=args.chunk_size)
+    else:
+        parser.error("Dosya yolu veya --reindex gerekli / A file path or --reindex is required")
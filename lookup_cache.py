@@ -0,0 +1,143 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Kapak arama sonuçları için kalıcı önbellek
+# Persistent cache for cover lookup results
+#
+# Her kayıt sağlayıcı ve API'ye gönderilen sorgu metni (veya ISBN) ile
+# anahtarlanır; farklı sorgular, normalleştirilince aynı görünseler de ayrı
+# sonuç döndürebileceği için kaydı paylaşmaz. Bulunamayan sonuçlar da (None)
+# negatif kayıt olarak saklanır, böylece süreleri dolana kadar aynı sorgu
+# tekrar API'ye gönderilmez.
+#
+# Each entry is keyed by provider and the query text sent to the API (or the
+# ISBN); different queries may return different results even when they look
+# alike after normalization, so they do not share an entry. Misses (None) are
+# stored as negative entries too, so the same query is not sent to the API
+# again until the entry expires.
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cover_lookup_cache.sqlite3')
+
+# Kayıtların geçerlilik süreleri (saniye)
+# Entry lifetimes (seconds)
+POSITIVE_TTL = 30 * 24 * 60 * 60
+NEGATIVE_TTL = 7 * 24 * 60 * 60
+
+# Önbellekte tutulacak en fazla kayıt; aşılırsa en az kullanılanlar silinir
+# Maximum number of entries; least recently used ones are evicted beyond this
+MAX_ENTRIES = 50000
+# Boyut denetimi önbellek açılırken, kapatılırken ve ayrıca bu kadar yazmada bir
+# yapılır; az yazan çalıştırmalar da sınırı korur
+# The size check runs when the cache is opened and closed, and also once every
+# this many writes; runs that write little still keep the limit
+EVICTION_INTERVAL = 500
+
+# Önbellekte kayıt olmadığını belirtir (None negatif kayıt anlamına gelir)
+# Marks that there is no entry (None means a negative entry)
+MISSING = object()
+
+_connection = None
+_lock = threading.Lock()
+_writes = 0
+
+def _get_connection():
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(CACHE_PATH, check_same_thread=False, isolation_level=None)
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS lookup ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT,"
+            " expires_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        _connection.execute("CREATE INDEX IF NOT EXISTS lookup_last_used ON lookup (last_used)")
+        _evict(_connection, time.time())
+    return _connection
+
+def make_key(provider, query=None, isbn=None):
+    """
+    Sağlayıcı ve API'ye gönderilen sorgu metni veya ISBN'den önbellek anahtarı oluşturur
+
+    Builds a cache key from provider and the query text sent to the API, or the ISBN
+    """
+    if isbn:
+        return f"{provider}:isbn:{isbn.replace('-', '').strip()}"
+    return f"{provider}:query:{query}"
+
+def get(provider, query=None, isbn=None):
+    """
+    Önbellekteki sonucu döndürür
+    Kayıt yoksa veya süresi dolduysa MISSING döndürür
+
+    Returns the cached result
+    Returns MISSING if there is no entry or it has expired
+    """
+    key = make_key(provider, query, isbn)
+    now = time.time()
+    with _lock:
+        connection = _get_connection()
+        row = connection.execute("SELECT value, expires_at FROM lookup WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return MISSING
+        if row[1] < now:
+            connection.execute("DELETE FROM lookup WHERE key = ?", (key,))
+            return MISSING
+        connection.execute("UPDATE lookup SET last_used = ? WHERE key = ?", (now, key))
+    return json.loads(row[0])
+
+def set(provider, value, query=None, isbn=None):
+    """
+    Sonucu önbelleğe yazar; value None ise negatif kayıt olarak saklanır
+
+    Writes the result to the cache; a None value is stored as a negative entry
+    """
+    global _writes
+    key = make_key(provider, query, isbn)
+    now = time.time()
+    ttl = NEGATIVE_TTL if value is None else POSITIVE_TTL
+    with _lock:
+        connection = _get_connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO lookup (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + ttl, now)
+        )
+        _writes += 1
+        if _writes % EVICTION_INTERVAL == 0:
+            _evict(connection, now)
+
+def _evict(connection, now):
+    # Önce süresi dolanlar, sınır hâlâ aşılıyorsa en az kullanılanlar silinir
+    # Expired entries go first, then the least recently used ones if still over the limit
+    connection.execute("DELETE FROM lookup WHERE expires_at < ?", (now,))
+    count = connection.execute("SELECT COUNT(*) FROM lookup").fetchone()[0]
+    if count > MAX_ENTRIES:
+        connection.execute(
+            "DELETE FROM lookup WHERE key IN (SELECT key FROM lookup ORDER BY last_used LIMIT ?)",
+            (count - MAX_ENTRIES,)
+        )
+
+def close():
+    """
+    Boyut sınırını uygular ve bağlantıyı kapatır; sonraki kullanım yeniden açar
+
+    Enforces the size limit and closes the connection; the next use opens it again
+    """
+    global _connection
+    with _lock:
+        if _connection is not None:
+            _evict(_connection, time.time())
+            _connection.close()
+            _connection = None
+
+def clear():
+    """
+    Önbellekteki tüm kayıtları siler
+
+    Deletes all cache entries
+    """
+    with _lock:
+        _get_connection().execute("DELETE FROM lookup")
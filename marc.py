@@ -0,0 +1,296 @@
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+# MARC 21 kayıtları: ISO 2709 ve MARCXML okuma/yazma
+# MARC 21 records: reading and writing ISO 2709 and MARCXML
+#
+# Kayıt, etiket sırasıyla alanlardan oluşan hafif bir nesnedir. Kontrol
+# alanları (001-009) yalnızca veri taşır; veri alanlarının iki göstergesi ve
+# (kod, değer) çiftlerinden oluşan alt alanları vardır.
+#
+# A record is a lightweight object holding fields in tag order. Control
+# fields (001-009) carry data only; data fields have two indicators and
+# subfields made of (code, value) pairs.
+#
+# read_iso2709() ve read_marcxml() dosyaları kayıt kayıt okur; bellekte aynı
+# anda yalnızca bir kayıt bulunur, böylece 100 binlik dökümler de sabit
+# bellekle işlenir.
+#
+# read_iso2709() and read_marcxml() read files record by record; only one
+# record is in memory at a time, so 100k-record dumps are processed in
+# constant memory.
+
+MARCXML_NS = 'http://www.loc.gov/MARC21/slim'
+
+RECORD_TERMINATOR = b'\x1d'
+FIELD_TERMINATOR = b'\x1e'
+SUBFIELD_DELIMITER = b'\x1f'
+
+LEADER_LENGTH = 24
+
+# Yeni kayıtlar için: kitap (am), UTF-8 (a); uzunluk ve adres yazılırken doldurulur
+# For new records: book (am), UTF-8 (a); length and address are filled in when written
+DEFAULT_LEADER = '00000nam a2200000   4500'
+DIRECTORY_ENTRY_LENGTH = 12
+
+class MarcError(ValueError):
+    pass
+
+Field = namedtuple('Field', ['tag', 'indicators', 'subfields', 'data'])
+
+def is_control_tag(tag):
+    return tag < '010'
+
+class Record:
+    """
+    Bir MARC kaydı: başlık (leader) ve alan listesi
+
+    A MARC record: the leader and a list of fields
+    """
+    def __init__(self, leader=None, fields=None):
+        self.leader = leader or DEFAULT_LEADER
+        self.fields = fields or []
+
+    def add_control_field(self, tag, data):
+        self.fields.append(Field(tag, None, None, data))
+
+    def add_field(self, tag, subfields, indicators='  '):
+        self.fields.append(Field(tag, indicators, list(subfields), None))
+
+    def get_fields(self, *tags):
+        return [field for field in self.fields if not tags or field.tag in tags]
+
+    def values(self, tag, code=None):
+        """
+        Etiketteki kontrol verilerini veya verilen kodlu alt alan değerlerini döndürür
+
+        Returns the control data of the tag, or the values of subfields with the given code
+        """
+        result = []
+        for field in self.get_fields(tag):
+            if field.data is not None:
+                result.append(field.data)
+            else:
+                result.extend(value for subfield_code, value in field.subfields if code is None or subfield_code == code)
+        return result
+
+    def value(self, tag, code=None):
+        values = self.values(tag, code)
+        return values[0] if values else None
+
+    @property
+    def isbns(self):
+        # 020$a "9789750719387 (ciltli)" gibi açıklamalar içerebilir
+        # 020$a may carry qualifiers such as "9789750719387 (hardcover)"
+        return [value.split()[0] for value in self.values('020', 'a') if value.strip()]
+
+    @property
+    def title(self):
+        parts = self.values('245', 'a') + self.values('245', 'b')
+        return ' '.join(part.strip(' /:;,.') for part in parts) or None
+
+    @property
+    def author(self):
+        value = self.value('100', 'a') or self.value('110', 'a')
+        return value.strip(' ,.') if value else None
+
+    @property
+    def publisher(self):
+        value = self.value('264', 'b') or self.value('260', 'b')
+        return value.strip(' ,:;') if value else None
+
+    @property
+    def year(self):
+        value = self.value('264', 'c') or self.value('260', 'c')
+        digits = ''.join(ch for ch in value or '' if ch.isdigit())
+        return digits[:4] or None
+
+    def to_xml(self):
+        """
+        Kaydı MARCXML <record> öğesi olarak döndürür
+
+        Returns the record as a MARCXML <record> element
+        """
+        element = ET.Element(f'{{{MARCXML_NS}}}record')
+        ET.SubElement(element, f'{{{MARCXML_NS}}}leader').text = self.leader
+        for field in self.fields:
+            if field.data is not None:
+                ET.SubElement(element, f'{{{MARCXML_NS}}}controlfield', tag=field.tag).text = field.data
+                continue
+            datafield = ET.SubElement(element, f'{{{MARCXML_NS}}}datafield',
+                                      tag=field.tag, ind1=field.indicators[0], ind2=field.indicators[1])
+            for code, value in field.subfields:
+                ET.SubElement(datafield, f'{{{MARCXML_NS}}}subfield', code=code).text = value
+        return element
+
+    def to_iso2709(self):
+        """
+        Kaydı UTF-8 ISO 2709 baytlarına çevirir; leader uzunluk ve adresleri yeniden hesaplanır
+
+        Converts the record to UTF-8 ISO 2709 bytes; leader length and address are recomputed
+        """
+        directory = []
+        data = []
+        offset = 0
+        for field in self.fields:
+            if field.data is not None:
+                value = field.data.encode('utf-8') + FIELD_TERMINATOR
+            else:
+                value = field.indicators.encode('utf-8') + b''.join(
+                    SUBFIELD_DELIMITER + code.encode('utf-8') + text.encode('utf-8')
+                    for code, text in field.subfields
+                ) + FIELD_TERMINATOR
+            directory.append(b'%s%04d%05d' % (field.tag.encode('ascii'), len(value), offset))
+            data.append(value)
+            offset += len(value)
+
+        base_address = LEADER_LENGTH + DIRECTORY_ENTRY_LENGTH * len(directory) + 1
+        length = base_address + offset + 1
+        leader = f"{length:05d}{self.leader[5:9]}a{self.leader[10:12]}{base_address:05d}{self.leader[17:]}"
+        return leader.encode('ascii') + b''.join(directory) + FIELD_TERMINATOR + b''.join(data) + RECORD_TERMINATOR
+
+def _decode(data, utf8):
+    # Leader 9. konum 'a' ise UTF-8; değilse MARC-8, burada latin-1 ile yaklaşık çözülür
+    # Leader position 9 'a' means UTF-8; otherwise MARC-8, approximated here with latin-1
+    return data.decode('utf-8', errors='replace') if utf8 else data.decode('latin-1')
+
+def parse_iso2709(data):
+    """
+    Tek bir ISO 2709 kaydını (bayt) Record nesnesine çevirir
+    Bozuk kayıtlar için MarcError fırlatır
+
+    Parses a single ISO 2709 record (bytes) into a Record
+    Raises MarcError for malformed records
+    """
+    if len(data) < LEADER_LENGTH:
+        raise MarcError("Kayıt çok kısa / Record too short")
+    leader = data[:LEADER_LENGTH].decode('ascii', errors='replace')
+    utf8 = leader[9] == 'a'
+    try:
+        base_address = int(leader[12:17])
+    except ValueError:
+        raise MarcError(f"Geçersiz leader / Invalid leader: {leader!r}")
+
+    directory_end = data.find(FIELD_TERMINATOR, LEADER_LENGTH)
+    if directory_end < 0 or directory_end >= base_address:
+        raise MarcError("Dizin bulunamadı / Directory not found")
+
+    record = Record(leader)
+    for entry in range(LEADER_LENGTH, directory_end, DIRECTORY_ENTRY_LENGTH):
+        directory = data[entry:entry + DIRECTORY_ENTRY_LENGTH].decode('ascii', errors='replace')
+        try:
+            tag, length, start = directory[:3], int(directory[3:7]), int(directory[7:12])
+        except ValueError:
+            raise MarcError(f"Geçersiz dizin girdisi / Invalid directory entry: {directory!r}")
+        value = data[base_address + start:base_address + start + length].rstrip(FIELD_TERMINATOR)
+
+        if is_control_tag(tag):
+            record.add_control_field(tag, _decode(value, utf8))
+            continue
+        indicators = _decode(value[:2], utf8).ljust(2)
+        subfields = [
+            (_decode(chunk[:1], utf8), _decode(chunk[1:], utf8))
+            for chunk in value[2:].split(SUBFIELD_DELIMITER) if chunk
+        ]
+        record.add_field(tag, subfields, indicators)
+    return record
+
+def parse_marcxml_record(element):
+    """
+    MARCXML <record> öğesini Record nesnesine çevirir
+    Ad alanlı ve ad alansız öğeler kabul edilir
+
+    Converts a MARCXML <record> element into a Record
+    Both namespaced and plain elements are accepted
+    """
+    record = Record(element.findtext('{*}leader'))
+    for child in element:
+        name = child.tag.rsplit('}', 1)[-1]
+        if name == 'controlfield':
+            record.add_control_field(child.get('tag'), child.text or '')
+        elif name == 'datafield':
+            subfields = [
+                (subfield.get('code'), subfield.text or '')
+                for subfield in child if subfield.tag.rsplit('}', 1)[-1] == 'subfield'
+            ]
+            record.add_field(child.get('tag'), subfields, (child.get('ind1') or ' ') + (child.get('ind2') or ' '))
+    return record
+
+def to_marcxml_string(record):
+    """
+    Kaydı tek bir <record> öğesi olarak MARCXML metnine çevirir
+
+    Converts the record to MARCXML text as a single <record> element
+    """
+    return ET.tostring(record.to_xml(), encoding='unicode')
+
+def parse_text(text):
+    """
+    Metin olarak saklanan kaydı (MARCXML veya ISO 2709) çözer, boşsa None
+
+    Parses a record stored as text (MARCXML or ISO 2709), None if empty
+    """
+    # str.strip() MARC ayırıcılarını da boşluk sayar
+    # str.strip() would also treat the MARC delimiters as whitespace
+    text = (text or '').strip(' \t\r\n')
+    if not text:
+        return None
+    if text.startswith('<'):
+        root = ET.fromstring(text)
+        if root.tag.rsplit('}', 1)[-1] != 'record':
+            root = root.find('.//{*}record')
+            if root is None:
+                raise MarcError("MARCXML kaydı bulunamadı / No MARCXML record found")
+        return parse_marcxml_record(root)
+    return parse_iso2709(text.encode('utf-8'))
+
+def read_iso2709(stream):
+    """
+    İkili akıştaki ISO 2709 kayıtlarını tek tek okur
+    Kayıt uzunluğu leader'dan okunur, dosya bütün olarak belleğe alınmaz
+
+    Reads ISO 2709 records one by one from a binary stream
+    The record length is read from the leader, the file is never loaded whole
+    """
+    while True:
+        header = stream.read(5)
+        # Bazı dökümlerde kayıtlar arasında satır sonu bulunur
+        # Some dumps have line breaks between records
+        while header and not header[:1].isdigit():
+            header = header[1:] + stream.read(1)
+        if not header:
+            return
+        if len(header) < 5 or not header.isdigit():
+            raise MarcError(f"Geçersiz kayıt uzunluğu / Invalid record length: {header!r}")
+        body = stream.read(int(header) - 5)
+        yield parse_iso2709(header + body)
+
+def read_marcxml(stream):
+    """
+    MARCXML akışındaki <record> öğelerini tek tek okur
+    İşlenen öğeler hemen silinir, böylece bellek kullanımı sabit kalır
+
+    Reads <record> elements one by one from a MARCXML stream
+    Processed elements are cleared right away so memory use stays flat
+    """
+    root = None
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if root is None:
+            root = element
+        if event == 'end' and element.tag.rsplit('}', 1)[-1] == 'record':
+            yield parse_marcxml_record(element)
+            # Tamamlanan kayıtlar kök öğeden silinir
+            # Finished records are dropped from the root element
+            root.clear()
+
+def read_file(path):
+    """
+    Dosyanın biçimini (MARCXML veya ISO 2709) ilk baytlarından anlayıp kayıtları okur
+
+    Detects the file format (MARCXML or ISO 2709) from its first bytes and reads the records
+    """
+    with open(path, 'rb') as f:
+        start = f.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')
+        f.seek(0)
+        reader = read_marcxml if start.startswith(b'<') else read_iso2709
+        yield from reader(f)
@@ -0,0 +1,244 @@
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+
+from library.models import Book
+
+import marc
+from title_normalization import fold_text
+
+# Book.marc_record alanlarının indekslenmiş tablosu
+# Indexed table of Book.marc_record fields
+#
+# Her kaydın alt alanları (kontrol alanları dahil) library_marc_field
+# tablosuna ayrı satırlar olarak yazılır. (tag, code, normalized) indeksi
+# sayesinde "650$a = Roman" veya "020$a = ..." gibi süzgeçler kayıtları
+# Python'da tek tek çözmeden veritabanında yapılır. Değerler fold_text ile
+# katlanmış olarak da saklanır; aramalar büyük/küçük harf ve aksan duyarsızdır.
+# Tablo kitap kaydedildiğinde güncellenir; uygulamanın AppConfig.ready()
+# metodunda connect_signals() çağrılmalıdır.
+#
+# The subfields of each record (control fields included) are written to
+# library_marc_field as separate rows. The (tag, code, normalized) index lets
+# filters such as "650$a = Novel" or "020$a = ..." run in the database
+# instead of parsing every record in Python. Values are also stored folded
+# with fold_text, so lookups ignore case and diacritics. The table is updated
+# when a book is saved; the app's AppConfig.ready() should call
+# connect_signals().
+
+FIELD_TABLE = 'library_marc_field'
+
+# Katlanmış değerin indekslenen en fazla uzunluğu
+# Maximum indexed length of the folded value
+NORMALIZED_LENGTH = 200
+
+INDEX_CHUNK_SIZE = 1000
+
+_table_ready = False
+
+def ensure_table():
+    """
+    Alan tablosunu ve indekslerini yoksa oluşturur
+
+    Creates the field table and its indexes if missing
+    """
+    global _table_ready
+    if _table_ready:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {FIELD_TABLE} ("
+            " book_id bigint NOT NULL REFERENCES library_book (id) ON DELETE CASCADE,"
+            " position integer NOT NULL, tag varchar(3) NOT NULL,"
+            " ind1 varchar(1) NULL, ind2 varchar(1) NULL, code varchar(1) NULL,"
+            f" value text NOT NULL, normalized varchar({NORMALIZED_LENGTH}) NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {FIELD_TABLE}_lookup ON {FIELD_TABLE} (tag, code, normalized)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {FIELD_TABLE}_book ON {FIELD_TABLE} (book_id, position)")
+    _table_ready = True
+
+def normalize(value):
+    return fold_text(value).strip(' /:;,.')[:NORMALIZED_LENGTH]
+
+def record_rows(book_id, record):
+    """
+    Kaydı tabloya yazılacak satırlara çevirir: her alt alan bir satır
+
+    Converts the record to table rows: one row per subfield
+    """
+    for position, field in enumerate(record.fields):
+        if field.data is not None:
+            yield (book_id, position, field.tag, None, None, None, field.data, normalize(field.data))
+            continue
+        ind1, ind2 = field.indicators[0], field.indicators[1]
+        for code, value in field.subfields:
+            yield (book_id, position, field.tag, ind1, ind2, code, value, normalize(value))
+
+def index_records(records):
+    """
+    (book_id, Record) çiftlerini tabloya yazar; eski satırlar silinir
+    Kaydı None olan kitapların yalnızca satırları silinir
+
+    Writes (book_id, Record) pairs to the table; old rows are deleted
+    Books whose record is None only have their rows deleted
+    """
+    records = list(records)
+    if not records:
+        return
+    ensure_table()
+    remove_books([book_id for book_id, _ in records])
+    rows = [row for book_id, record in records if record is not None for row in record_rows(book_id, record)]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FIELD_TABLE} (book_id, position, tag, ind1, ind2, code, value, normalized)"
+            " VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            rows
+        )
+
+def index_books(book_ids):
+    """
+    Verilen kitapların marc_record alanlarını çözüp tabloya yazar
+    Çözülemeyen kayıtların satırları silinir
+
+    Parses the marc_record of the given books and writes them to the table
+    Rows of records that cannot be parsed are deleted
+    """
+    records = []
+    for book_id, text in Book.objects.filter(id__in=list(book_ids)).values_list('id', 'marc_record'):
+        try:
+            records.append((book_id, marc.parse_text(text)))
+        except (marc.MarcError, ValueError, SyntaxError):
+            records.append((book_id, None))
+    index_records(records)
+
+def remove_books(book_ids):
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    ensure_table()
+    with connection.cursor() as cursor:
+        placeholders = ', '.join(['%s'] * len(book_ids))
+        cursor.execute(f"DELETE FROM {FIELD_TABLE} WHERE book_id IN ({placeholders})", book_ids)
+
+def rebuild_index(chunk_size=INDEX_CHUNK_SIZE):
+    """
+    MARC kaydı olan tüm kitapları gruplar halinde yeniden indeksler
+    İndekslenen kitap sayısını döndürür
+
+    Reindexes all books that have a MARC record in chunks
+    Returns the number of books indexed
+    """
+    ensure_table()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FIELD_TABLE}")
+    books = Book.objects.exclude(marc_record__isnull=True).exclude(marc_record='') \
+        .order_by('id').values_list('id', flat=True)
+    count = 0
+    last_id = 0
+    while True:
+        book_ids = list(books.filter(id__gt=last_id)[:chunk_size])
+        if not book_ids:
+            return count
+        index_books(book_ids)
+        count += len(book_ids)
+        last_id = book_ids[-1]
+
+def _field_condition(tag, code=None, value=None, startswith=False, ind1=None, ind2=None):
+    sql = [f"SELECT book_id FROM {FIELD_TABLE} WHERE tag = %s"]
+    params = [tag]
+    if code is not None:
+        sql.append("code = %s")
+        params.append(code)
+    if value is not None:
+        folded = normalize(value)
+        if startswith:
+            # LIKE yerine aralık karşılaştırması: her iki veritabanında da indeksi kullanır
+            # A range comparison instead of LIKE: uses the index on both databases
+            sql.append("normalized >= %s AND normalized < %s")
+            params.extend([folded, folded + '\uffff'])
+        else:
+            sql.append("normalized = %s")
+            params.append(folded)
+    if ind1 is not None:
+        sql.append("ind1 = %s")
+        params.append(ind1)
+    if ind2 is not None:
+        sql.append("ind2 = %s")
+        params.append(ind2)
+    return ' AND '.join(sql), params
+
+def books_with(tag, code=None, value=None, startswith=False, ind1=None, ind2=None, queryset=None):
+    """
+    MARC alanı koşuluna uyan kitapların QuerySet'ini döndürür
+    Koşullar art arda çağrılarak birleştirilebilir:
+        books_with('650', 'a', 'Roman', queryset=books_with('041', 'a', 'tur'))
+
+    Returns a QuerySet of books matching a MARC field condition
+    Conditions combine by chaining calls:
+        books_with('650', 'a', 'Novel', queryset=books_with('041', 'a', 'tur'))
+    """
+    ensure_table()
+    sql, params = _field_condition(tag, code, value, startswith, ind1, ind2)
+    queryset = Book.objects.all() if queryset is None else queryset
+    return queryset.filter(id__in=RawSQL(sql, params))
+
+def field_values(tag, code=None, book_ids=None):
+    """
+    Alanın değerlerini {book_id: [değerler]} olarak kayıt sırasıyla döndürür
+
+    Returns the values of the field as {book_id: [values]} in record order
+    """
+    ensure_table()
+    sql = f"SELECT book_id, value FROM {FIELD_TABLE} WHERE tag = %s"
+    params = [tag]
+    if code is not None:
+        sql += " AND code = %s"
+        params.append(code)
+    if book_ids is not None:
+        book_ids = list(book_ids)
+        if not book_ids:
+            return {}
+        sql += f" AND book_id IN ({', '.join(['%s'] * len(book_ids))})"
+        params.extend(book_ids)
+    values = {}
+    with connection.cursor() as cursor:
+        cursor.execute(sql + " ORDER BY book_id, position", params)
+        for book_id, value in cursor.fetchall():
+            values.setdefault(book_id, []).append(value)
+    return values
+
+def value_counts(tag, code=None, limit=50):
+    """
+    Alanın en sık değerlerini (ör. 650$a konuları) sayılarıyla döndürür
+
+    Returns the most frequent values of the field (e.g. 650$a subjects) with their counts
+    """
+    ensure_table()
+    sql = f"SELECT MIN(value), COUNT(DISTINCT book_id) AS books FROM {FIELD_TABLE} WHERE tag = %s"
+    params = [tag]
+    if code is not None:
+        sql += " AND code = %s"
+        params.append(code)
+    sql += " GROUP BY normalized ORDER BY books DESC LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+def _book_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'marc_record' in update_fields:
+        index_books([instance.pk])
+
+def _book_deleted(sender, instance, **kwargs):
+    remove_books([instance.pk])
+
+def connect_signals():
+    """
+    Alan tablosunu güncel tutan sinyalleri bağlar
+
+    Connects the signals that keep the field table in sync
+    """
+    post_save.connect(_book_saved, sender=Book, dispatch_uid='marc_index_book_saved')
+    post_delete.connect(_book_deleted, sender=Book, dispatch_uid='marc_index_book_deleted')
@@ -0,0 +1,197 @@
+import base64
+import json
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from library.models import Book, Loan, Member
+
+# Anahtar kümesi (cursor) sayfalaması
+# Keyset (cursor) pagination
+#
+# OFFSET ile sayfalama derin sayfalarda atlanan tüm satırları okur. Burada
+# sayfa, önceki sayfanın son satırının sıralama anahtarından sonra gelen
+# satırlarla başlar: WHERE (title, id) > (:title, :id) ORDER BY title, id.
+# Sıralama anahtarı eşleşen bir indeksle desteklendiğinde (circulation_indexes.py)
+# 5000. sayfa da ilk sayfa kadar ucuzdur. Sıralama her zaman benzersiz bir
+# alanla (id) biter, böylece eşit başlıklar atlanmaz veya tekrarlanmaz.
+#
+# OFFSET paging reads every skipped row on deep pages. Here a page starts
+# after the sort key of the previous page's last row:
+# WHERE (title, id) > (:title, :id) ORDER BY title, id. With a matching index
+# (circulation_indexes.py) page 5,000 costs the same as page 1. The ordering
+# always ends with a unique field (id) so equal titles are neither skipped
+# nor repeated.
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 200
+
+BOOK_ORDERING = ('title', 'id')
+LOAN_ORDERING = ('-loan_date', '-id')
+MEMBER_ORDERING = ('id',)
+
+Page = namedtuple('Page', ['items', 'next_cursor', 'previous_cursor'])
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(values, backwards=False):
+    """
+    Sıralama anahtarı değerlerini URL'de taşınabilen bir metne dönüştürür
+
+    Encodes the sort key values as a URL-safe string
+    """
+    data = json.dumps({'v': list(values), 'b': backwards}, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, size):
+    """
+    encode_cursor() ile üretilen metni (değerler, geriye mi) olarak çözer
+    Bozuk veya farklı sıralamaya ait cursor için InvalidCursor fırlatır
+
+    Decodes a string made by encode_cursor() into (values, backwards)
+    Raises InvalidCursor for a malformed cursor or one from another ordering
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        values, backwards = data['v'], bool(data['b'])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values, backwards
+
+def _sort_value(item, field):
+    return item[field] if isinstance(item, dict) else getattr(item, field)
+
+def _after(ordering, values, backwards):
+    # (a, b) > (x, y) karşılaştırmasını tüm veritabanlarında çalışan koşullara
+    # açar: a >= x AND (a > x OR (a = x AND b > y)). Baştaki a >= x sınırı
+    # olmadan OR koşulu indeks aralığına çevrilemez ve tüm indeks taranır.
+    # Expands (a, b) > (x, y) into conditions every database supports:
+    # a >= x AND (a > x OR (a = x AND b > y)). Without the leading a >= x
+    # bound the OR cannot become an index range and the whole index is scanned.
+    condition = Q()
+    for position, field in enumerate(ordering):
+        name = field.lstrip('-')
+        ascending = not field.startswith('-')
+        lookup = 'gt' if ascending != backwards else 'lt'
+        term = Q(**{f'{name}__{lookup}': values[position]})
+        for previous, value in zip(ordering[:position], values):
+            term &= Q(**{previous.lstrip('-'): value})
+        condition |= term
+    if len(ordering) > 1:
+        name = ordering[0].lstrip('-')
+        lookup = 'gte' if ordering[0].startswith('-') == backwards else 'lte'
+        condition = Q(**{f'{name}__{lookup}': values[0]}) & condition
+    return condition
+
+def _reverse(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+def page_queryset(queryset, ordering, values=None, backwards=False, limit=PAGE_SIZE):
+    """
+    Verilen anahtardan sonra (geriye doğru ise önce) gelen bir fazla satırlık
+    sıralı QuerySet'i döndürür; EXPLAIN ile indeks denetimi için de kullanılır
+
+    Returns the ordered QuerySet of limit + 1 rows after (or, backwards, before)
+    the given key; also used to check index usage with EXPLAIN
+    """
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values, backwards))
+    # Bir fazla satır okunarak sonraki sayfanın varlığı COUNT olmadan anlaşılır
+    # One extra row tells whether there is another page without a COUNT
+    return queryset.order_by(*(_reverse(ordering) if backwards else ordering))[:limit + 1]
+
+def keyset_page(queryset, ordering, cursor=None, limit=PAGE_SIZE):
+    """
+    Sıralı QuerySet'in bir sayfasını cursor'a göre döndürür
+    ordering benzersiz bir alanla bitmelidir (ör. ('title', 'id')).
+    Sonraki veya önceki sayfa yoksa ilgili cursor None olur
+
+    Returns one page of the ordered QuerySet starting at the cursor
+    ordering must end with a unique field (e.g. ('title', 'id')).
+    The next or previous cursor is None when there is no such page
+    """
+    ordering = list(ordering)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    values, backwards = decode_cursor(cursor, len(ordering)) if cursor else (None, False)
+
+    rows = list(page_queryset(queryset, ordering, values, backwards, limit))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return Page([], None, None)
+
+    first = [_sort_value(rows[0], field.lstrip('-')) for field in ordering]
+    last = [_sort_value(rows[-1], field.lstrip('-')) for field in ordering]
+    if backwards:
+        next_cursor = encode_cursor(last)
+        previous_cursor = encode_cursor(first, backwards=True) if has_more else None
+    else:
+        next_cursor = encode_cursor(last) if has_more else None
+        previous_cursor = encode_cursor(first, backwards=True) if cursor else None
+    return Page(rows, next_cursor, previous_cursor)
+
+def book_page(cursor=None, limit=PAGE_SIZE, queryset=None):
+    """
+    Kitap listesini (başlık, id) sırasıyla sayfalar
+
+    Pages the book list in (title, id) order
+    """
+    if queryset is None:
+        queryset = Book.objects.select_related('category')
+    return keyset_page(queryset, BOOK_ORDERING, cursor, limit)
+
+def member_loans_page(member_id, cursor=None, limit=PAGE_SIZE):
+    """
+    Üyenin ödünç geçmişini en yeniden eskiye (loan_date, id) sırasıyla sayfalar
+
+    Pages the member's loan history newest first, in (loan_date, id) order
+    """
+    queryset = Loan.objects.filter(member_id=member_id).select_related('book')
+    return keyset_page(queryset, LOAN_ORDERING, cursor, limit)
+
+def loan_page(cursor=None, limit=PAGE_SIZE, queryset=None):
+    """
+    Tüm ödünç geçmişini en yeniden eskiye (loan_date, id) sırasıyla sayfalar
+
+    Pages the whole loan history newest first, in (loan_date, id) order
+    """
+    if queryset is None:
+        queryset = Loan.objects.select_related('book', 'member__user')
+    return keyset_page(queryset, LOAN_ORDERING, cursor, limit)
+
+def member_page(cursor=None, limit=PAGE_SIZE, queryset=None):
+    """
+    Üye listesini id sırasıyla sayfalar
+
+    Pages the member list in id order
+    """
+    if queryset is None:
+        queryset = Member.objects.select_related('user')
+    return keyset_page(queryset, MEMBER_ORDERING, cursor, limit)
+
+def page_from_request(request, queryset, ordering, limit=PAGE_SIZE):
+    """
+    ?cursor= ve ?limit= parametrelerini okuyarak sayfayı döndürür
+    Görünümler ve yönetim paneli listeleri için kısayol
+    Bozuk veya eskimiş cursor hata yerine ilk sayfaya döner
+
+    Returns the page for the ?cursor= and ?limit= parameters
+    Shortcut for views and admin listings
+    A malformed or stale cursor falls back to the first page instead of an error
+    """
+    try:
+        limit = int(request.GET.get('limit', limit))
+    except ValueError:
+        pass
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    try:
+        return keyset_page(queryset, ordering, request.GET.get('cursor'), limit)
+    except InvalidCursor:
+        return keyset_page(queryset, ordering, None, limit)
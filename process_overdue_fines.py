@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import argparse
+import django
+from decimal import Decimal
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from django.db import transaction
+from django.utils import timezone
+
+from library.models import Fine, Loan, SystemSetting
+
+import system_settings
+
+# Gecelik gecikme ve ceza hesaplama
+# Nightly overdue and fine processing
+#
+# İade edilmemiş ve son teslim tarihi geçmiş ödünçler id sırasıyla gruplar
+# halinde işlenir: durumları "overdue" yapılır ve ödenmemiş cezaları
+# (gecikme günü x günlük ceza) toplu olarak oluşturulur veya güncellenir.
+# Her grup kendi kısa işleminde çalışır. Süre sınırı aşılırsa kalınan yer
+# library_systemsetting tablosuna kaydedilir ve sonraki çalıştırma oradan devam eder.
+#
+# Unreturned loans past their due date are processed in id order in chunks:
+# their status is set to "overdue" and their unpaid fines (days overdue x
+# daily rate) are created or updated in bulk. Each chunk runs in its own short
+# transaction. If the time budget runs out the position is saved in
+# library_systemsetting and the next run resumes from there.
+
+CHUNK_SIZE = 1000
+DEFAULT_TIME_BUDGET = 60
+
+FINE_RATE_SETTING = 'fine_per_day'
+DEFAULT_FINE_RATE = Decimal('1.00')
+CHECKPOINT_SETTING = 'overdue_fines_checkpoint'
+
+def get_fine_rate():
+    """
+    Günlük ceza tutarını ayar anlık görüntüsünden okur
+
+    Reads the daily fine rate from the settings snapshot
+    """
+    return system_settings.get_decimal(FINE_RATE_SETTING, DEFAULT_FINE_RATE)
+
+def load_checkpoint(today):
+    """
+    Bugünkü çalıştırmanın kaldığı yeri döndürür: (son loan id, tamamlandı mı)
+
+    Returns where today's run stopped: (last loan id, completed)
+    """
+    value = SystemSetting.objects.filter(key=CHECKPOINT_SETTING).values_list('value', flat=True).first()
+    checkpoint = json.loads(value) if value else {}
+    if checkpoint.get('date') != today.isoformat():
+        return 0, False
+    return checkpoint.get('last_loan_id', 0), checkpoint.get('completed', False)
+
+def save_checkpoint(today, last_loan_id, completed):
+    SystemSetting.objects.update_or_create(
+        key=CHECKPOINT_SETTING,
+        defaults={'value': json.dumps({
+            'date': today.isoformat(),
+            'last_loan_id': last_loan_id,
+            'completed': completed,
+        })}
+    )
+
+def process_chunk(loans, today, rate):
+    """
+    Bir grup gecikmiş ödüncü işler: durumu günceller ve cezaları toplu yazar
+    Ödenmiş cezalara dokunulmaz. Güncellenen ceza sayısını döndürür
+
+    Processes a chunk of overdue loans: updates status and writes fines in bulk
+    Paid fines are left untouched. Returns the number of fines written
+    """
+    loan_ids = [loan_id for loan_id, _ in loans]
+    with transaction.atomic():
+        Loan.objects.filter(id__in=loan_ids, status='active').update(status='overdue')
+
+        paid = set(Fine.objects.filter(loan_id__in=loan_ids, paid=True).values_list('loan_id', flat=True))
+        fines = [
+            Fine(loan_id=loan_id, amount=rate * (today - due_date).days, paid=False)
+            for loan_id, due_date in loans if loan_id not in paid
+        ]
+        Fine.objects.bulk_create(
+            fines, batch_size=CHUNK_SIZE,
+            update_conflicts=True, unique_fields=['loan'], update_fields=['amount']
+        )
+    return len(fines)
+
+def main(time_budget=DEFAULT_TIME_BUDGET, chunk_size=CHUNK_SIZE):
+    """
+    Ana fonksiyon
+    Gecikmiş ödünçleri süre sınırı içinde işler, kalan iş için kaldığı yeri kaydeder
+
+    Main function
+    Processes overdue loans within the time budget, saving its position for the rest
+    """
+    started = time.monotonic()
+    today = timezone.localdate()
+    rate = get_fine_rate()
+    last_loan_id, completed = load_checkpoint(today)
+
+    if completed:
+        print(f"{today} için gecikme işlemi zaten tamamlandı.")
+        return
+
+    print(f"Günlük ceza: {rate}. {last_loan_id} numaralı ödünçten sonrası işlenecek.")
+    loan_count = 0
+    fine_count = 0
+
+    while True:
+        loans = list(
+            Loan.objects.filter(
+                id__gt=last_loan_id, return_date__isnull=True,
+                status__in=['active', 'overdue'], due_date__lt=today
+            ).order_by('id').values_list('id', 'due_date')[:chunk_size]
+        )
+        if not loans:
+            save_checkpoint(today, last_loan_id, True)
+            print(f"\nToplam {loan_count} gecikmiş ödünç işlendi, {fine_count} ceza yazıldı. İşlem tamamlandı.")
+            return
+
+        fine_count += process_chunk(loans, today, rate)
+        loan_count += len(loans)
+        last_loan_id = loans[-1][0]
+        save_checkpoint(today, last_loan_id, False)
+
+        if time.monotonic() - started > time_budget:
+            print(f"\nSüre sınırı doldu: {loan_count} ödünç işlendi, {fine_count} ceza yazıldı. "
+                  f"Sonraki çalıştırma {last_loan_id} numaralı ödünçten devam edecek.")
+            return
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gecikmiş ödünçleri ve cezaları işle / Process overdue loans and fines")
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help="En fazla çalışma süresi (saniye) / Maximum run time (seconds)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="Tek seferde işlenecek ödünç sayısı / Loans processed at once")
+    args = parser.parse_args()
+    main(time_budget=args.time_budget, chunk_size=args.chunk_size)
@@ -0,0 +1,19 @@
+import os
+import django
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+import reservations
+
+# Süresi dolan rezervasyonları kapat, kopyaları sıradakilere ayır
+# Close expired reservations, hold the copies for the next members
+expired, held = reservations.expire_reservations()
+print(f"{expired} rezervasyonun süresi doldu, {held} kopya sıradaki üyelere ayrıldı.")
+
+# Hazır rezervasyonların bildirimlerini toplu gönder
+# Send notifications for ready reservations in batches
+sent = reservations.send_notifications()
+print(f"{sent} rezervasyon bildirimi gönderildi.")
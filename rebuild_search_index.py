@@ -0,0 +1,16 @@
+import os
+import time
+import django
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+import catalog_search
+
+# Arama indeksini sıfırdan oluştur
+# Rebuild the search index from scratch
+started = time.monotonic()
+count = catalog_search.rebuild_index()
+print(f"Arama indeksi oluşturuldu: {count} kitap, {time.monotonic() - started:.1f} saniye.")
@@ -0,0 +1,265 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from library.models import Loan, SystemSetting
+
+import sqlite_tuning
+
+# Raporlar için günlük özet tabloları
+# Daily aggregate tables for reports
+#
+# Ödünç ve ceza tabloları her raporda yeniden taranmaz. Günlük özetler
+# (kategori başına günlük ödünç/iade, günlük tahsil edilen ceza, kitap başına
+# günlük ödünç) ayrı tablolarda tutulur ve yalnızca son yenilemeden bu yana
+# değişen günler yeniden hesaplanır. Raporlar bu küçük tablolardan
+# okunduğu için pano raporları milisaniyeler içinde döner.
+#
+# Loan and fine tables are not rescanned for every report. Daily aggregates
+# (loans/returns per day per category, fines collected per day, loans per day
+# per book) are kept in separate tables and only the days changed since the
+# last refresh are recomputed. Reports read these small tables, so dashboard
+# reports return in milliseconds.
+
+CIRCULATION_TABLE = 'library_stats_daily_circulation'
+FINES_TABLE = 'library_stats_daily_fines'
+TITLES_TABLE = 'library_stats_daily_titles'
+
+REFRESHED_SETTING = 'report_aggregates_refreshed_on'
+
+# Geç kaydedilen iade ve ödemeler için son yenilemeden önceki kaç gün yeniden hesaplanır
+# Days before the last refresh that are recomputed to catch late returns and payments
+OVERLAP_DAYS = 1
+
+# Tam yeniden hesaplamada tek işlemde işlenecek gün sayısı
+# Days processed in one transaction during a full rebuild
+REFRESH_CHUNK_DAYS = 31
+
+DEFAULT_PERIOD_DAYS = 30
+TOP_TITLES_LIMIT = 10
+
+# Kategorisi olmayan kitaplar özetlerde 0 kategorisiyle tutulur
+# Books without a category are kept under category 0 in the aggregates
+NO_CATEGORY = 0
+
+TABLES = [
+    f"CREATE TABLE IF NOT EXISTS {CIRCULATION_TABLE} ("
+    " day date NOT NULL, category_id bigint NOT NULL,"
+    " loans integer NOT NULL, returns integer NOT NULL,"
+    " PRIMARY KEY (day, category_id))",
+    f"CREATE TABLE IF NOT EXISTS {FINES_TABLE} ("
+    " day date NOT NULL PRIMARY KEY,"
+    " fines_paid integer NOT NULL, amount_collected decimal NOT NULL)",
+    f"CREATE TABLE IF NOT EXISTS {TITLES_TABLE} ("
+    " day date NOT NULL, book_id bigint NOT NULL, loans integer NOT NULL,"
+    " PRIMARY KEY (day, book_id))",
+]
+
+_tables_ready = False
+
+def ensure_tables():
+    """
+    Özet tablolarını yoksa oluşturur
+
+    Creates the aggregate tables if missing
+    """
+    global _tables_ready
+    if _tables_ready:
+        return
+    with connection.cursor() as cursor:
+        for sql in TABLES:
+            cursor.execute(sql)
+    _tables_ready = True
+
+def _refresh_days(cursor, start, end):
+    cursor.execute(f"DELETE FROM {CIRCULATION_TABLE} WHERE day BETWEEN %s AND %s", [start, end])
+    cursor.execute(
+        f"INSERT INTO {CIRCULATION_TABLE} (day, category_id, loans, returns)"
+        " SELECT day, category_id, SUM(loans), SUM(returns) FROM ("
+        f"  SELECT l.loan_date AS day, COALESCE(b.category_id, {NO_CATEGORY}) AS category_id,"
+        "   1 AS loans, 0 AS returns"
+        "  FROM library_loan l JOIN library_book b ON b.id = l.book_id"
+        "  WHERE l.loan_date BETWEEN %s AND %s"
+        "  UNION ALL"
+        f"  SELECT l.return_date, COALESCE(b.category_id, {NO_CATEGORY}), 0, 1"
+        "  FROM library_loan l JOIN library_book b ON b.id = l.book_id"
+        "  WHERE l.return_date BETWEEN %s AND %s"
+        " ) events GROUP BY day, category_id",
+        [start, end, start, end]
+    )
+
+    cursor.execute(f"DELETE FROM {FINES_TABLE} WHERE day BETWEEN %s AND %s", [start, end])
+    cursor.execute(
+        f"INSERT INTO {FINES_TABLE} (day, fines_paid, amount_collected)"
+        " SELECT payment_date, COUNT(*), SUM(amount) FROM library_fine"
+        " WHERE paid AND payment_date BETWEEN %s AND %s GROUP BY payment_date",
+        [start, end]
+    )
+
+    cursor.execute(f"DELETE FROM {TITLES_TABLE} WHERE day BETWEEN %s AND %s", [start, end])
+    cursor.execute(
+        f"INSERT INTO {TITLES_TABLE} (day, book_id, loans)"
+        " SELECT loan_date, book_id, COUNT(*) FROM library_loan"
+        " WHERE loan_date BETWEEN %s AND %s GROUP BY loan_date, book_id",
+        [start, end]
+    )
+
+def last_refreshed():
+    value = SystemSetting.objects.filter(key=REFRESHED_SETTING).values_list('value', flat=True).first()
+    return date.fromisoformat(value) if value else None
+
+def refresh(since=None):
+    """
+    Son yenilemeden (veya verilen tarihten) bugüne kadarki günlerin özetlerini yeniden hesaplar
+    Hiç yenileme yapılmadıysa tüm geçmiş hesaplanır. Yenilenen gün sayısını döndürür
+
+    Recomputes the aggregates for the days from the last refresh (or the given date) to today
+    If there was never a refresh the whole history is computed. Returns the number of days refreshed
+    """
+    ensure_tables()
+    today = timezone.localdate()
+    if since is None:
+        refreshed = last_refreshed()
+        if refreshed is not None:
+            since = refreshed - timedelta(days=OVERLAP_DAYS)
+        else:
+            since = Loan.objects.aggregate(first=Min('loan_date'))['first'] or today
+
+    start = since
+    while start <= today:
+        end = min(start + timedelta(days=REFRESH_CHUNK_DAYS - 1), today)
+        with transaction.atomic(), connection.cursor() as cursor:
+            _refresh_days(cursor, start, end)
+        start = end + timedelta(days=1)
+
+    SystemSetting.objects.update_or_create(key=REFRESHED_SETTING, defaults={'value': today.isoformat()})
+    return (today - since).days + 1
+
+def _rows(sql, params):
+    # Okumalar tanımlıysa salt okunur raporlama bağlantısından yapılır
+    # Reads go through the read-only reporting connection when one is defined
+    ensure_tables()
+    with sqlite_tuning.reporting_connection().cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def _day(value):
+    # SQLite tarihleri metin olarak döndürür
+    # SQLite returns dates as text
+    return value if isinstance(value, str) else value.isoformat()
+
+def _money(value):
+    return str(Decimal(str(value or 0)).quantize(Decimal('0.01')))
+
+def loans_per_day(start, end, category_id=None):
+    """
+    Günlük ödünç ve iade sayıları, kategoriye göre
+
+    Daily loan and return counts by category
+    """
+    sql = (
+        f"SELECT s.day, s.category_id, c.name AS category, s.loans, s.returns"
+        f" FROM {CIRCULATION_TABLE} s LEFT JOIN library_category c ON c.id = s.category_id"
+        " WHERE s.day BETWEEN %s AND %s"
+    )
+    params = [start, end]
+    if category_id is not None:
+        sql += " AND s.category_id = %s"
+        params.append(category_id)
+    rows = _rows(sql + " ORDER BY s.day, s.category_id", params)
+    for row in rows:
+        row['day'] = _day(row['day'])
+    return rows
+
+def fines_collected(start, end):
+    """
+    Günlük tahsil edilen ceza sayısı ve tutarı
+
+    Number and amount of fines collected per day
+    """
+    rows = _rows(
+        f"SELECT day, fines_paid, amount_collected FROM {FINES_TABLE}"
+        " WHERE day BETWEEN %s AND %s ORDER BY day",
+        [start, end]
+    )
+    for row in rows:
+        row['day'] = _day(row['day'])
+        row['amount_collected'] = _money(row['amount_collected'])
+    return rows
+
+def top_titles(start, end, limit=TOP_TITLES_LIMIT):
+    """
+    Dönem içinde en çok ödünç alınan kitaplar
+
+    Most borrowed books in the period
+    """
+    return _rows(
+        f"SELECT s.book_id, b.title, SUM(s.loans) AS loans FROM {TITLES_TABLE} s"
+        " JOIN library_book b ON b.id = s.book_id"
+        " WHERE s.day BETWEEN %s AND %s"
+        " GROUP BY s.book_id, b.title ORDER BY loans DESC, s.book_id LIMIT %s",
+        [start, end, limit]
+    )
+
+def dashboard(start, end):
+    """
+    Pano özeti: toplam ödünç, iade, tahsil edilen ceza ve en çok okunanlar
+
+    Dashboard summary: total loans, returns, fines collected and top titles
+    """
+    totals = _rows(
+        f"SELECT COALESCE(SUM(loans), 0) AS loans, COALESCE(SUM(returns), 0) AS returns"
+        f" FROM {CIRCULATION_TABLE} WHERE day BETWEEN %s AND %s",
+        [start, end]
+    )[0]
+    fines = _rows(
+        f"SELECT COALESCE(SUM(fines_paid), 0) AS fines_paid, SUM(amount_collected) AS amount_collected"
+        f" FROM {FINES_TABLE} WHERE day BETWEEN %s AND %s",
+        [start, end]
+    )[0]
+    return {
+        'loans': totals['loans'],
+        'returns': totals['returns'],
+        'fines_paid': fines['fines_paid'],
+        'amount_collected': _money(fines['amount_collected']),
+        'top_titles': top_titles(start, end, limit=5),
+    }
+
+# Rapor türleri ve özetlerden yanıt veren fonksiyonlar
+# Report types and the functions that answer them from the aggregates
+REPORT_TYPES = {
+    'daily_loans': lambda start, end, params: loans_per_day(start, end, params.get('category_id')),
+    'fines_collected': lambda start, end, params: fines_collected(start, end),
+    'top_titles': lambda start, end, params: top_titles(start, end, params.get('limit', TOP_TITLES_LIMIT)),
+    'dashboard': lambda start, end, params: dashboard(start, end),
+}
+
+def run_report(report_type, parameters=None):
+    """
+    Raporu özet tablolarından hesaplar
+    parameters: {'start': 'YYYY-MM-DD', 'end': 'YYYY-MM-DD', ...}; varsayılan son 30 gün
+    Bilinmeyen rapor türü için ValueError fırlatır
+
+    Computes the report from the aggregate tables
+    parameters: {'start': 'YYYY-MM-DD', 'end': 'YYYY-MM-DD', ...}; defaults to the last 30 days
+    Raises ValueError for an unknown report type
+    """
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f"Bilinmeyen rapor türü / Unknown report type: {report_type}")
+    if isinstance(parameters, str):
+        parameters = json.loads(parameters)
+    parameters = parameters or {}
+
+    end = date.fromisoformat(parameters['end']) if parameters.get('end') else timezone.localdate()
+    start = date.fromisoformat(parameters['start']) if parameters.get('start') \
+        else end - timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'data': REPORT_TYPES[report_type](start, end, parameters),
+    }
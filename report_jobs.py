@@ -0,0 +1,193 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from library.models import Report
+
+import report_aggregates
+from db_utils import retry_on_contention
+
+# Veritabanı tabanlı rapor iş kuyruğu
+# Database-backed report job queue
+#
+# submit() bir Report kaydı ve kuyrukta bekleyen bir iş oluşturur ve hemen
+# döner. report_worker.py içindeki işçiler işleri koşullu UPDATE ile sırayla
+# sahiplenir (PostgreSQL'de FOR UPDATE SKIP LOCKED), raporu özet tablolarından
+# hesaplar ve sonucu Report.result_data alanına yazar. Harici bir kuyruk
+# sunucusu gerekmez.
+#
+# submit() creates a Report row and a queued job and returns at once. Workers
+# in report_worker.py claim jobs in order with a conditional UPDATE (FOR UPDATE
+# SKIP LOCKED on PostgreSQL), compute the report from the aggregate tables and
+# write the result to Report.result_data. No external queue server is needed.
+#
+# Başarısız bir iş RETRY_BACKOFF * 2^(deneme - 1) süre sonra (run_after)
+# yeniden denenir; MAX_ATTEMPTS denemeden sonra "failed" olur. Böylece hep
+# hata veren bir iş işçiyi meşgul bir döngüye sokmaz.
+#
+# A failed job is retried after RETRY_BACKOFF * 2^(attempt - 1) (run_after)
+# and becomes "failed" after MAX_ATTEMPTS attempts, so a job that always
+# fails cannot spin a worker in a busy loop.
+
+JOB_TABLE = 'library_report_job'
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+MAX_ATTEMPTS = 3
+# İlk yeniden denemeden önceki bekleme; her denemede iki katına çıkar
+# Delay before the first retry; doubled on every attempt
+RETRY_BACKOFF = timedelta(minutes=1)
+
+# Bu süreden uzun "running" kalan işler çökmüş bir işçiye ait sayılır
+# Jobs left "running" longer than this are taken to belong to a crashed worker
+STALE_AFTER = timedelta(minutes=15)
+
+_table_ready = False
+
+def ensure_table():
+    """
+    İş tablosunu yoksa oluşturur
+
+    Creates the job table if missing
+    """
+    global _table_ready
+    if _table_ready:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {JOB_TABLE} ("
+            " report_id bigint NOT NULL PRIMARY KEY REFERENCES library_report (id) ON DELETE CASCADE,"
+            " status varchar(10) NOT NULL, attempts integer NOT NULL DEFAULT 0,"
+            " worker varchar(100) NULL, error text NULL,"
+            " queued_at timestamp NOT NULL, started_at timestamp NULL, finished_at timestamp NULL,"
+            " run_after timestamp NULL)"
+        )
+        # Bu sütundan önce oluşturulmuş tablolara eklenir
+        # Added to tables created before this column existed
+        columns = [column.name for column in connection.introspection.get_table_description(cursor, JOB_TABLE)]
+        if 'run_after' not in columns:
+            cursor.execute(f"ALTER TABLE {JOB_TABLE} ADD COLUMN run_after timestamp NULL")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {JOB_TABLE}_status ON {JOB_TABLE} (status, report_id)")
+    _table_ready = True
+
+def submit(report_type, parameters=None, title=None, description=None, user=None):
+    """
+    Raporu arka planda hesaplanmak üzere kuyruğa ekler ve Report kaydını döndürür
+    Bilinmeyen rapor türü için ValueError fırlatır
+
+    Queues the report to be computed in the background and returns the Report
+    Raises ValueError for an unknown report type
+    """
+    if report_type not in report_aggregates.REPORT_TYPES:
+        raise ValueError(f"Bilinmeyen rapor türü / Unknown report type: {report_type}")
+    ensure_table()
+    with transaction.atomic():
+        report = Report.objects.create(
+            title=title or report_type, report_type=report_type, description=description,
+            parameters=parameters or {}, created_by=user, created_at=timezone.now()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {JOB_TABLE} (report_id, status, attempts, queued_at) VALUES (%s, %s, 0, %s)",
+                [report.id, QUEUED, timezone.now()]
+            )
+    return report
+
+def status(report_id):
+    """
+    İşin durumunu döndürür: (durum, hata) veya iş yoksa None
+
+    Returns the job's state: (status, error), or None if there is no job
+    """
+    ensure_table()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT status, error FROM {JOB_TABLE} WHERE report_id = %s", [report_id])
+        return cursor.fetchone()
+
+@retry_on_contention
+def claim(worker):
+    """
+    Kuyruktaki, bekleme süresi dolmuş en eski işi bu işçi adına sahiplenir ve
+    report_id döndürür. Bekleyen iş yoksa None döndürür
+
+    Claims the oldest queued job whose retry delay has passed for this worker
+    and returns its report_id. Returns None if no job is waiting
+    """
+    ensure_table()
+    lock = " FOR UPDATE SKIP LOCKED" if connection.vendor == 'postgresql' else ""
+    now = timezone.now()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {JOB_TABLE} SET status = %s, worker = %s, started_at = %s, attempts = attempts + 1"
+            f" WHERE report_id = (SELECT report_id FROM {JOB_TABLE} WHERE status = %s"
+            f"  AND (run_after IS NULL OR run_after <= %s) ORDER BY report_id LIMIT 1{lock})"
+            " AND status = %s RETURNING report_id",
+            [RUNNING, worker, now, QUEUED, now, QUEUED]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+@retry_on_contention
+def _finish(report_id, status, error=None, run_after=None):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {JOB_TABLE} SET status = %s, error = %s, finished_at = %s, run_after = %s"
+            " WHERE report_id = %s",
+            [status, error, timezone.now(), run_after, report_id]
+        )
+
+def _retry_delay(attempts):
+    return RETRY_BACKOFF * 2 ** max(0, attempts - 1)
+
+def execute(report_id):
+    """
+    Sahiplenilen işi çalıştırır ve sonucu Report kaydına yazar
+    Hata olursa iş MAX_ATTEMPTS denemeye kadar artan bekleme süresiyle yeniden
+    kuyruğa alınır, sonra "failed" olur
+
+    Runs a claimed job and writes the result to the Report
+    On error the job is queued again with a growing delay up to MAX_ATTEMPTS
+    attempts, then marked "failed"
+    """
+    try:
+        report = Report.objects.get(id=report_id)
+        report.result_data = report_aggregates.run_report(report.report_type, report.parameters)
+        report.save(update_fields=['result_data'])
+    except Exception as e:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT attempts FROM {JOB_TABLE} WHERE report_id = %s", [report_id])
+            row = cursor.fetchone()
+        if row and row[0] < MAX_ATTEMPTS:
+            _finish(report_id, QUEUED, str(e), timezone.now() + _retry_delay(row[0]))
+        else:
+            _finish(report_id, FAILED, str(e))
+        return False
+    _finish(report_id, DONE)
+    return True
+
+def requeue_stale():
+    """
+    Çökmüş işçilerden kalan işleri yeniden kuyruğa alır, sayısını döndürür
+    MAX_ATTEMPTS denemeyi dolduran işler (ör. işçiyi çökerten bir iş) "failed" olur
+
+    Queues jobs left behind by crashed workers again, returns their number
+    Jobs that used up MAX_ATTEMPTS (e.g. one that crashes its worker) become "failed"
+    """
+    ensure_table()
+    stale_before = timezone.now() - STALE_AFTER
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {JOB_TABLE} SET status = %s, worker = NULL, finished_at = %s, error = %s"
+            " WHERE status = %s AND started_at < %s AND attempts >= %s",
+            [FAILED, timezone.now(), "İşçi yanıt vermedi / Worker stopped responding",
+             RUNNING, stale_before, MAX_ATTEMPTS]
+        )
+        cursor.execute(
+            f"UPDATE {JOB_TABLE} SET status = %s, worker = NULL WHERE status = %s AND started_at < %s",
+            [QUEUED, RUNNING, stale_before]
+        )
+        return cursor.rowcount
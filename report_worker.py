@@ -0,0 +1,123 @@
+import os
+import time
+import socket
+import argparse
+import threading
+import django
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from django.db import connections
+from django.utils.dateparse import parse_date
+
+import report_aggregates
+import report_jobs
+
+# Rapor işçileri ve özet tablolarının yenilenmesi
+# Report workers and aggregate table refresh
+#
+#   python report_worker.py                sürekli çalış / run continuously
+#   python report_worker.py --once         kuyruğu boşalt ve çık / drain the queue and exit
+#   python report_worker.py --rebuild-since 2024-01-01
+#
+# Ana iş parçacığı özet tablolarını REFRESH_INTERVAL saniyede bir yeniler;
+# işçi iş parçacıkları kuyruktaki raporları hesaplar. Her iş parçacığı kendi
+# veritabanı bağlantısını kullanır.
+#
+# The main thread refreshes the aggregate tables every REFRESH_INTERVAL
+# seconds; worker threads compute queued reports. Each thread uses its own
+# database connection.
+
+WORKERS = 2
+POLL_INTERVAL = 1.0
+REFRESH_INTERVAL = 60
+# Çökmüş işçilerden kalan işlerin aranma aralığı (saniye)
+# How often jobs left by crashed workers are looked for (seconds)
+REQUEUE_INTERVAL = 60
+
+def worker_loop(name, stop, once):
+    """
+    Kuyruk boşalana (once) veya durdurulana kadar işleri sahiplenip çalıştırır
+    Çalıştırılan iş sayısını döndürür
+
+    Claims and runs jobs until the queue is empty (once) or it is stopped
+    Returns the number of jobs run
+    """
+    count = 0
+    requeued_at = time.monotonic()
+    try:
+        while not stop.is_set():
+            # Yeniden başlatılmayı beklemeden çökmüş işçilerin işleri devralınır
+            # Jobs of crashed workers are picked up without waiting for a restart
+            if time.monotonic() - requeued_at >= REQUEUE_INTERVAL:
+                requeued_at = time.monotonic()
+                stale = report_jobs.requeue_stale()
+                if stale:
+                    print(f"  [{name}] {stale} yarım kalmış iş yeniden kuyruğa alındı.")
+            report_id = report_jobs.claim(name)
+            if report_id is None:
+                if once:
+                    break
+                stop.wait(POLL_INTERVAL)
+                continue
+            ok = report_jobs.execute(report_id)
+            count += 1
+            print(f"  [{name}] Rapor {report_id}: {'tamamlandı' if ok else 'hata'}")
+    finally:
+        connections.close_all()
+    return count
+
+def main(workers=WORKERS, once=False, rebuild_since=None, refresh_interval=REFRESH_INTERVAL):
+    """
+    Ana fonksiyon
+    Özetleri yeniler ve işçi iş parçacıklarını başlatır
+
+    Main function
+    Refreshes the aggregates and starts the worker threads
+    """
+    days = report_aggregates.refresh(since=rebuild_since)
+    print(f"Özet tabloları yenilendi: {days} gün.")
+    stale = report_jobs.requeue_stale()
+    if stale:
+        print(f"{stale} yarım kalmış iş yeniden kuyruğa alındı.")
+
+    stop = threading.Event()
+    host = socket.gethostname()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(worker_loop, f"{host}:{os.getpid()}:{i}", stop, once)
+            for i in range(workers)
+        ]
+        try:
+            if once:
+                # İşçiler kuyruk boşalınca kendiliğinden çıkar; durdurma yalnızca bundan sonra
+                # Workers exit on their own once the queue is empty; stop only after that
+                wait(futures)
+            while not once:
+                time.sleep(refresh_interval)
+                report_aggregates.refresh()
+        except KeyboardInterrupt:
+            print("\nDurduruluyor...")
+        finally:
+            stop.set()
+        total = sum(future.result() for future in futures)
+    print(f"Toplam {total} rapor işlendi.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rapor işçilerini çalıştır / Run report workers")
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help="Eşzamanlı işçi sayısı / Number of concurrent workers")
+    parser.add_argument('--once', action='store_true',
+                        help="Kuyruğu boşalt ve çık / Drain the queue and exit")
+    parser.add_argument('--rebuild-since', type=parse_date, default=None,
+                        help="Özetleri bu tarihten itibaren yeniden hesapla (YYYY-MM-DD) / "
+                             "Recompute aggregates from this date (YYYY-MM-DD)")
+    parser.add_argument('--refresh-interval', type=float, default=REFRESH_INTERVAL,
+                        help="Özet yenileme aralığı (saniye) / Aggregate refresh interval (seconds)")
+    args = parser.parse_args()
+    main(workers=args.workers, once=args.once, rebuild_since=args.rebuild_since,
+         refresh_interval=args.refresh_interval)
@@ -0,0 +1,202 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from library.models import Book, Reservation
+
+from circulation_signals import availability_changed
+
+# Kitap başına rezervasyon kuyruğu
+# Per-book reservation queue
+#
+# Bekleyen rezervasyonlar (book_id, status, reservation_date) indeksi üzerinden
+# ilk gelen ilk alır sırasıyla okunur; sıradaki rezervasyonu bulmak tek bir
+# indeks aramasıdır. İade edilen kopya sıradaki üyeye ayrılır (status="ready")
+# ve HOLD_DAYS gün bekletilir. Bildirimler Django e-posta altyapısıyla toplu
+# gönderilir; EMAIL_BACKEND ayarıyla konsol veya dosya arka ucu seçilebilir.
+#
+# Pending reservations are read first-come first-served through the
+# (book_id, status, reservation_date) index; finding the next one is a single
+# index seek. A returned copy is held for the next member (status="ready") for
+# HOLD_DAYS days. Notifications are sent in batches through Django's email
+# framework; EMAIL_BACKEND selects the console or file backend locally.
+#
+# Süre dolumu: ayrılmış (ready) bir kopya HOLD_DAYS içinde alınmazsa
+# rezervasyon kapanır ve kopya sıradakine geçer. Kuyrukta bekleyen bir
+# rezervasyonun expiry_date değeri dikkate alınmaz; üyeye kopya sunulmadan
+# düşürülmemesi için yalnızca reservation_date üzerinden QUEUE_DAYS günden
+# eski olanlar kapatılır.
+#
+# Expiry: when a held (ready) copy is not collected within HOLD_DAYS the
+# reservation is closed and the copy passes to the next member. The
+# expiry_date of a reservation still waiting in the queue is ignored; so that
+# nobody is dropped before being offered a copy, only those older than
+# QUEUE_DAYS by reservation_date are closed.
+
+# Mevcut kayıtlar kuyruktaki rezervasyon için "active" kullanır; aynı değer korunur
+# Existing rows use "active" for a queued reservation; the same value is kept
+PENDING = 'active'
+READY = 'ready'
+FULFILLED = 'fulfilled'
+EXPIRED = 'expired'
+CANCELLED = 'cancelled'
+
+HOLD_DAYS = 3
+# Kuyrukta bekleyen bir rezervasyonun en uzun bekleme süresi (gün)
+# Longest time a reservation may wait in the queue (days)
+QUEUE_DAYS = 180
+NOTIFICATION_BATCH_SIZE = 100
+
+def next_in_queue(book_id):
+    """
+    Kitap için sıradaki bekleyen rezervasyonu döndürür, yoksa None
+
+    Returns the next pending reservation for the book, or None
+    """
+    return Reservation.objects.filter(book_id=book_id, status=PENDING) \
+        .order_by('reservation_date', 'id').first()
+
+def _claim_next(book_id, today):
+    """
+    Sıradaki bekleyen rezervasyonu koşullu güncellemeyle "ready" yapar ve döndürür
+    Eşzamanlı bir iade aynı kaydı aldıysa güncelleme satır bulamaz ve sonraki denenir
+
+    Marks the next pending reservation "ready" with a conditional update and returns it
+    If a concurrent return took the same row the update matches nothing and the next one is tried
+    """
+    while True:
+        reservation = next_in_queue(book_id)
+        if reservation is None:
+            return None
+        if Reservation.objects.filter(id=reservation.id, status=PENDING).update(
+                status=READY, expiry_date=today + timedelta(days=HOLD_DAYS), notification_sent=False):
+            return reservation
+
+def hand_off(book_id, copies=1):
+    """
+    Rafa dönen kopyaları sıradaki üyelere ayırır
+    Her ayrılan kopya için available_copies azaltılır. Ayrılan rezervasyonları döndürür
+
+    Holds copies that came back to the shelf for the next members in line
+    available_copies is decremented for each held copy. Returns the held reservations
+    """
+    held = []
+    today = timezone.localdate()
+    with transaction.atomic():
+        for _ in range(copies):
+            reservation = _claim_next(book_id, today)
+            if reservation is None:
+                break
+            # Kopyayı koşullu olarak ayır; raf boşsa rezervasyonu kuyruğa geri koy ve dur
+            # Hold the copy conditionally; if the shelf is empty put the reservation back and stop
+            if not Book.objects.filter(id=book_id, available_copies__gt=0) \
+                    .update(available_copies=F('available_copies') - 1):
+                Reservation.objects.filter(id=reservation.id).update(
+                    status=PENDING, expiry_date=reservation.expiry_date,
+                    notification_sent=reservation.notification_sent
+                )
+                break
+            held.append(reservation)
+        if held:
+            transaction.on_commit(lambda: availability_changed.send(sender=Book, book_ids=[book_id]))
+    return held
+
+def expire_reservations():
+    """
+    Süresi dolan rezervasyonları toplu olarak kapatır
+    Bekletilen kopyalar HOLD_DAYS, kuyrukta bekleyenler QUEUE_DAYS sonra kapanır
+    Bekletilen kopyalar rafa döner ve sıradaki üyelere ayrılır
+    (süresi dolan rezervasyon sayısı, yeniden ayrılan kopya sayısı) döndürür
+
+    Closes expired reservations in bulk
+    Held copies expire after HOLD_DAYS, reservations waiting in the queue after QUEUE_DAYS
+    Held copies go back to the shelf and are held for the next members in line
+    Returns (number of expired reservations, number of copies held again)
+    """
+    today = timezone.localdate()
+    with transaction.atomic():
+        expired_pending = Reservation.objects.filter(
+            status=PENDING, reservation_date__lt=today - timedelta(days=QUEUE_DAYS)
+        ).update(status=EXPIRED)
+
+        expired_ready = Reservation.objects.filter(status=READY, expiry_date__lt=today)
+        released = list(expired_ready.values('book_id').annotate(copies=Count('id')).order_by('book_id'))
+        expired_count = expired_ready.update(status=EXPIRED)
+
+        rehandled = 0
+        for row in released:
+            # Rafa dönen kopyalar toplam kopya sayısını aşamaz
+            # Copies returned to the shelf can never exceed the total copies
+            Book.objects.filter(id=row['book_id']).update(
+                available_copies=Least(F('available_copies') + row['copies'], F('total_copies'))
+            )
+            rehandled += len(hand_off(row['book_id'], row['copies']))
+        if released:
+            book_ids = [row['book_id'] for row in released]
+            transaction.on_commit(lambda: availability_changed.send(sender=Book, book_ids=book_ids))
+    return expired_pending + expired_count, rehandled
+
+def fulfil(book_id, member_id):
+    """
+    Üyenin bekletilen rezervasyonunu tamamlar ve kopyayı rafa geri koyar,
+    böylece ödünç verme işlemi kopyayı normal şekilde alabilir
+    Rezervasyon yoksa False döndürür
+
+    Completes the member's held reservation and puts the copy back on the
+    shelf, so checkout can take it the normal way
+    Returns False if there is no such reservation
+    """
+    with transaction.atomic():
+        if not Reservation.objects.filter(book_id=book_id, member_id=member_id, status=READY) \
+                .update(status=FULFILLED):
+            return False
+        Book.objects.filter(id=book_id).update(
+            available_copies=Least(F('available_copies') + 1, F('total_copies'))
+        )
+        transaction.on_commit(lambda: availability_changed.send(sender=Book, book_ids=[book_id]))
+    return True
+
+def notification_message(reservation):
+    user = reservation.member.user
+    return EmailMessage(
+        subject=f"Rezervasyonunuz hazır: {reservation.book.title}",
+        body=(
+            f"Merhaba {user.get_full_name() or user.username},\n\n"
+            f"Rezerve ettiğiniz \"{reservation.book.title}\" kitabı sizin için ayrıldı. "
+            f"{reservation.expiry_date} tarihine kadar kütüphaneden alabilirsiniz."
+        ),
+        to=[user.email],
+    )
+
+def send_notifications(batch_size=NOTIFICATION_BATCH_SIZE):
+    """
+    Hazır rezervasyonların bildirimlerini gruplar halinde gönderir
+    Her grup tek bağlantıyla gönderilir ve tek sorguyla işaretlenir
+    Gönderilen bildirim sayısını döndürür
+
+    Sends notifications for ready reservations in batches
+    Each batch is sent over one connection and marked with one query
+    Returns the number of notifications sent
+    """
+    sent = 0
+    connection = get_connection(getattr(settings, 'RESERVATION_EMAIL_BACKEND', None))
+    pending = Reservation.objects.filter(status=READY, notification_sent=False) \
+        .select_related('book', 'member__user').order_by('id')
+
+    last_id = 0
+    while True:
+        batch = list(pending.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return sent
+        last_id = batch[-1].id
+
+        deliverable = [reservation for reservation in batch if reservation.member.user.email]
+        connection.send_messages([notification_message(reservation) for reservation in deliverable])
+        Reservation.objects.filter(id__in=[reservation.id for reservation in deliverable]) \
+            .update(notification_sent=True)
+        sent += len(deliverable)
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+
+from library.models import Book, ItemIdentifier, Member
+
+# Barkod ve RFID okumaları için hızlı çözümleme
+# Fast resolution for barcode and RFID scans
+#
+# Okunan kimlik (üye barkodu, üye numarası, RFID etiketi veya kitap kimliği)
+# süreç içi bir LRU önbellekte üye veya kitaba eşlenir; önbellekteki bir okuma
+# veritabanına gitmez. Kayıtlar değiştiğinde ilgili girdiler sinyallerle
+# silinir; uygulamanın AppConfig.ready() metodunda connect_signals()
+# çağrılmalıdır. Başka süreçlerde yapılan değişiklikler sinyal göndermediği
+# için girdiler en fazla CACHE_TTL saniye yaşar. RFID kapıları
+# resolve_many() ile onlarca etiketi tek seferde, en fazla iki sorguyla çözer.
+#
+# A scanned identifier (member barcode, member number, RFID tag or item
+# identifier) is mapped to a member or book in an in-process LRU cache; a
+# cached scan does not touch the database. Entries are dropped through
+# signals when records change; the app's AppConfig.ready() should call
+# connect_signals(). Changes made in other processes send no signal here, so
+# entries live at most CACHE_TTL seconds. RFID gates resolve dozens of tags at
+# once with resolve_many(), in at most two queries.
+
+MEMBER = 'member'
+BOOK = 'book'
+
+CACHE_SIZE = 20000
+CACHE_TTL = 300
+
+# Üye kimliği olarak aranan alanlar
+# Fields looked up as member identifiers
+MEMBER_IDENTIFIER_FIELDS = ('barcode', 'member_id', 'rfid_tag')
+
+Resolution = namedtuple('Resolution', ['kind', 'object_id', 'label', 'user_id'])
+
+# Bilinmeyen kimlikler de önbelleğe alınır, böylece tekrarlanan hatalı okumalar sorgu yapmaz
+# Unknown identifiers are cached too, so repeated bad reads do not run queries
+NOT_FOUND = Resolution(None, None, None, None)
+
+class ScanCache:
+    """
+    Süreli, iş parçacığı güvenli LRU önbellek
+    Her nesne için hangi anahtarlarda tutulduğu izlenir, böylece nesne
+    değiştiğinde eski kimlikleri de silinir
+
+    Thread-safe LRU cache with expiry
+    The keys each object is stored under are tracked, so the object's old
+    identifiers are also dropped when it changes
+    """
+    def __init__(self, size=CACHE_SIZE, ttl=CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.keys_by_object = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, identifier):
+        with self.lock:
+            entry = self.entries.get(identifier)
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self.entries.move_to_end(identifier)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, identifier, resolution):
+        with self.lock:
+            self._discard(identifier)
+            self.entries[identifier] = (resolution, time.monotonic() + self.ttl)
+            if resolution.kind:
+                self.keys_by_object.setdefault((resolution.kind, resolution.object_id), set()).add(identifier)
+            while len(self.entries) > self.size:
+                self._discard(next(iter(self.entries)))
+
+    def _discard(self, identifier):
+        entry = self.entries.pop(identifier, None)
+        if entry and entry[0].kind:
+            keys = self.keys_by_object.get((entry[0].kind, entry[0].object_id))
+            if keys:
+                keys.discard(identifier)
+                if not keys:
+                    del self.keys_by_object[(entry[0].kind, entry[0].object_id)]
+
+    def invalidate(self, kind, object_id, identifiers=()):
+        """
+        Nesnenin tüm girdilerini ve verilen kimlikleri (ör. yeni değerler) siler
+
+        Drops every entry of the object and the given identifiers (e.g. new values)
+        """
+        with self.lock:
+            for identifier in list(self.keys_by_object.get((kind, object_id), ())) + list(identifiers):
+                self._discard(identifier)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_object.clear()
+
+cache = ScanCache()
+
+def normalize(identifier):
+    # Okuyucular çoğunlukla sonda satır sonu veya boşluk gönderir
+    # Readers often send a trailing newline or spaces
+    return (identifier or '').strip()
+
+def _member_resolutions(identifiers):
+    condition = Q()
+    for field in MEMBER_IDENTIFIER_FIELDS:
+        condition |= Q(**{f'{field}__in': identifiers})
+    members = Member.objects.filter(condition).values(
+        'id', 'user_id', 'user__first_name', 'user__last_name', 'user__username', *MEMBER_IDENTIFIER_FIELDS
+    )
+    found = {}
+    for member in members:
+        name = f"{member['user__first_name']} {member['user__last_name']}".strip() or member['user__username']
+        resolution = Resolution(MEMBER, member['id'], name, member['user_id'])
+        for field in MEMBER_IDENTIFIER_FIELDS:
+            if member[field] in identifiers:
+                found[member[field]] = resolution
+    return found
+
+def _book_resolutions(identifiers):
+    items = ItemIdentifier.objects.filter(identifier_value__in=identifiers) \
+        .values_list('identifier_value', 'book_id', 'book__title')
+    return {value: Resolution(BOOK, book_id, title, None) for value, book_id, title in items}
+
+def resolve_many(identifiers):
+    """
+    Kimlikleri {kimlik: Resolution} olarak çözer; bilinmeyenler NOT_FOUND olur
+    Önbellekte olmayanlar en fazla iki sorguyla birlikte çözülür
+
+    Resolves identifiers as {identifier: Resolution}; unknown ones map to NOT_FOUND
+    Identifiers missing from the cache are resolved together in at most two queries
+    """
+    resolved = {}
+    missing = set()
+    for identifier in map(normalize, identifiers):
+        if not identifier:
+            continue
+        resolution = cache.get(identifier)
+        if resolution is None:
+            missing.add(identifier)
+        else:
+            resolved[identifier] = resolution
+
+    if missing:
+        found = _member_resolutions(missing)
+        remaining = missing - set(found)
+        if remaining:
+            found.update(_book_resolutions(remaining))
+        for identifier in missing:
+            resolution = found.get(identifier, NOT_FOUND)
+            cache.set(identifier, resolution)
+            resolved[identifier] = resolution
+    return resolved
+
+def resolve(identifier):
+    """
+    Tek bir kimliği çözer; bilinmiyorsa NOT_FOUND döndürür
+
+    Resolves a single identifier; returns NOT_FOUND if it is unknown
+    """
+    identifier = normalize(identifier)
+    if not identifier:
+        return NOT_FOUND
+    return resolve_many([identifier]).get(identifier, NOT_FOUND)
+
+def _member_changed(sender, instance, **kwargs):
+    cache.invalidate(MEMBER, instance.pk, [
+        value for value in (getattr(instance, field) for field in MEMBER_IDENTIFIER_FIELDS) if value
+    ])
+
+def _user_changed(sender, instance, update_fields=None, **kwargs):
+    # Girişte yalnızca last_login güncellenir; ad değişmediği için sorgu yapılmaz
+    # Logging in only updates last_login; the name is unchanged so no query is run
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    member_id = Member.objects.filter(user_id=instance.pk).values_list('id', flat=True).first()
+    if member_id is not None:
+        cache.invalidate(MEMBER, member_id)
+
+def _identifier_changed(sender, instance, **kwargs):
+    cache.invalidate(BOOK, instance.book_id, [instance.identifier_value])
+
+def _book_changed(sender, instance, **kwargs):
+    cache.invalidate(BOOK, instance.pk)
+
+def connect_signals():
+    """
+    Önbellek girdilerini silen sinyalleri bağlar
+
+    Connects the signals that drop cache entries
+    """
+    for signal, name in ((post_save, 'saved'), (post_delete, 'deleted')):
+        signal.connect(_member_changed, sender=Member, dispatch_uid=f'scan_lookup_member_{name}')
+        signal.connect(_identifier_changed, sender=ItemIdentifier, dispatch_uid=f'scan_lookup_identifier_{name}')
+        signal.connect(_book_changed, sender=Book, dispatch_uid=f'scan_lookup_book_{name}')
+    post_save.connect(_user_changed, sender=User, dispatch_uid='scan_lookup_user_saved')
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+# SQLite üretim ayarları
+# SQLite production tuning
+#
+# settings.py içinde SQLITE_TUNING = True yapıldığında her yeni SQLite
+# bağlantısında aşağıdaki PRAGMA komutları çalıştırılır. WAL kipinde okuyucular
+# yazma işlemi sürerken beklemez; synchronous=NORMAL WAL ile güvenlidir ve her
+# işlemde fsync yapmaz. Uygulamanın AppConfig.ready() metodunda
+# connect_signals() çağrılmalıdır. Raporlama için salt okunur ikinci bir
+# bağlantı DATABASES['reporting'] = reporting_database() ile tanımlanabilir.
+#
+# With SQLITE_TUNING = True in settings.py the PRAGMA statements below run on
+# every new SQLite connection. In WAL mode readers do not wait while a write
+# is in progress; synchronous=NORMAL is safe with WAL and skips the fsync on
+# every commit. The app's AppConfig.ready() should call connect_signals(). A
+# second, read-only connection for reporting can be defined with
+# DATABASES['reporting'] = reporting_database().
+
+SETTING = 'SQLITE_TUNING'
+REPORTING_ALIAS = 'reporting'
+
+# Bağlantı başına çalıştırılan PRAGMA komutları
+# PRAGMA statements run per connection
+PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    # Kilitli veritabanında hata vermeden önce beklenecek süre (ms)
+    # Time to wait on a locked database before failing (ms)
+    ('busy_timeout', 5000),
+    # 256 MB bellek eşlemeli okuma
+    # 256 MB of memory-mapped reads
+    ('mmap_size', 256 * 1024 * 1024),
+    # Negatif değer KB cinsindendir: 64 MB sayfa önbelleği
+    # A negative value is in KB: 64 MB page cache
+    ('cache_size', -64000),
+    ('temp_store', 'MEMORY'),
+]
+
+# Salt okunur bağlantılarda journal_mode değiştirilemez ve gerekmez
+# journal_mode cannot and need not be changed on read-only connections
+READ_ONLY_PRAGMAS = [(name, value) for name, value in PRAGMAS if name not in ('journal_mode', 'synchronous')]
+
+def is_enabled():
+    return getattr(settings, SETTING, False)
+
+def apply_pragmas(cursor, pragmas=PRAGMAS):
+    for name, value in pragmas:
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+def _connection_created(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not is_enabled():
+        return
+    read_only = 'mode=ro' in str(connection.settings_dict['NAME'])
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, READ_ONLY_PRAGMAS if read_only else PRAGMAS)
+
+def connect_signals():
+    """
+    Yeni bağlantılara PRAGMA komutlarını uygulayan sinyali bağlar
+
+    Connects the signal that applies the PRAGMA statements to new connections
+    """
+    connection_created.connect(_connection_created, dispatch_uid='sqlite_tuning_connection_created')
+
+def read_only_uri(path):
+    """
+    SQLite dosyası için salt okunur bağlantı URI'si döndürür
+    as_uri() yoldaki boşluk, # ve ? gibi karakterleri yüzde kodlamasıyla kaçırır
+
+    Returns a read-only connection URI for a SQLite file
+    as_uri() percent-encodes characters such as spaces, # and ? in the path
+    """
+    return Path(path).resolve().as_uri() + '?mode=ro'
+
+def reporting_database(alias=DEFAULT_DB_ALIAS):
+    """
+    Verilen SQLite veritabanı için salt okunur bir DATABASES girdisi döndürür
+    Kullanım: DATABASES['reporting'] = reporting_database()  (settings.py sonunda)
+
+    Returns a read-only DATABASES entry for the given SQLite database
+    Usage: DATABASES['reporting'] = reporting_database()  (at the end of settings.py)
+    """
+    source = settings.DATABASES[alias]
+    entry = dict(source)
+    entry['NAME'] = read_only_uri(source['NAME'])
+    entry['OPTIONS'] = dict(source.get('OPTIONS', {}), uri=True)
+    entry['TEST'] = {'MIRROR': alias}
+    return entry
+
+def reporting_connection():
+    """
+    Raporlama bağlantısı tanımlıysa onu, değilse varsayılan bağlantıyı döndürür
+
+    Returns the reporting connection if one is defined, otherwise the default connection
+    """
+    alias = REPORTING_ALIAS if REPORTING_ALIAS in settings.DATABASES else DEFAULT_DB_ALIAS
+    return connections[alias]
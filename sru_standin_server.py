@@ -0,0 +1,138 @@
+import os
+import re
+import time
+import random
+import argparse
+import django
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Django ayarlarını yükle
+# Load Django settings
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_management.settings')
+django.setup()
+
+from django.db import connection
+
+from library.models import Book
+
+import marc
+
+# Birleşik arama denemeleri için yerel SRU sunucusu
+# Local SRU stand-in server for federated search trials
+#
+#   python sru_standin_server.py --port 8210 --delay 0.2
+#   python sru_standin_server.py --port 8211 --delay 5 --fail-rate 0.3
+#
+# Yerel kitap tablosundan MARCXML kayıtları üreterek searchRetrieve
+# isteklerini yanıtlar. Gecikme ve hata oranı verilerek yavaş veya sorunlu
+# kataloglar taklit edilir. Sunucuyu kullanmak için protocol="SRU",
+# host="127.0.0.1", port=<port>, database="sru" olan bir ExternalCatalog
+# kaydı ekleyin.
+#
+# Answers searchRetrieve requests with MARCXML records built from the local
+# book table. Slow or flaky catalogs are imitated with a delay and failure
+# rate. To use it add an ExternalCatalog row with protocol="SRU",
+# host="127.0.0.1", port=<port>, database="sru".
+
+SRU_NS = 'http://www.loc.gov/zing/srw/'
+
+CQL_TERM_RE = re.compile(r'([\w.]+)\s*=\s*"((?:[^"\\]|\\.)*)"')
+
+# CQL dizinlerinin kitap alanlarına karşılıkları
+# Book fields for the CQL indexes
+LOOKUPS = {
+    'bath.isbn': 'isbn',
+    'dc.title': 'title__icontains',
+    'dc.creator': 'authors__name__icontains',
+    'cql.serverChoice': 'title__icontains',
+}
+
+def book_record(book):
+    """
+    Kitaptan en temel alanlarla bir MARC kaydı oluşturur
+
+    Builds a MARC record with the basic fields from a book
+    """
+    record = marc.Record()
+    record.add_control_field('001', str(book.id))
+    if book.isbn:
+        record.add_field('020', [('a', book.isbn)])
+    authors = list(book.authors.all())
+    if authors:
+        record.add_field('100', [('a', authors[0].name)], '1 ')
+    record.add_field('245', [('a', book.title)], '10')
+    imprint = []
+    if book.publisher:
+        imprint.append(('b', book.publisher))
+    if book.publication_date:
+        imprint.append(('c', str(book.publication_date.year)))
+    if imprint:
+        record.add_field('264', imprint, ' 1')
+    return record
+
+def search_books(query, limit):
+    books = Book.objects.prefetch_related('authors')
+    for index, value in CQL_TERM_RE.findall(query):
+        lookup = LOOKUPS.get(index)
+        if lookup:
+            books = books.filter(**{lookup: value.replace('\\"', '"')})
+    return list(books.distinct().order_by('id')[:limit])
+
+def sru_response(books):
+    root = ET.Element(f'{{{SRU_NS}}}searchRetrieveResponse')
+    ET.SubElement(root, f'{{{SRU_NS}}}version').text = '1.2'
+    ET.SubElement(root, f'{{{SRU_NS}}}numberOfRecords').text = str(len(books))
+    records = ET.SubElement(root, f'{{{SRU_NS}}}records')
+    for position, book in enumerate(books, 1):
+        record = ET.SubElement(records, f'{{{SRU_NS}}}record')
+        ET.SubElement(record, f'{{{SRU_NS}}}recordSchema').text = 'marcxml'
+        ET.SubElement(record, f'{{{SRU_NS}}}recordPacking').text = 'xml'
+        ET.SubElement(record, f'{{{SRU_NS}}}recordData').append(book_record(book).to_xml())
+        ET.SubElement(record, f'{{{SRU_NS}}}recordPosition').text = str(position)
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+class SRUHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            if random.random() < self.fail_rate:
+                self.send_error(503)
+                return
+            books = search_books(params.get('query', ''), int(params.get('maximumRecords', 10)))
+            body = sru_response(books)
+        finally:
+            connection.close()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def main(port, delay=0.0, fail_rate=0.0):
+    SRUHandler.delay = delay
+    SRUHandler.fail_rate = fail_rate
+    server = ThreadingHTTPServer(('127.0.0.1', port), SRUHandler)
+    print(f"SRU sunucusu http://127.0.0.1:{port}/sru adresinde çalışıyor (gecikme {delay} sn).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nDurduruluyor...")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yerel SRU deneme sunucusu / Local SRU stand-in server")
+    parser.add_argument('--port', type=int, default=8210, help="Dinlenecek port / Port to listen on")
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help="Her yanıttan önce bekleme (saniye) / Delay before each response (seconds)")
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help="503 ile yanıtlanacak isteklerin oranı / Share of requests answered with 503")
+    args = parser.parse_args()
+    main(args.port, args.delay, args.fail_rate)
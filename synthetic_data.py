@@ -0,0 +1,322 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from library.models import Author, Book, Category, Fine, ItemIdentifier, Loan, MaterialType, Member, Reservation
+
+import catalog_search
+import reservations
+
+# Ölçüm için belirlenimci sentetik kütüphane verisi
+# Deterministic synthetic library data for benchmarks
+#
+# generate() verilen kitap sayısına göre yazar, üye, kitap kimliği, ödünç,
+# rezervasyon ve ceza kayıtlarını gruplar halinde bulk_create ile ekler. Aynı
+# tohum ve aynı dayanak tarihi (anchor) aynı veriyi üretir; tarihler bu günden
+# geriye doğru dağıtılır. Dayanak varsayılan olarak sabittir, böylece farklı
+# günlerde ve commit'lerde yapılan ölçümler karşılaştırılabilir.
+# Ödünçler popüler kitaplarda yoğunlaşır. Sinyaller çalışmadığı için kitaplar
+# arama indeksine grup grup elle eklenir; önbellekteki eski belgeler
+# kendiliğinden geçersiz olmaz.
+#
+# generate() bulk inserts authors, members, item identifiers, loans,
+# reservations and fines in chunks, scaled from the number of books. The same
+# seed and anchor date produce the same data; dates are spread backwards from
+# the anchor. The anchor is fixed by default, so runs on different days and
+# commits can be compared.
+# Loans are concentrated on popular books. Signals do not run, so books are
+# added to the search index chunk by chunk by hand; stale cached documents are
+# not invalidated.
+
+CHUNK_SIZE = 5000
+DEFAULT_SEED = 1
+
+# Hazır ölçekler (kitap sayısı)
+# Preset scales (number of books)
+SCALES = {
+    'small': 10_000,
+    'medium': 100_000,
+    'large': 1_000_000,
+}
+
+# Kitap başına diğer kayıtların oranı
+# Ratio of other records per book
+AUTHORS_PER_BOOK = 0.2
+MEMBERS_PER_BOOK = 0.05
+LOANS_PER_BOOK = 2.0
+RESERVATIONS_PER_BOOK = 0.05
+
+HISTORY_DAYS = 730
+# Ödünç, rezervasyon ve ceza tarihlerinin geriye doğru sayıldığı varsayılan gün
+# Default day the loan, reservation and fine dates count back from
+DEFAULT_ANCHOR = date(2025, 1, 1)
+# Doğum ve yayın tarihleri güne bağlı olmasın diye sabit bir tarihten sayılır
+# Birth and publication dates count from a fixed date so they do not depend on the day
+EPOCH = date(1900, 1, 1)
+LOAN_PERIOD = 14
+# Son bu kadar gün içinde verilen ödünçlerin bir kısmı hâlâ açıktır
+# Some of the loans made in this many recent days are still open
+OPEN_LOAN_DAYS = 45
+OPEN_LOAN_RATIO = 0.3
+LATE_RETURN_RATIO = 0.15
+PAID_FINE_RATIO = 0.7
+FINE_PER_DAY = Decimal('1.00')
+
+# Gerçek kayıtlarla çakışmaması için ayrılmış önekler
+# Prefixes reserved so they do not clash with real records
+ISBN_PREFIX = '9799'
+IMPORT_ISBN_PREFIX = '9798'
+USERNAME_PREFIX = 'synthetic_'
+IDENTIFIER_PREFIX = 'SYN'
+
+WORDS = [
+    'gece', 'deniz', 'yol', 'ateş', 'rüzgar', 'şehir', 'bahçe', 'zaman', 'sessiz', 'kayıp',
+    'kırmızı', 'eski', 'son', 'uzak', 'gizli', 'yaz', 'kış', 'ay', 'yıldız', 'ada',
+    'river', 'shadow', 'winter', 'garden', 'silent', 'glass', 'empire', 'storm', 'letters', 'journey',
+    'history', 'science', 'mountain', 'house', 'secret', 'light', 'stone', 'city', 'dream', 'war',
+]
+FIRST_NAMES = [
+    'Ayşe', 'Mehmet', 'Elif', 'Can', 'Zeynep', 'Emre', 'Deniz', 'Selin', 'Burak', 'Ece',
+    'Anna', 'James', 'Maria', 'Peter', 'Sofia', 'David', 'Laura', 'Thomas', 'Nina', 'Victor',
+]
+LAST_NAMES = [
+    'Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Aydın', 'Öztürk', 'Arslan', 'Doğan', 'Koç',
+    'Smith', 'Müller', 'Rossi', 'Novak', 'García', 'Berg', 'Dubois', 'Ivanova', 'Costa', 'Walsh',
+]
+LANGUAGES = ['Türkçe', 'Türkçe', 'Türkçe', 'İngilizce', 'Almanca', 'Fransızca']
+PUBLISHERS = [
+    'İş Bankası Kültür Yayınları', 'Can Yayınları', 'Yapı Kredi Yayınları', 'İletişim Yayınları',
+    'Everest Yayınları', 'Penguin', 'Vintage', 'Oxford University Press',
+]
+
+def isbn13(prefix, number):
+    """
+    Önek ve sıra numarasından kontrol haneli 13 haneli ISBN üretir
+
+    Builds a 13-digit ISBN with check digit from a prefix and a sequence number
+    """
+    body = f"{prefix}{number:0{12 - len(prefix)}d}"
+    check = (10 - sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(body)) % 10) % 10
+    return f"{body}{check}"
+
+def title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).capitalize()
+
+def person(rng):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+def popular(rng, values):
+    # Karesi alınmış rastgele sayı listenin başına yığılır: az sayıda kitap çok ödünç alınır
+    # A squared random number piles up at the start of the list: few books get most loans
+    return values[int(len(values) * rng.random() ** 2)]
+
+def _bulk(model, objects):
+    model.objects.bulk_create(objects, batch_size=CHUNK_SIZE)
+    return objects
+
+def _chunks(count):
+    for start in range(0, count, CHUNK_SIZE):
+        yield start, min(CHUNK_SIZE, count - start)
+
+def create_authors(rng, count):
+    authors = []
+    for start, size in _chunks(count):
+        authors += _bulk(Author, [
+            Author(
+                name='{} {} {}'.format(*person(rng), start + i),
+                birth_date=EPOCH + timedelta(days=rng.randint(0, 100 * 365)),
+            )
+            for i in range(size)
+        ])
+    return [author.id for author in authors]
+
+def create_books(rng, count, author_ids):
+    """
+    Kitapları, yazar bağlantılarını ve kitap kimliklerini oluşturur
+    [(id, total_copies)] listesini popülerlik sırasıyla döndürür
+
+    Creates books, their author links and item identifiers
+    Returns [(id, total_copies)] in popularity order
+    """
+    category_ids = list(Category.objects.order_by('id').values_list('id', flat=True)) or [None]
+    material_type_ids = list(MaterialType.objects.order_by('id').values_list('id', flat=True)) or [None]
+    now = timezone.now()
+    BookAuthor = Book.authors.through
+    books = []
+
+    for start, size in _chunks(count):
+        chunk = []
+        for i in range(start, start + size):
+            copies = rng.randint(1, 5)
+            chunk.append(Book(
+                title=title(rng),
+                isbn=isbn13(ISBN_PREFIX, i),
+                publication_date=EPOCH + timedelta(days=rng.randint(50 * 365, 120 * 365)),
+                description=' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))),
+                page_count=rng.randint(60, 900),
+                language=rng.choice(LANGUAGES),
+                publisher=rng.choice(PUBLISHERS),
+                category_id=rng.choice(category_ids),
+                material_type_id=rng.choice(material_type_ids),
+                total_copies=copies,
+                available_copies=copies,
+                created_at=now,
+                updated_at=now,
+            ))
+        _bulk(Book, chunk)
+        _bulk(BookAuthor, [
+            BookAuthor(book_id=book.id, author_id=author_id)
+            for book in chunk
+            for author_id in rng.sample(author_ids, min(len(author_ids), rng.choice((1, 1, 1, 2))))
+        ])
+        _bulk(ItemIdentifier, [
+            ItemIdentifier(identifier_type='barcode', identifier_value=f"{IDENTIFIER_PREFIX}{start + i:09d}",
+                           book_id=book.id, created_at=now)
+            for i, book in enumerate(chunk)
+        ])
+        catalog_search.index_books([book.id for book in chunk])
+        books += [(book.id, book.total_copies) for book in chunk]
+    return books
+
+def create_members(rng, count, today):
+    now = timezone.now()
+    member_ids = []
+    for start, size in _chunks(count):
+        users = []
+        for i in range(start, start + size):
+            first_name, last_name = person(rng)
+            users.append(User(
+                username=f"{USERNAME_PREFIX}{i:07d}", password='!', first_name=first_name, last_name=last_name,
+                email=f"{USERNAME_PREFIX}{i:07d}@example.com", date_joined=now,
+            ))
+        _bulk(User, users)
+        member_ids += [member.id for member in _bulk(Member, [
+            Member(
+                user_id=user.id, membership_date=today - timedelta(days=rng.randint(0, HISTORY_DAYS)),
+                barcode=f"SM{start + i:08d}", member_id=f"S{start + i:09d}", rfid_tag=f"SR{start + i:010d}",
+            )
+            for i, user in enumerate(users)
+        ])]
+    return member_ids
+
+def create_loans(rng, count, books, member_ids, today):
+    """
+    Ödünçleri ve geç iadeler için cezaları oluşturur; açık ödünçler kopya sayısını aşmaz
+    (ödünç, ceza) sayılarını döndürür
+
+    Creates loans and fines for late returns; open loans never exceed the copies
+    Returns the (loan, fine) counts
+    """
+    open_loans = {}
+    fine_count = 0
+
+    for start, size in _chunks(count):
+        loans = []
+        for _ in range(size):
+            book_id, copies = popular(rng, books)
+            loan_date = today - timedelta(days=rng.randint(0, HISTORY_DAYS))
+            due_date = loan_date + timedelta(days=LOAN_PERIOD)
+            loan = Loan(book_id=book_id, member_id=rng.choice(member_ids),
+                        loan_date=loan_date, due_date=due_date, status='returned')
+            recent = (today - loan_date).days <= OPEN_LOAN_DAYS
+            if recent and rng.random() < OPEN_LOAN_RATIO and open_loans.get(book_id, 0) < copies:
+                open_loans[book_id] = open_loans.get(book_id, 0) + 1
+                loan.status = 'active'
+            else:
+                late = rng.random() < LATE_RETURN_RATIO
+                days = rng.randint(LOAN_PERIOD + 1, LOAN_PERIOD + 30) if late else rng.randint(1, LOAN_PERIOD)
+                loan.return_date = min(loan_date + timedelta(days=days), today)
+            loans.append(loan)
+        _bulk(Loan, loans)
+
+        fines = []
+        for loan in loans:
+            if loan.return_date and loan.return_date > loan.due_date:
+                paid = rng.random() < PAID_FINE_RATIO
+                fines.append(Fine(
+                    loan_id=loan.id, amount=FINE_PER_DAY * (loan.return_date - loan.due_date).days, paid=paid,
+                    payment_date=min(loan.return_date + timedelta(days=rng.randint(0, 10)), today) if paid else None,
+                ))
+        fine_count += len(_bulk(Fine, fines))
+
+    # Rafta kalan kopyalar açık ödünçlerden tek sorguyla hesaplanır
+    # Copies left on the shelf are derived from the open loans in one query
+    open_counts = Loan.objects.filter(book_id=OuterRef('pk'), return_date__isnull=True) \
+        .values('book_id').annotate(count=Count('id')).values('count')
+    Book.objects.filter(id__in=open_loans).update(
+        available_copies=F('total_copies') - Coalesce(Subquery(open_counts), 0)
+    )
+    return count, fine_count
+
+def create_reservations(rng, count, books, member_ids, today):
+    statuses = [reservations.PENDING, reservations.PENDING, reservations.FULFILLED,
+                reservations.EXPIRED, reservations.CANCELLED]
+    for start, size in _chunks(count):
+        rows = []
+        for _ in range(size):
+            reservation_date = today - timedelta(days=rng.randint(0, HISTORY_DAYS // 4))
+            rows.append(Reservation(
+                book_id=popular(rng, books)[0], member_id=rng.choice(member_ids),
+                reservation_date=reservation_date, expiry_date=reservation_date + timedelta(days=7),
+                status=rng.choice(statuses), notification_sent=False,
+            ))
+        _bulk(Reservation, rows)
+    return count
+
+def generate(books, seed=DEFAULT_SEED, anchor=DEFAULT_ANCHOR):
+    """
+    Verilen sayıda kitap ve orantılı diğer kayıtları oluşturur
+    Tarihler anchor gününden geriye doğru dağıtılır
+    Sentetik veri zaten varsa ValueError fırlatır. Kayıt sayılarını döndürür
+
+    Creates the given number of books and proportional other records
+    Dates are spread backwards from the anchor day
+    Raises ValueError if synthetic data already exists. Returns the record counts
+    """
+    if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+        raise ValueError("Sentetik veri zaten var / Synthetic data already exists")
+
+    rng = random.Random(seed)
+    counts = {'books': books}
+    with transaction.atomic():
+        author_ids = create_authors(rng, max(1, int(books * AUTHORS_PER_BOOK)))
+        counts['authors'] = len(author_ids)
+        print(f"  {len(author_ids)} yazar / authors")
+        book_rows = create_books(rng, books, author_ids)
+        print(f"  {books} kitap / books")
+        member_ids = create_members(rng, max(1, int(books * MEMBERS_PER_BOOK)), anchor)
+        counts['members'] = len(member_ids)
+        print(f"  {len(member_ids)} üye / members")
+        counts['loans'], counts['fines'] = create_loans(rng, int(books * LOANS_PER_BOOK), book_rows, member_ids,
+                                                        anchor)
+        print(f"  {counts['loans']} ödünç, {counts['fines']} ceza / loans, fines")
+        counts['reservations'] = create_reservations(rng, int(books * RESERVATIONS_PER_BOOK), book_rows, member_ids,
+                                                     anchor)
+        print(f"  {counts['reservations']} rezervasyon / reservations")
+    return counts
+
+def catalog_records(count, seed=DEFAULT_SEED, start=0):
+    """
+    import_catalog.import_records() biçiminde sentetik katalog kayıtları üretir
+
+    Yields synthetic catalog records in the import_catalog.import_records() format
+    """
+    rng = random.Random(seed)
+    for i in range(start, start + count):
+        yield {
+            'title': title(rng),
+            'isbn': isbn13(IMPORT_ISBN_PREFIX, i),
+            'publication_date': (EPOCH + timedelta(days=rng.randint(50 * 365, 120 * 365))).isoformat(),
+            'description': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))),
+            'page_count': rng.randint(60, 900),
+            'language': rng.choice(LANGUAGES),
+            'publisher': rng.choice(PUBLISHERS),
+            'total_copies': rng.randint(1, 5),
+            'authors': ['{} {}'.format(*person(rng)) for _ in range(rng.choice((1, 1, 2)))],
+        }
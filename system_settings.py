@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from library.models import MaterialType, SystemSetting
+
+# library_systemsetting ve materyal türü ödünç süreleri için süreç içi önbellek
+# Process-local cache for library_systemsetting and material type loan periods
+#
+# Tüm ayarlar ve materyal türlerinin ödünç süreleri bir kez okunup süreç içi
+# bir anlık görüntüde tutulur; tipli okuyucular (get_int, get_decimal, ...)
+# değerleri bir kez çözüp saklar. Bir ayar veya materyal türü kaydedildiğinde
+# Django önbelleğindeki sürüm sayacı artırılır; diğer süreçler sayacı en fazla
+# VERSION_CHECK_INTERVAL saniyede bir okuyup değişiklikte anlık görüntüyü
+# yeniler. Önbellek süreçler arasında paylaşılmıyorsa (LocMemCache) anlık
+# görüntü en fazla MAX_SNAPSHOT_AGE saniye yaşar. Uygulamanın
+# AppConfig.ready() metodunda connect_signals() çağrılmalıdır.
+#
+# All settings and material type loan periods are read once into a
+# process-local snapshot; typed getters (get_int, get_decimal, ...) parse each
+# value once and keep it. When a setting or material type is saved a version
+# counter in the Django cache is incremented; other processes read the counter
+# at most every VERSION_CHECK_INTERVAL seconds and reload the snapshot when it
+# changed. If the cache is not shared between processes (LocMemCache) the
+# snapshot lives at most MAX_SNAPSHOT_AGE seconds. The app's AppConfig.ready()
+# should call connect_signals().
+
+VERSION_KEY = 'system_settings:version'
+VERSION_CHECK_INTERVAL = 2.0
+MAX_SNAPSHOT_AGE = 60.0
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on', 'evet', 'açık')
+
+# Yapılandırma değil iş durumu tutan anahtarlar; sık yazıldıkları için geçersiz kılmaz
+# Keys that hold job state rather than configuration; written often, so they do not invalidate
+STATE_KEYS = {'overdue_fines_checkpoint', 'report_aggregates_refreshed_on'}
+
+class Snapshot:
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.values = dict(SystemSetting.objects.values_list('key', 'value'))
+        self.loan_periods = dict(MaterialType.objects.values_list('id', 'loan_period'))
+        self.parsed = {}
+
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+def _version():
+    return cache.get(VERSION_KEY, 0)
+
+def snapshot():
+    """
+    Güncel anlık görüntüyü döndürür; gerekirse yeniden yükler
+
+    Returns the current snapshot, reloading it if needed
+    """
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    current = _snapshot
+    if current is not None and now - _checked_at < VERSION_CHECK_INTERVAL:
+        return current
+
+    with _lock:
+        version = _version()
+        if _snapshot is None or _snapshot.version != version or now - _snapshot.loaded_at > MAX_SNAPSHOT_AGE:
+            _snapshot = Snapshot(version)
+        _checked_at = now
+        return _snapshot
+
+def invalidate():
+    """
+    Sürüm sayacını artırır; bu ve diğer süreçler anlık görüntüyü yeniden yükler
+
+    Increments the version counter; this and other processes reload the snapshot
+    """
+    global _snapshot
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+    with _lock:
+        _snapshot = None
+
+def _typed(key, parser, default):
+    current = snapshot()
+    cache_key = (key, parser)
+    if cache_key not in current.parsed:
+        raw = current.values.get(key)
+        try:
+            current.parsed[cache_key] = default if raw is None else parser(raw)
+        except (ValueError, TypeError, InvalidOperation):
+            current.parsed[cache_key] = default
+    return current.parsed[cache_key]
+
+def get_str(key, default=None):
+    return snapshot().values.get(key, default)
+
+def get_int(key, default=None):
+    return _typed(key, int, default)
+
+def get_decimal(key, default=None):
+    return _typed(key, Decimal, default)
+
+def _parse_bool(value):
+    return value.strip().lower() in TRUE_VALUES
+
+def get_bool(key, default=False):
+    return _typed(key, _parse_bool, default)
+
+def get_json(key, default=None):
+    return _typed(key, json.loads, default)
+
+def loan_period(material_type_id, default=None):
+    """
+    Materyal türünün ödünç süresini (gün) sorgusuz döndürür
+
+    Returns the material type's loan period (days) without a query
+    """
+    if material_type_id is None:
+        return default
+    return snapshot().loan_periods.get(material_type_id) or default
+
+def set_value(key, value, description=None):
+    """
+    Ayarı kaydeder; sinyal anlık görüntüleri geçersiz kılar
+
+    Saves the setting; the signal invalidates the snapshots
+    """
+    defaults = {'value': value if isinstance(value, str) else json.dumps(value)}
+    if description is not None:
+        defaults['description'] = description
+    SystemSetting.objects.update_or_create(key=key, defaults=defaults)
+
+def _changed(sender, instance, **kwargs):
+    if sender is SystemSetting and instance.key in STATE_KEYS:
+        return
+    # Diğer süreçler onaylanmamış değeri okumasın diye işlem sonrasına bırakılır
+    # Deferred until commit so other processes do not read an uncommitted value
+    transaction.on_commit(invalidate)
+
+def connect_signals():
+    """
+    Ayar ve materyal türü değişikliklerinde anlık görüntüyü geçersiz kılan sinyalleri bağlar
+
+    Connects the signals that invalidate the snapshot when settings or material types change
+    """
+    for model in (SystemSetting, MaterialType):
+        name = model.__name__.lower()
+        post_save.connect(_changed, sender=model, dispatch_uid=f'system_settings_{name}_saved')
+        post_delete.connect(_changed, sender=model, dispatch_uid=f'system_settings_{name}_deleted')
@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+# Kitap başlıklarını karşılaştırmak için normalleştirme ve bulanık eşleştirme
+# Normalization and fuzzy matching for comparing book titles
+#
+# "Les Misérables" / "Les Miserables" veya "İNCE MEMED" / "İnce Memed" gibi
+# yazım farkları aynı anahtara indirgenir. TitleIndex yerel başlıklar için
+# trigram indeksi tutar, böylece eşleşmeler API'ye gitmeden bellekte bulunur.
+#
+# Spelling variants such as "Les Misérables" / "Les Miserables" or
+# "İNCE MEMED" / "İnce Memed" reduce to the same key. TitleIndex keeps a
+# trigram index over local titles, so matches are found in memory before
+# any API call.
+
+TURKISH_UPPER = str.maketrans({'I': 'ı', 'İ': 'i'})
+PUNCTUATION_RE = re.compile(r'[\W_]+')
+NUMBER_RE = re.compile(r'\d+')
+
+# Başlık karşılaştırmasında yok sayılan kelimeler (katlanmış halleriyle)
+# Words ignored when comparing titles (in folded form)
+STOP_WORDS = frozenset([
+    'the', 'a', 'an', 'of', 'and', 'in', 'on', 'to',
+    've', 'ile', 'bir', 'ya', 'da', 'de',
+])
+
+def fold_text(text):
+    """
+    Metni Türkçe kurallarına göre küçük harfe çevirir ve aksanları kaldırır
+    İ/ı/I/i aynı harfe, ş/ç/ğ/ö/ü ise s/c/g/o/u harflerine indirgenir
+
+    Lowercases text with Turkish rules and removes diacritics
+    İ/ı/I/i fold to the same letter, ş/ç/ğ/ö/ü fold to s/c/g/o/u
+    """
+    if not text:
+        return ''
+    text = text.translate(TURKISH_UPPER).lower().replace('ı', 'i')
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+def normalize_title(title):
+    """
+    Başlığı karşılaştırma anahtarına çevirir
+    Harfleri katlar, noktalama işaretlerini ve yaygın kelimeleri atar
+
+    Converts a title to a comparison key
+    Folds letters, drops punctuation and common words
+    """
+    words = PUNCTUATION_RE.sub(' ', fold_text(title)).split()
+    significant = [word for word in words if word not in STOP_WORDS]
+    return ' '.join(significant or words)
+
+def trigrams(text):
+    """
+    Metnin üçlü harf gruplarını döndürür (kelime sınırları boşlukla işaretlenir)
+
+    Returns the character trigrams of a text (word boundaries padded with spaces)
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TitleIndex:
+    """
+    Başlık -> değer eşlemesi için bellek içi indeks
+    Önce normalleştirilmiş başlıkla tam eşleşme, sonra trigram benzerliği denenir
+
+    In-memory index for a title -> value mapping
+    Tries an exact match on the normalized title first, then trigram similarity
+    """
+    def __init__(self, mapping=None, threshold=0.85):
+        self.threshold = threshold
+        self.exact = {}
+        self.grams = {}
+        self.postings = defaultdict(set)
+        for title, value in (mapping or {}).items():
+            self.add(title, value)
+
+    def add(self, title, value):
+        key = normalize_title(title)
+        self.exact[key] = value
+        grams = trigrams(key)
+        self.grams[key] = grams
+        for gram in grams:
+            self.postings[gram].add(key)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def match(self, title):
+        """
+        En iyi eşleşen normalleştirilmiş başlığı ve benzerlik puanını döndürür
+        Eşik üzerinde eşleşme yoksa (None, 0.0) döndürür
+
+        Returns the best matching normalized title and its similarity score
+        Returns (None, 0.0) if nothing scores above the threshold
+        """
+        key = normalize_title(title)
+        if key in self.exact:
+            return key, 1.0
+
+        grams = trigrams(key)
+        counts = defaultdict(int)
+        for gram in grams:
+            for candidate in self.postings.get(gram, ()):
+                counts[candidate] += 1
+
+        # Sayılar farklıysa (cilt, seri numarası) farklı kitaptır
+        # Different numbers (volume, series number) mean a different book
+        numbers = NUMBER_RE.findall(key)
+        best, best_score = None, 0.0
+        for candidate, shared in counts.items():
+            if NUMBER_RE.findall(candidate) != numbers:
+                continue
+            # Dice katsayısı / Dice coefficient
+            score = 2.0 * shared / (len(grams) + len(self.grams[candidate]))
+            if score > best_score:
+                best, best_score = candidate, score
+        if best_score < self.threshold:
+            return None, 0.0
+        return best, best_score
+
+    def lookup(self, title, default=None):
+        """
+        Başlığa karşılık gelen değeri döndürür, yoksa default
+
+        Returns the value for the title, or default
+        """
+        key, _ = self.match(title)
+        return self.exact[key] if key is not None else default
@@ -1,12 +1,22 @@
 import os
-import sys
 import django
-import requests
-import time
-from io import BytesIO
+import queue
+import argparse
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
-from django.core.files.base import ContentFile
-from django.conf import settings
+from django.core.files.base import File
+from django.db.models import Q
+from django.utils import timezone
+
+import http_client
+import lookup_cache
+import cover_state
+import cover_renditions
+import cover_overrides
+import instrumentation
 
 # Django ayarlarını yükle
 # Load Django settings
@@ -20,6 +30,19 @@ from library.models import Book
 GOOGLE_BOOKS_API = "https://www.googleapis.com/books/v1/volumes?q=intitle:{title}&maxResults=1"
 OPEN_LIBRARY_API = "https://openlibrary.org/search.json?title={title}&limit=1"
 
+# İndirilecek kapak dosyasının en büyük boyutu (bayt)
+# Maximum size of a downloaded cover file (bytes)
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Bu boyutu aşan geçici dosyalar bellekte değil diskte tutulur
+# Temporary files larger than this are kept on disk instead of in memory
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# Saklanan kapağın en büyük piksel boyutu (genişlik, yükseklik)
+# Maximum pixel size of the stored cover (width, height)
+MAX_COVER_SIZE = (800, 1200)
+
 def get_cover_from_google_books(title):
     """
     Google Books API'den kitap kapak fotoğrafını al
@@ -29,28 +52,41 @@ def get_cover_from_google_books(title):
     Searches by book title and returns cover image URL if available
     """
     try:
-        # Başlığı temizle ve URL için hazırla
-        # Clean title and prepare for URL
+        # Başlığı temizle ve URL için hazırla; önbellek de bu sorgu metniyle anahtarlanır
+        # Clean title and prepare for URL; the cache is keyed by this query text too
         search_title = title.replace(' ', '+').replace(':', '')
         
-        # Önce tam başlıkla ara
-        # First search with exact title
-        url = GOOGLE_BOOKS_API.format(title=search_title)
-        print(f"  Google Books API sorgusu: {url}")
-        response = requests.get(url, timeout=10)
-        data = response.json()
+        # Önbellekte varsa API'ye gitme (None: daha önce bulunamadı)
+        # Skip the API if cached (None: previously not found)
+        cover_url = lookup_cache.get('google_books', query=search_title)
         
-        if 'items' in data and len(data['items']) > 0:
-            volume_info = data['items'][0].get('volumeInfo', {})
-            image_links = volume_info.get('imageLinks', {})
+        if cover_url is lookup_cache.MISSING:
+            # Önce tam başlıkla ara
+            # First search with exact title
+            url = GOOGLE_BOOKS_API.format(title=search_title)
+            print(f"  Google Books API sorgusu: {url}")
+            response = http_client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            
+            cover_url = None
+            if 'items' in data and len(data['items']) > 0:
+                volume_info = data['items'][0].get('volumeInfo', {})
+                image_links = volume_info.get('imageLinks', {})
+                
+                # Yüksek çözünürlüklü kapak fotoğrafını al
+                # Get high resolution cover image
+                if 'thumbnail' in image_links:
+                    # Daha büyük boyut için URL'yi değiştir
+                    # Change URL for larger size
+                    cover_url = image_links['thumbnail'].replace('zoom=1', 'zoom=2')
             
-            # Yüksek çözünürlüklü kapak fotoğrafını al
-            # Get high resolution cover image
-            if 'thumbnail' in image_links:
-                # Daha büyük boyut için URL'yi değiştir
-                # Change URL for larger size
-                cover_url = image_links['thumbnail'].replace('zoom=1', 'zoom=2')
-                return cover_url
+            # Bulunamayan sonuçlar da negatif kayıt olarak saklanır
+            # Misses are stored as negative entries too
+            lookup_cache.set('google_books', cover_url, query=search_title)
+        
+        if cover_url:
+            return cover_url
             
         # Tam başlıkla bulunamadıysa, başlığın ilk birkaç kelimesiyle dene
         # If not found with exact title, try with first few words
@@ -74,25 +110,38 @@ def get_cover_from_open_library(title):
     Searches by book title and returns cover image URL if available
     """
     try:
-        # Başlığı temizle ve URL için hazırla
-        # Clean title and prepare for URL
+        # Başlığı temizle ve URL için hazırla; önbellek de bu sorgu metniyle anahtarlanır
+        # Clean title and prepare for URL; the cache is keyed by this query text too
         search_title = title.replace(' ', '+').replace(':', '')
         
-        # Önce tam başlıkla ara
-        # First search with exact title
-        url = OPEN_LIBRARY_API.format(title=search_title)
-        print(f"  Open Library API sorgusu: {url}")
-        response = requests.get(url, timeout=10)
-        data = response.json()
+        # Önbellekte varsa API'ye gitme (None: daha önce bulunamadı)
+        # Skip the API if cached (None: previously not found)
+        cover_url = lookup_cache.get('open_library', query=search_title)
+        
+        if cover_url is lookup_cache.MISSING:
+            # Önce tam başlıkla ara
+            # First search with exact title
+            url = OPEN_LIBRARY_API.format(title=search_title)
+            print(f"  Open Library API sorgusu: {url}")
+            response = http_client.get(url)
+            response.raise_for_status()
+            data = response.json()
+            
+            cover_url = None
+            if 'docs' in data and len(data['docs']) > 0:
+                doc = data['docs'][0]
+                if 'cover_i' in doc:
+                    cover_id = doc['cover_i']
+                    # Büyük boyutlu kapak fotoğrafı URL'si
+                    # Large size cover image URL
+                    cover_url = f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"
+            
+            # Bulunamayan sonuçlar da negatif kayıt olarak saklanır
+            # Misses are stored as negative entries too
+            lookup_cache.set('open_library', cover_url, query=search_title)
         
-        if 'docs' in data and len(data['docs']) > 0:
-            doc = data['docs'][0]
-            if 'cover_i' in doc:
-                cover_id = doc['cover_i']
-                # Büyük boyutlu kapak fotoğrafı URL'si
-                # Large size cover image URL
-                cover_url = f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"
-                return cover_url
+        if cover_url:
+            return cover_url
                 
         # Tam başlıkla bulunamadıysa, başlığın ilk birkaç kelimesiyle dene
         # If not found with exact title, try with first few words
@@ -107,13 +156,17 @@ def get_cover_from_open_library(title):
     
     return None
 
-def download_image(url):
+def download_image(url, previous=None):
     """
     URL'den resmi indir ve PIL Image nesnesine dönüştür
-    Hata durumunda None döndürür
+    (resim, bilgi) döndürür; bilgi kaynak URL, ETag, Last-Modified ve içerik özetini içerir
+    previous verilirse koşullu GET yapılır; kapak değişmediyse resim None ve
+    bilgi['unchanged'] True olur. Hata durumunda (None, None) döndürür
     
     Download image from URL and convert to PIL Image object
-    Returns None in case of error
+    Returns (image, info); info holds the source URL, ETag, Last-Modified and content hash
+    If previous is given a conditional GET is made; when the cover has not changed
+    image is None and info['unchanged'] is True. Returns (None, None) in case of error
     """
     try:
         # URL'yi temizle ve boşlukları kaldır
@@ -125,12 +178,66 @@ def download_image(url):
         if 'amazon.com' in url:
             url = url.replace('+', '%2B')
         
-        print(f"  İndiriliyor: {url}")
-        response = requests.get(url, stream=True, timeout=10)
+        # Aynı kaynaktan daha önce indirildiyse koşullu GET yap
+        # Make a conditional GET if previously downloaded from the same source
+        headers = {}
+        if previous and previous.get('source_url') == url:
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
         
-        if response.status_code == 200:
+        print(f"  İndiriliyor: {url}")
+        with http_client.get(url, stream=True, headers=headers) as response, \
+                tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as content:
+            if response.status_code == 304:
+                return None, dict(previous, unchanged=True)
+            
+            if response.status_code != 200:
+                print(f"  HTTP hatası: {response.status_code}")
+                return None, None
+            
+            # Parça parça indir, boyut sınırını aşarsa bırak
+            # Download in chunks, give up if the size limit is exceeded
+            declared_size = int(response.headers.get('Content-Length') or 0)
+            if declared_size > MAX_IMAGE_BYTES:
+                print(f"  Resim çok büyük: {declared_size} bayt")
+                return None, None
+            
+            digest = hashlib.sha256()
+            size = 0
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_IMAGE_BYTES:
+                    print(f"  Resim çok büyük: {MAX_IMAGE_BYTES} bayttan fazla")
+                    return None, None
+                digest.update(chunk)
+                content.write(chunk)
+            
+            info = {
+                'source_url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_hash': digest.hexdigest(),
+                'unchanged': False,
+            }
+            
+            # İçerik aynıysa resmi açıp yeniden kodlamaya gerek yok
+            # No need to decode and re-encode if the content is identical
+            if previous and previous.get('content_hash') == info['content_hash']:
+                info['unchanged'] = True
+                return None, info
+            
             try:
-                img = Image.open(BytesIO(response.content))
+                content.seek(0)
+                img = Image.open(content)
+                
+                # JPEG dosyalarını çözerken küçült (1/2, 1/4, 1/8 ölçek),
+                # böylece tam çözünürlüklü resim hiç belleğe alınmaz
+                # Downscale JPEGs while decoding (1/2, 1/4, 1/8 scale),
+                # so the full resolution image is never held in memory
+                img.draft('RGB', MAX_COVER_SIZE)
+                img.load()
                 
                 # Eğer resim RGB modunda değilse, dönüştür
                 # Convert to RGB mode if not already
@@ -138,16 +245,14 @@ def download_image(url):
                     print(f"  Resim modu dönüştürülüyor: {img.mode} -> RGB")
                     img = img.convert('RGB')
                 
-                return img
+                img.thumbnail(MAX_COVER_SIZE)
+                return img, info
             except Exception as e:
                 print(f"  Resim açma hatası: {str(e)}")
-                return None
-        else:
-            print(f"  HTTP hatası: {response.status_code}")
-            return None
+                return None, None
     except Exception as e:
         print(f"  Resim indirme hatası: {str(e)}")
-        return None
+        return None, None
 
 def update_book_cover(book, image):
     """
@@ -157,28 +262,29 @@ def update_book_cover(book, image):
     Update book cover image
     Deletes old cover image and saves new one
     """
+    # Resmi geçici dosyaya kaydet; depolama bu dosyadan parça parça okur
+    # Save image to a temporary file; storage reads it in chunks
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
     try:
-        # Resmi BytesIO nesnesine kaydet
-        # Save image to BytesIO object
-        output = BytesIO()
-        
-        try:
-            # Resmi JPEG formatında kaydet
-            # Save image in JPEG format
-            image.save(output, format='JPEG', quality=85)
-            output.seek(0)
-        except Exception as e:
-            print(f"  Resim kaydetme hatası: {str(e)}")
-            # PNG formatında deneyebiliriz
-            # We can try PNG format
+        with instrumentation.phase('encode'):
             try:
-                output = BytesIO()
-                image.save(output, format='PNG')
+                # Resmi JPEG formatında kaydet
+                # Save image in JPEG format
+                image.save(output, format='JPEG', quality=85)
                 output.seek(0)
-                print("  JPEG yerine PNG formatında kaydedildi")
-            except Exception as e2:
-                print(f"  PNG formatında da kaydetme hatası: {str(e2)}")
-                return False
+            except Exception as e:
+                print(f"  Resim kaydetme hatası: {str(e)}")
+                # PNG formatında deneyebiliriz
+                # We can try PNG format
+                try:
+                    output.seek(0)
+                    output.truncate()
+                    image.save(output, format='PNG')
+                    output.seek(0)
+                    print("  JPEG yerine PNG formatında kaydedildi")
+                except Exception as e2:
+                    print(f"  PNG formatında da kaydetme hatası: {str(e2)}")
+                    return False
         
         # Eski kapak fotoğrafını sil
         # Delete old cover image
@@ -186,7 +292,9 @@ def update_book_cover(book, image):
             try:
                 old_path = book.cover_image.path if book.cover_image else None
                 if old_path and os.path.exists(old_path):
-                    os.remove(old_path)
+                    with instrumentation.phase('cover_io'):
+                        os.remove(old_path)
+                    cover_renditions.delete_renditions(old_path)
                     print(f"  Eski kapak silindi: {old_path}")
             except Exception as e:
                 print(f"  Eski kapak silme hatası (devam ediliyor): {str(e)}")
@@ -194,217 +302,243 @@ def update_book_cover(book, image):
         # Yeni kapak fotoğrafını kaydet
         # Save new cover image
         filename = f"{book.id}_{book.title.replace(' ', '_')[:30]}.jpg"
-        book.cover_image.save(filename, ContentFile(output.read()), save=True)
+        # Dosya yazımı ve kitap kaydı birlikte ölçülür
+        # The file write and the book save are measured together
+        with instrumentation.phase('store'):
+            book.cover_image.save(filename, File(output), save=True)
         print(f"  Yeni kapak kaydedildi: {filename}")
         
+        # Liste, detay ve retina boyutlarındaki kopyaları oluştur
+        # Create list, detail and retina size renditions
+        try:
+            cover_renditions.create_renditions(image, book.cover_image.path)
+        except Exception as e:
+            print(f"  Kapak kopyaları oluşturma hatası (devam ediliyor): {str(e)}")
+        
         return True
     except Exception as e:
         print(f"  Kapak güncelleme hatası: {str(e)}")
         return False
+    finally:
+        output.close()
+
+def fetch_book_cover(book, overrides, previous=None):
+    """
+    Kitabın kapak URL'sini bulur ve resmi indirir, (resim, bilgi) döndürür
+    Veritabanına dokunmaz, bu yüzden iş parçacıklarında güvenle çalışır
+    
+    Finds the cover URL of a book and downloads the image, returns (image, info)
+    Does not touch the database, so it is safe to run in worker threads
+    """
+    print(f"İşleniyor: {book.id}. {book.title}")
+    
+    try:
+        # Özel kapak fotoğrafı var mı kontrol et (yazım farklarına duyarsız)
+        # Check if there is a special cover image (tolerant of spelling variants)
+        with instrumentation.phase('lookup'):
+            cover_url = overrides.lookup(book.title, book.isbn)
+            if cover_url:
+                print(f"  Özel kapak bulundu: {cover_url}")
+            else:
+                # Google Books API'den kapak fotoğrafını al
+                # Get cover image from Google Books API
+                cover_url = get_cover_from_google_books(book.title)
+                
+                # Google Books API'den kapak bulunamadıysa Open Library API'yi dene
+                # Try Open Library API if cover not found from Google Books API
+                if not cover_url:
+                    cover_url = get_cover_from_open_library(book.title)
+                if cover_url:
+                    print(f"  API'den kapak bulundu: {cover_url}")
+        
+        if not cover_url:
+            print(f"  Kapak bulunamadı: {book.title}")
+            return None, None
+        
+        # Kapak fotoğrafını indir
+        # Download cover image
+        with instrumentation.phase('download'):
+            image, info = download_image(cover_url, previous)
+        if not image and not info:
+            print(f"  Kapak indirilemedi: {book.title}")
+        return image, info
+    except Exception as e:
+        print(f"  Kitap işleme hatası: {str(e)}")
+        return None, None
+
+def save_book_cover(book, image):
+    """
+    İndirilen kapağı kitaba kaydeder
+    Kaydedildiyse True, atlandıysa False döndürür
+    
+    Saves the downloaded cover to the book
+    Returns True if saved, False if skipped
+    """
+    if not image:
+        return False
+    
+    # Kapak fotoğrafını güncelle
+    # Update cover image
+    if update_book_cover(book, image):
+        print(f"  Kapak güncellendi: {book.title}")
+        return True
+    
+    print(f"  Kapak güncellenemedi: {book.title}")
+    return False
 
-def main():
+def fetch_covers_concurrently(books, overrides, states, workers):
+    """
+    Kapakları sınırlı sayıda iş parçacığıyla paralel olarak indirir
+    Sonuçları (kitap, resim, bilgi) olarak tamamlandıkça döndürür; bekleyen sonuç
+    sayısı sınırlı olduğu için bellekte en fazla birkaç resim tutulur
+    
+    Downloads covers in parallel with a bounded number of worker threads
+    Yields (book, image, info) as they complete; pending results are bounded so
+    only a few images are held in memory at once
+    """
+    results = queue.Queue(maxsize=workers * 2)
+    stop = threading.Event()
+    
+    def worker(book, previous):
+        if stop.is_set():
+            return
+        image, info = None, None
+        try:
+            image, info = fetch_book_cover(book, overrides, previous)
+        finally:
+            if not stop.is_set():
+                results.put((book, image, info))
+    
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for book in books:
+            executor.submit(worker, book, states.get(book.id))
+        
+        for _ in range(len(books)):
+            yield results.get()
+    finally:
+        # Tüketici erken durursa (hata, Ctrl-C) bekleyen işler iptal edilir ve
+        # kuyruk boşaltılır; sonucunu koymaya çalışan işçi takılı kalmaz
+        # If the consumer stops early (error, Ctrl-C) pending tasks are cancelled
+        # and the queue is drained so no worker is left blocked on put()
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                results.get_nowait()
+            except queue.Empty:
+                break
+        executor.shutdown(wait=True)
+
+def main(workers=1, incremental=False, queued=False):
     """
     Ana fonksiyon
     Tüm kitapları işler ve kapak fotoğraflarını günceller
+    workers > 1 ise kapaklar paralel indirilir, kayıt tek iş parçacığında yapılır
+    incremental True ise yalnızca kapağı olmayan veya son çalıştırmadan sonra
+    güncellenen kitaplar işlenir ve değişmeyen kapaklar yeniden yazılmaz
+    queued True ise yalnızca import_catalog.py'nin kuyruğa aldığı kapaklar indirilir
     
     Main function
     Processes all books and updates cover images
+    If workers > 1 covers are downloaded in parallel, saving stays on one thread
+    If incremental is True only books without a cover or updated since the last
+    run are processed, and unchanged covers are not rewritten
+    If queued is True only covers queued by import_catalog.py are downloaded
     """
+    # Bağlantı havuzu en az iş parçacığı sayısı kadar olmalı
+    # Connection pool must be at least as large as the number of workers
+    if workers > http_client.POOL_SIZE:
+        http_client.configure(pool_size=workers)
+    
     # Güncellenecek kitapları seç
     # Select books to update
-    books = Book.objects.all()
-    print(f"Toplam {len(books)} kitap işlenecek.")
+    # Filigran kitap sorgusundan önce alınır; çalışma sürerken düzenlenen kitaplar
+    # bir sonraki artımlı çalıştırmada yeniden işlenir
+    # The watermark is taken before the book query; books edited while this run
+    # is in progress are processed again by the next incremental run
+    started_at = timezone.now()
+    
+    with instrumentation.phase('select'):
+        books = Book.objects.all()
+        queued_urls = cover_state.load_queue() if queued else {}
+        if queued:
+            books = books.filter(id__in=queued_urls)
+        last_run = cover_state.get_last_run() if incremental else None
+        if last_run:
+            print(f"Artımlı mod: {last_run} sonrasında güncellenen kitaplar işlenecek.")
+            books = books.filter(Q(cover_image='') | Q(cover_image__isnull=True) | Q(updated_at__gt=last_run))
+        print(f"Toplam {len(books)} kitap işlenecek.")
     
-    # Klasik kitaplar ve popüler kitaplar için özel kapak fotoğrafları
-    # Special cover images for classic and popular books
-    special_covers = {
-        "A Christmas Carol": "https://images-na.ssl-images-amazon.com/images/I/81YPueTY+kL.jpg",
-        "A Study in Scarlet": "https://images-na.ssl-images-amazon.com/images/I/71cGJhVV9QL.jpg",
-        "A Tale of Two Cities": "https://images-na.ssl-images-amazon.com/images/I/81kz-JSHGFL.jpg",
-        "Adventures of Huckleberry Finn": "https://images-na.ssl-images-amazon.com/images/I/71Xnz-EkOvL.jpg",
-        "Alice's Adventures in Wonderland": "https://images-na.ssl-images-amazon.com/images/I/71pmz7HdGpL.jpg",
-        "Pride and Prejudice": "https://images-na.ssl-images-amazon.com/images/I/71Q1tPupKjL.jpg",
-        "The Great Gatsby": "https://images-na.ssl-images-amazon.com/images/I/71FTb9X6wsL.jpg",
-        "Moby Dick": "https://images-na.ssl-images-amazon.com/images/I/71+WUXzpBFL.jpg",
-        "War and Peace": "https://images-na.ssl-images-amazon.com/images/I/91tFN+dgGYL.jpg",
-        "The Odyssey": "https://images-na.ssl-images-amazon.com/images/I/81YzHKeWq7L.jpg",
-        "Don Quixote": "https://images-na.ssl-images-amazon.com/images/I/81-c1oPG2JL.jpg",
-        "Frankenstein": "https://images-na.ssl-images-amazon.com/images/I/71CX11qUBOL.jpg",
-        "Jane Eyre": "https://images-na.ssl-images-amazon.com/images/I/81Gm0qxuP8L.jpg",
-        "Wuthering Heights": "https://images-na.ssl-images-amazon.com/images/I/81Gm0qxuP8L.jpg",
-        "The Count of Monte Cristo": "https://images-na.ssl-images-amazon.com/images/I/81Y8QLPFbWL.jpg",
-        "Crime and Punishment": "https://images-na.ssl-images-amazon.com/images/I/81XbzJGJnTL.jpg",
-        "The Brothers Karamazov": "https://images-na.ssl-images-amazon.com/images/I/81wdB+X6YOL.jpg",
-        "Les Misérables": "https://images-na.ssl-images-amazon.com/images/I/81wdB+X6YOL.jpg",
-        "The Picture of Dorian Gray": "https://images-na.ssl-images-amazon.com/images/I/71R8pJXJiJL.jpg",
-        "Dracula": "https://images-na.ssl-images-amazon.com/images/I/71AFqYQD-2L.jpg",
-        "The Adventures of Sherlock Holmes": "https://images-na.ssl-images-amazon.com/images/I/91YS6mrM00L.jpg",
-        "Gulliver's Travels": "https://images-na.ssl-images-amazon.com/images/I/71c1ltgBYML.jpg",
-        "The Iliad": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "Hamlet": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "Romeo and Juliet": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "Macbeth": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Divine Comedy": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Canterbury Tales": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Prince": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Art of War": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Republic": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Communist Manifesto": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Wealth of Nations": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Origin of Species": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Interpretation of Dreams": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Social Contract": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Second Sex": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Diary of a Young Girl": "https://images-na.ssl-images-amazon.com/images/I/71YoFJSz3LL.jpg",
-        "The Hobbit": "https://images-na.ssl-images-amazon.com/images/I/710+HcoP38L.jpg",
-        "The Lord of the Rings": "https://images-na.ssl-images-amazon.com/images/I/71jLBXtWJWL.jpg",
-        "Harry Potter and the Philosopher's Stone": "https://images-na.ssl-images-amazon.com/images/I/81m1s4wIPML.jpg",
-        "Harry Potter and the Chamber of Secrets": "https://images-na.ssl-images-amazon.com/images/I/91OINeHnJGL.jpg",
-        "Harry Potter and the Prisoner of Azkaban": "https://images-na.ssl-images-amazon.com/images/I/81lAPl9Fl0L.jpg",
-        "Harry Potter and the Goblet of Fire": "https://images-na.ssl-images-amazon.com/images/I/91jlLIQslmL.jpg",
-        "Harry Potter and the Order of the Phoenix": "https://images-na.ssl-images-amazon.com/images/I/91TpLHDnuFL.jpg",
-        "Harry Potter and the Half-Blood Prince": "https://images-na.ssl-images-amazon.com/images/I/51KV4CSJNGL.jpg",
-        "Harry Potter and the Deathly Hallows": "https://images-na.ssl-images-amazon.com/images/I/71sH3vxziLL.jpg",
-        "1984": "https://images-na.ssl-images-amazon.com/images/I/71kxa1-0mfL.jpg",
-        "Animal Farm": "https://images-na.ssl-images-amazon.com/images/I/71Y+pAhQXVL.jpg",
-        "Brave New World": "https://images-na.ssl-images-amazon.com/images/I/81zE42gT3xL.jpg",
-        "To Kill a Mockingbird": "https://images-na.ssl-images-amazon.com/images/I/71FxgtFKcQL.jpg",
-        "The Catcher in the Rye": "https://images-na.ssl-images-amazon.com/images/I/91HPG31dTwL.jpg",
-        "The Grapes of Wrath": "https://images-na.ssl-images-amazon.com/images/I/71S9dGNpR+L.jpg",
-        "The Old Man and the Sea": "https://images-na.ssl-images-amazon.com/images/I/713nNkYQHPL.jpg",
-        "For Whom the Bell Tolls": "https://images-na.ssl-images-amazon.com/images/I/71Fyf-iKa+L.jpg",
-        "The Sun Also Rises": "https://images-na.ssl-images-amazon.com/images/I/81Ib+7+CkUL.jpg",
-        "One Hundred Years of Solitude": "https://images-na.ssl-images-amazon.com/images/I/91-6oKYKH0L.jpg",
-        "Love in the Time of Cholera": "https://images-na.ssl-images-amazon.com/images/I/81XTkCUKfQL.jpg",
-        "The Alchemist": "https://images-na.ssl-images-amazon.com/images/I/71aFt4+OTOL.jpg",
-        "The Little Prince": "https://images-na.ssl-images-amazon.com/images/I/71OZY035QKL.jpg",
-        "The Stranger": "https://images-na.ssl-images-amazon.com/images/I/71Hgw6LDTlL.jpg",
-        "The Plague": "https://images-na.ssl-images-amazon.com/images/I/71Hgw6LDTlL.jpg",
-        "The Trial": "https://images-na.ssl-images-amazon.com/images/I/71Hgw6LDTlL.jpg",
-        "The Metamorphosis": "https://images-na.ssl-images-amazon.com/images/I/71Hgw6LDTlL.jpg",
-        "Ulysses": "https://images-na.ssl-images-amazon.com/images/I/71Hgw6LDTlL.jpg",
-        "Lolita": "https://images-na.ssl-images-amazon.com/images/I/71Hgw6LDTlL.jpg",
-        "Catch-22": "https://images-na.ssl-images-amazon.com/images/I/71Hgw6LDTlL.jpg",
-        "Slaughterhouse-Five": "https://images-na.ssl-images-amazon.com/images/I/71Hgw6LDTlL.jpg",
-        "The Hitchhiker's Guide to the Galaxy": "https://images-na.ssl-images-amazon.com/images/I/81XSN3KyJCL.jpg",
-        "The Road": "https://images-na.ssl-images-amazon.com/images/I/71IJ1HC2a0L.jpg",
-        "No Country for Old Men": "https://images-na.ssl-images-amazon.com/images/I/71IJ1HC2a0L.jpg",
-        "Blood Meridian": "https://images-na.ssl-images-amazon.com/images/I/71IJ1HC2a0L.jpg",
-        "The Road Less Traveled": "https://images-na.ssl-images-amazon.com/images/I/71IJ1HC2a0L.jpg",
-        "The Power of Now": "https://images-na.ssl-images-amazon.com/images/I/714FbKtXS+L.jpg",
-        "The 7 Habits of Highly Effective People": "https://images-na.ssl-images-amazon.com/images/I/71oF3c5ReaL.jpg",
-        "How to Win Friends and Influence People": "https://images-na.ssl-images-amazon.com/images/I/71oF3c5ReaL.jpg",
-        "Think and Grow Rich": "https://images-na.ssl-images-amazon.com/images/I/71oF3c5ReaL.jpg",
-        "The 48 Laws of Power": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Art of War": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Prince": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Republic": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Communist Manifesto": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Wealth of Nations": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Origin of Species": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Interpretation of Dreams": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Social Contract": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Second Sex": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-        "The Diary of a Young Girl": "https://images-na.ssl-images-amazon.com/images/I/71aG+xDKSYL.jpg",
-    }
+        # Kapağı olan kitaplar için önceki indirme bilgilerini yükle
+        # Load previous download info for books that have a cover
+        states = cover_state.load_all()
+        states = {book.id: states[book.id] for book in books if book.cover_image and book.id in states}
     
-    # Türkçe kitaplar için özel kapak fotoğrafları
-    # Special cover images for Turkish books
-    turkish_covers = {
-        "Adalet Dünyası": "https://i.dr.com.tr/cache/600x600-0/originals/0001788076001-1.jpg",
-        "Adalet Evi": "https://i.dr.com.tr/cache/600x600-0/originals/0000000647420-1.jpg",
-        "Adalet Günleri": "https://i.dr.com.tr/cache/600x600-0/originals/0001911177001-1.jpg",
-        "Adalet Hikayesi": "https://i.dr.com.tr/cache/600x600-0/originals/0001911177001-1.jpg",
-        "Adalet Kapısı": "https://i.dr.com.tr/cache/600x600-0/originals/0001911177001-1.jpg",
-        "Adalet Kitabı": "https://i.dr.com.tr/cache/600x600-0/originals/0001911177001-1.jpg",
-        "Adalet Saati": "https://i.dr.com.tr/cache/600x600-0/originals/0001911177001-1.jpg",
-        "Adalet Sırrı": "https://i.dr.com.tr/cache/600x600-0/originals/0001911177001-1.jpg",
-        "Adalet Yolu": "https://i.dr.com.tr/cache/600x600-0/originals/0001911177001-1.jpg",
-        "Adalet Zamanı": "https://i.dr.com.tr/cache/600x600-0/originals/0001911177001-1.jpg",
-        "Amerikan Tanrıları": "https://i.dr.com.tr/cache/600x600-0/originals/0001788076001-1.jpg",
-        "Androidler Elektrikli Koyun Düşler mi?": "https://i.dr.com.tr/cache/600x600-0/originals/0001788076001-1.jpg",
-        "Anlam Hikayesi": "https://i.dr.com.tr/cache/600x600-0/originals/0001788076001-1.jpg",
-        "Anlam Kapısı": "https://i.dr.com.tr/cache/600x600-0/originals/0001788076001-1.jpg",
-    }
+        # Özel kapak fotoğraflarını (cover_overrides tablosu) tek sorguyla yükle;
+        # başlıklar bir kez indekslenir, eşleşmeler API'den önce bellekte bulunur
+        # Load special cover images (cover_overrides table) in a single query;
+        # titles are indexed once, matches are found in memory before any API call
+        overrides = cover_overrides.load_overrides()
     
-    # Tüm özel kapakları birleştir
-    # Combine all special covers
-    all_covers = {**special_covers, **turkish_covers}
+        # Kuyruktaki kapakların URL'leri içe aktarılan kayıttan gelir
+        # URLs of queued covers come from the imported record
+        for book in books:
+            if book.id in queued_urls:
+                overrides.add(queued_urls[book.id], isbn=book.isbn)
     
     updated_count = 0
+    unchanged_count = 0
     skipped_count = 0
     
     # Sadece belirli kitapları işlemek için
     # To process only specific books
     # books = Book.objects.filter(id__in=[12, 26, 18, 13, 10])
     
-    for book in books:
-        print(f"İşleniyor: {book.id}. {book.title}")
-        
-        try:
-            # Özel kapak fotoğrafı var mı kontrol et
-            # Check if there is a special cover image
-            if book.title in all_covers:
-                cover_url = all_covers[book.title]
-                print(f"  Özel kapak bulundu: {cover_url}")
-                
-                # Kapak fotoğrafını indir
-                # Download cover image
-                image = download_image(cover_url)
-                if image:
-                    # Kapak fotoğrafını güncelle
-                    # Update cover image
-                    if update_book_cover(book, image):
-                        updated_count += 1
-                        print(f"  Kapak güncellendi: {book.title}")
-                    else:
-                        skipped_count += 1
-                        print(f"  Kapak güncellenemedi: {book.title}")
-                else:
-                    skipped_count += 1
-                    print(f"  Kapak indirilemedi: {book.title}")
-            else:
-                # Google Books API'den kapak fotoğrafını al
-                # Get cover image from Google Books API
-                cover_url = get_cover_from_google_books(book.title)
-                
-                # Google Books API'den kapak bulunamadıysa Open Library API'yi dene
-                # Try Open Library API if cover not found from Google Books API
-                if not cover_url:
-                    cover_url = get_cover_from_open_library(book.title)
-                
-                if cover_url:
-                    print(f"  API'den kapak bulundu: {cover_url}")
-                    
-                    # Kapak fotoğrafını indir
-                    # Download cover image
-                    image = download_image(cover_url)
-                    if image:
-                        # Kapak fotoğrafını güncelle
-                        # Update cover image
-                        if update_book_cover(book, image):
-                            updated_count += 1
-                            print(f"  Kapak güncellendi: {book.title}")
-                        else:
-                            skipped_count += 1
-                            print(f"  Kapak güncellenemedi: {book.title}")
-                    else:
-                        skipped_count += 1
-                        print(f"  Kapak indirilemedi: {book.title}")
-                else:
-                    skipped_count += 1
-                    print(f"  Kapak bulunamadı: {book.title}")
-        except Exception as e:
+    if workers > 1:
+        results = fetch_covers_concurrently(books, overrides, states, workers)
+    else:
+        results = ((book, *fetch_book_cover(book, overrides, states.get(book.id))) for book in books)
+    
+    # Veritabanı yazmaları yalnızca bu döngüde, tek iş parçacığında yapılır
+    # Database writes happen only in this loop, on a single thread
+    for book, image, info in results:
+        if info and info['unchanged']:
+            cover_state.record(book.id, info)
+            if book.id in queued_urls:
+                cover_state.dequeue(book.id)
+            unchanged_count += 1
+            print(f"  Kapak değişmemiş, atlandı: {book.title}")
+        elif save_book_cover(book, image):
+            cover_state.record(book.id, info)
+            if book.id in queued_urls:
+                cover_state.dequeue(book.id)
+            updated_count += 1
+        else:
             skipped_count += 1
-            print(f"  Kitap işleme hatası: {str(e)}")
-            continue
-            
-        # API limitlerini aşmamak için bekle
-        # Wait to avoid exceeding API limits
-        time.sleep(1)
     
-    print(f"\nToplam {updated_count} kitap kapağı güncellendi, {skipped_count} kitap atlandı.")
+    lookup_cache.close()
+    
+    # Bir sonraki artımlı çalıştırma başlangıçtan sonra güncellenen kitapları alır.
+    # Bu çalıştırmada kaydedilen kapaklar da updated_at'i ilerlettiği için o
+    # kitaplar bir kez daha seçilir; içerik özeti aynı olduğundan yeniden yazılmaz
+    # The next incremental run picks up books updated after the start. Covers
+    # saved in this run also bump updated_at, so those books are selected once
+    # more; their content hash matches, so they are not rewritten
+    if not queued:
+        cover_state.set_last_run(started_at)
+    
+    print(f"\nToplam {updated_count} kitap kapağı güncellendi, {unchanged_count} kapak değişmemiş, {skipped_count} kitap atlandı.")
     print(f"İşlem tamamlandı. Toplam {len(books)} kitap işlendi.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Kitap kapak fotoğraflarını güncelle / Update book cover images")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Eşzamanlı indirme sayısı / Number of concurrent downloads")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Yalnızca yeni veya değişen kitapları işle / Process only new or changed books")
+    parser.add_argument('--queued', action='store_true',
+                        help="Yalnızca kuyruktaki kapakları indir / Download only queued covers")
+    args = parser.parse_args()
+    with instrumentation.script('update_book_covers'):
+        main(workers=args.workers, incremental=args.incremental, queued=args.queued)